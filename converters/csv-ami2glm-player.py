@@ -31,6 +31,7 @@ import numpy as np
 import os
 import csv
 import json
+from concurrent.futures import ThreadPoolExecutor
 
 
 default_options = {
@@ -54,10 +55,42 @@ def write_player(file, obj, node_ID, phase) :
 		file.write(f'\tproperty constant_power_{p};\n')
 	file.write('}\n')
 
-def filter_dict_by_min_value(input_dict, patterns):
+def index_loads(objects, node_IDs):
+	"""Index load objects by the node IDs found in their names
+
+	Arguments:
+	- objects: network objects
+	- node_IDs: node IDs to index
+
+	Returns:
+	- dict: list of load names containing each node ID, in network order
+	- dict: list of node IDs contained in each load name, in node ID order
+	"""
+	order = {node_ID:n for n,node_ID in enumerate(node_IDs) if isinstance(node_ID,str)}
+	sizes = set(len(node_ID) for node_ID in order)
+	loads = {node_ID:[] for node_ID in order}
+	nodes = {}
+	for obj,val in objects.items():
+		if not "load" in val["class"]:
+			continue
+		found = set(obj[n:n+size] for size in sizes for n in range(len(obj)-size+1))
+		found = sorted([x for x in found if x in order],key=lambda x:order[x])
+		for node_ID in found:
+			loads[node_ID].append(obj)
+		if found:
+			nodes[obj] = found
+	return loads, nodes
+
+def filter_dict_by_min_value(input_dict, patterns, index=None):
     result_dict = {}
+    if index:
+        position = {key:n for n,key in enumerate(input_dict)}
     for pattern in patterns:
-        pattern_dictionary = {key: value for key, value in input_dict.items() if pattern in key}   
+        if index:
+            keys = sorted([key for key in index[pattern] if key in position],key=lambda key:position[key])
+            pattern_dictionary = {key: input_dict[key] for key in keys}
+        else:
+            pattern_dictionary = {key: value for key, value in input_dict.items() if pattern in key}   
         min_value = min(pattern_dictionary.values())
         min_dict = {key: value for key, value in pattern_dictionary.items() if value == min_value}
         result_dict.update(min_dict)
@@ -118,35 +151,37 @@ def convert(input_files, output_file, options={}):
 		phase_dict = {}
 		load_list = {}
 		load_list_filtered = {}
+		objects = network["objects"]
+		load_index, node_index = index_loads(objects,node_ID_set)
+		if objects:
+			val = list(objects.values())[-1]
+			load_phase = ''.join([x for x in 'ABC' if x in val['phases']])
 		with open(output_file, mode='w') as file :  
 			file.write('module tape;\n')
 
 			for node_ID in node_ID_set : 
 				if isinstance(node_ID, float) and math.isnan(node_ID) :
 					continue 
-				for obj,val in network["objects"].items() : 
-					if "load" in val["class"] and node_ID in obj: 
-						volts = float(val['nominal_voltage'].split(' ')[0])
-						if 'k' in val['nominal_voltage'].split(' ')[1] : 
-							load_list[obj] = volts*1000
-						elif 'M' in val['nominal_voltage'].split(' ')[1] : 
-							load_list[obj] = volts*1000000
-						else : 
-							load_list[obj] = volts
-				load_phase = ''.join([x for x in 'ABC' if x in val['phases']])
+				for obj in load_index[node_ID] : 
+					nominal_voltage = objects[obj]['nominal_voltage'].split(' ')
+					volts = float(nominal_voltage[0])
+					if 'k' in nominal_voltage[1] : 
+						load_list[obj] = volts*1000
+					elif 'M' in nominal_voltage[1] : 
+						load_list[obj] = volts*1000000
+					else : 
+						load_list[obj] = volts
 				phase_dict[node_ID]=load_phase
 
 							
 			# Grabbing only loads on the low side of the Transformer				
-			load_list_filtered = filter_dict_by_min_value(load_list,node_ID_set)
+			load_list_filtered = filter_dict_by_min_value(load_list,node_ID_set,load_index)
 			for load_ID in load_list_filtered :
-				for obj, val in network["objects"].items() : 
-					if load_ID==obj :
-						load_phase = ''.join([x for x in 'ABC' if x in val['phases']])
-						parent = val["parent"]
-						for node_ID in node_ID_set : 
-							if node_ID in load_ID : 
-								write_player(file, obj, node_ID, load_phase)
+				val = objects[load_ID]
+				load_phase = ''.join([x for x in 'ABC' if x in val['phases']])
+				parent = val["parent"]
+				for node_ID in node_index[load_ID] : 
+					write_player(file, load_ID, node_ID, load_phase)
 
 	new_column_names = {
 		'reading_dttm': 'timestamp',
@@ -156,14 +191,15 @@ def convert(input_files, output_file, options={}):
 	df_ami.rename(columns=new_column_names,inplace=True)
 	df_ami.drop(['interval_pcfc_date','interval_pcfc_hour'],axis=1,inplace=True)
 	df_ami.sort_index(inplace=True)
-	# Iterate over unique customer IDs
-	for customer_id in df_ami['customer_id'].unique():
-	    # Create a new DataFrame for each customer ID
-		if isinstance(customer_id, float) and math.isnan(customer_id) : 
-			continue
-		customer_df = df_ami[df_ami['customer_id'] == customer_id].drop(columns='customer_id')
+
+	# Partition the AMI data by customer ID in a single pass
+	def write_customer(customer_id, customer_df):
+		customer_df = customer_df.drop(columns='customer_id')
 		customer_df = customer_df.sort_values(by='timestamp')
 		customer_df['power[kW]'] = customer_df['power[kW]']/len(phase_dict[customer_id])*1000
 	    # Save the DataFrame to a CSV file
 		output_file = f"{folder_name}/{customer_id}.csv"
 		customer_df.to_csv(output_file, index=False, header=False)
+
+	with ThreadPoolExecutor() as pool:
+		list(pool.map(lambda item: write_customer(*item), df_ami.groupby('customer_id', sort=False)))
@@ -153,12 +153,50 @@ elif output_type == 'profile':
 			vc = None
 		return ph,vn,va,vb,vc
 
-	def profile(objects,root,pos=0):
-		fromdata = objects[root]
-		ph0,vn0,va0,vb0,vc0 = get_voltages(fromdata)
+	# index links by from node (in model order) and cache node voltages
+	links = {}
+	for name,values in data["objects"].items():
+		if "from" in values.keys():
+			links.setdefault(values["from"],[]).append(name)
+	voltages = {}
+	def get_node(objects,name):
+		if not name in voltages:
+			voltages[name] = get_voltages(objects[name])
+		return voltages[name]
+
+	# line segments and link markers by phase (color) and link type
+	segments = {color:{"-":[],"--o":[]} for color in "krb"}
+	branches = []
+
+	def draw(pos,linklen,linktype,from_voltages,to,to_voltages):
+		ph0,vn0,va0,vb0,vc0 = from_voltages
+		ph1,vn1,va1,vb1,vc1 = to_voltages
+		for phase,color,v0,v1 in [("A","k",va0,va1),("B","r",vb0,vb1),("C","b",vc0,vc1)]:
+			if phase in ph0 and phase in ph1:
+				segments[color][linktype].append([(pos,v0),(pos+linklen,v1)])
+		if limit:
+			if (not va1 is None and va1>1+limit) or (not vb1 is None and vb1>1+limit) or (not vc1 is None and vc1>1+limit) : 
+				print("json2png.py WARNING: node %s voltage is high (%g, %g, %g), phases = '%s', nominal voltage=%g" % (to,va1*vn1,vb1*vn1,vc1*vn1,ph1,vn1));
+			if (not va1 is None and va1<1-limit) or (not vb1 is None and vb1<1-limit) or (not vc1 is None and vc1<1-limit) : 
+				print("json2png.py WARNING: node %s voltage is low (%g, %g, %g), phases = '%s', nominal voltage=%g" % (to,va1*vn1,vb1*vn1,vc1*vn1,ph1,vn1));
 
-		count = 0
-		for link in find(objects,"from",root):
+	def profile(objects,root,pos=0):
+		# depth-first walk using a stack of [node,pos,links,pending draw,count]
+		stack = [[root,pos,iter(links.get(root,[])),None,0]]
+		path = {root}
+		while stack:
+			frame = stack[-1]
+			node,pos = frame[0],frame[1]
+			if frame[3]:
+				draw(*frame[3])
+				frame[3] = None
+			link = next(frame[2],None)
+			if link is None:
+				stack.pop()
+				path.discard(node)
+				if frame[4] > 1 and with_nodes:
+					branches.append((node,pos))
+				continue
 			linkdata = objects[link]
 			linktype = "-"
 			if "length" in linkdata.keys():
@@ -169,24 +207,32 @@ elif output_type == 'profile':
 				linktype = "--o"
 			if "to" in linkdata.keys():
 				to = linkdata["to"]
-				todata = objects[to]
-				ph1,vn1,va1,vb1,vc1 = get_voltages(todata)
-				profile(objects,to,pos+linklen)
-				count += 1
-				if "A" in ph0 and "A" in ph1: plt.plot([pos,pos+linklen],[va0,va1],"%sk"%linktype)
-				if "B" in ph0 and "B" in ph1: plt.plot([pos,pos+linklen],[vb0,vb1],"%sr"%linktype)
-				if "C" in ph0 and "C" in ph1: plt.plot([pos,pos+linklen],[vc0,vc1],"%sb"%linktype)
-				if limit:
-					if (not va1 is None and va1>1+limit) or (not vb1 is None and vb1>1+limit) or (not vc1 is None and vc1>1+limit) : 
-						print("json2png.py WARNING: node %s voltage is high (%g, %g, %g), phases = '%s', nominal voltage=%g" % (to,va1*vn1,vb1*vn1,vc1*vn1,ph1,vn1));
-					if (not va1 is None and va1<1-limit) or (not vb1 is None and vb1<1-limit) or (not vc1 is None and vc1<1-limit) : 
-						print("json2png.py WARNING: node %s voltage is low (%g, %g, %g), phases = '%s', nominal voltage=%g" % (to,va1*vn1,vb1*vn1,vc1*vn1,ph1,vn1));
-		if count > 1 and with_nodes:
-			plt.plot([pos,pos,pos],[va0,vb0,vc0],':*',color='grey',linewidth=1)
-			plt.text(pos,min([va0,vb0,vc0]),"[%s]  "%root,color='grey',size=6,rotation=90,verticalalignment='top',horizontalalignment='center')
+				frame[3] = (pos,linklen,linktype,get_node(objects,node),to,get_node(objects,to))
+				frame[4] += 1
+				if not to in path: # do not walk loops
+					path.add(to)
+					stack.append([to,pos+linklen,iter(links.get(to,[])),None,0])
 
 	for obj in find(objects=data["objects"],property="bustype",value="SWING"):
 		profile(objects=data["objects"],root=obj)
+
+	# draw all segments of each phase and link type at once
+	import numpy as np
+	from matplotlib.collections import LineCollection
+	axes = plt.gca()
+	for linktype,linestyle in [("-","solid"),("--o","dashed")]:
+		for color,lines in segments.items():
+			lines = np.array(lines[linktype],dtype=float).reshape(-1,2,2)
+			if linktype == "-" or len(lines) > 0:
+				axes.add_collection(LineCollection(lines,colors=color,linestyles=linestyle))
+			if linktype == "--o" and len(lines) > 0:
+				plt.plot(lines[:,:,0].flatten(),lines[:,:,1].flatten(),"o%s"%color,linestyle="none")
+	axes.autoscale_view()
+	for node,pos in branches:
+		ph0,vn0,va0,vb0,vc0 = get_node(data["objects"],node)
+		plt.plot([pos,pos,pos],[va0,vb0,vc0],':*',color='grey',linewidth=1)
+		plt.text(pos,min([va0,vb0,vc0]),"[%s]  "%node,color='grey',size=6,rotation=90,verticalalignment='top',horizontalalignment='center')
+
 	plt.xlabel('Distance (miles)')
 	plt.ylabel('Voltage (pu)')
 	plt.title(data["globals"]["modelname"]["value"])
@@ -37,6 +37,8 @@ pp = pprint.PrettyPrinter(indent=4, compact=True)
 import traceback
 from copy import copy
 import numpy as np
+import weakref
+from concurrent.futures import ThreadPoolExecutor
 
 #
 # Application information
@@ -203,11 +205,43 @@ glm_devices = {
 #
 
 
+# columns by which the CYME tables are indexed when loaded
+table_index_columns = [
+    "NetworkId",
+    "SectionId",
+    "DeviceNumber",
+    "NodeId",
+    "EquipmentId",
+]
+
+# row positions of each value of the indexed columns of a table
+table_indexes = {}
+
+
+# get the row positions of each value in a table column (built once per table)
+def table_index(table, column):
+    key = id(table)
+    entry = table_indexes.get(key)
+    if entry is None or entry[0]() is not table:
+
+        def forget(ref):
+            if key in table_indexes and table_indexes[key][0] is ref:
+                del table_indexes[key]
+
+        entry = table_indexes[key] = (weakref.ref(table, forget), {})
+    if column not in entry[1]:
+        entry[1][column] = table.groupby(table[column], sort=False).indices
+    return entry[1][column]
+
+
 # find records in a table (exact field match only)
 def table_find(table, **kwargs):
     result = table
-    for key, value in kwargs.items():
-        result = result[result[key] == value]
+    for n, (key, value) in enumerate(kwargs.items()):
+        if n == 0:
+            result = table.iloc[table_index(table, key).get(value, [])]
+        else:
+            result = result[result[key] == value]
     return result
 
 
@@ -219,12 +253,12 @@ def table_get(table, id, column=None, id_column=None):
         else:
             return table.loc[id][column]
     else:
-        for index, row in table.iterrows():
-            if row[id_column] == id:
-                if column == None or column == "*":
-                    return table.loc[index]
-                else:
-                    return table.loc[index][column]
+        rows = table_index(table, id_column).get(id)
+        if rows is not None:
+            if column == None or column == "*":
+                return table.iloc[rows[0]]
+            else:
+                return table.iloc[rows[0]][column]
     return None
 
 
@@ -499,31 +533,43 @@ def format_exception(errmsg, ref=None, data=None):
     return "\n  " + tb + "'" + ref + "' =\n  " + dd
 
 
+def mdb_export(input_file, output_dir, table, extract_option):
+    csvname = table[3:].lower()
+    output_file = f"{output_dir}/{csvname}.csv"
+
+    try:
+        with open(output_file, "w") as output_file_obj:
+            subprocess.run(["mdb-export", input_file, table], stdout=output_file_obj, check=True)
+    except subprocess.CalledProcessError as e:
+        error(f"Command failed with error code {e.returncode}", 1)
+    except FileNotFoundError:
+        error(f"Command not found. Make sure mdb-export is installed and in your PATH.", 3)
+    except Exception as e:
+        error(f"An unexpected error occurred: {e}", 1)
+
+    with open(output_file, "rb") as fh:
+        row_count = sum(1 for line in fh)
+    if row_count <= 1 and extract_option != "all":
+        os.remove(output_file)
+
+
 def mdb2csv(input_file, output_dir, tables, extract_option):
     if os.path.exists(data_folder):
         os.system(f"rm -rf {data_folder}")
     os.system(f"mkdir -p {data_folder}")
-    for table in tables:
-        csvname = table[3:].lower()
-        output_file = f"{output_dir}/{csvname}.csv"
-
-        try:
-            with open(output_file, "w") as output_file_obj:
-                subprocess.run(["mdb-export", input_file, table], stdout=output_file_obj, check=True)
-        except subprocess.CalledProcessError as e:
-            error(f"Command failed with error code {e.returncode}", 1)
-        except FileNotFoundError:
-            error(f"Command not found. Make sure mdb-export is installed and in your PATH.", 3)
-        except Exception as e:
-            error(f"An unexpected error occurred: {e}", 1)
-
-        row_count = os.popen(f"wc -l {output_dir}/{csvname}.csv").read()
-        if (int(row_count.strip().split(" ")[0]) <= 1) and extract_option != "all":
-            os.remove(f"{output_dir}/{csvname}.csv")
+    with ThreadPoolExecutor() as pool:
+        for result in pool.map(
+            lambda table: mdb_export(input_file, output_dir, table, extract_option),
+            tables,
+        ):
+            pass
     cyme_table = {}
     for filename in glob.iglob(f"{output_dir}/*.csv"):
         data = pd.read_csv(filename, dtype=str)
         name = os.path.basename(filename)[0:-4].lower()
+        for column in table_index_columns:
+            if column in data.columns:
+                table_index(data, column)
         cyme_table[name] = data
     return cyme_table
 
@@ -3073,12 +3119,12 @@ def cyme_extract_9(network_id, network, conversion_info):
         for cyme_id, cyme_data in table_find(
             cyme_table["customerload"], NetworkId=network_id
         ).iterrows():
-            section_id = all_section_device[
-                all_section_device["DeviceNumber"] == cyme_data["DeviceNumber"]
-            ]["SectionId"].values
-            load_section = all_section[all_section["SectionId"] == section_id[0]]
+            section_id = table_find(
+                all_section_device, DeviceNumber=cyme_data["DeviceNumber"]
+            )["SectionId"].values
+            load_section = table_find(all_section, SectionId=section_id[0])
             connection_type = int(
-                all_load[all_load["DeviceNumber"] == cyme_data["DeviceNumber"]][
+                table_find(all_load, DeviceNumber=cyme_data["DeviceNumber"])[
                     "ConnectionConfiguration"
                 ]
             )
@@ -3121,10 +3167,10 @@ def cyme_extract_9(network_id, network, conversion_info):
         for cyme_id, cyme_data in table_find(
             cyme_table["shuntcapacitor"], NetworkId=network_id
         ).iterrows():
-            section_id = all_section_device[
-                all_section_device["DeviceNumber"] == cyme_data["DeviceNumber"]
-            ]["SectionId"].values
-            cap_section = all_section[all_section["SectionId"] == section_id[0]]
+            section_id = table_find(
+                all_section_device, DeviceNumber=cyme_data["DeviceNumber"]
+            )["SectionId"].values
+            cap_section = table_find(all_section, SectionId=section_id[0])
             cyme_id = cyme_data["DeviceNumber"]
             glm.add(
                 "capacitor",
@@ -3200,10 +3246,10 @@ def cyme_extract_9(network_id, network, conversion_info):
         for cyme_id, cyme_data in table_find(
             cyme_table["photovoltaic"], NetworkId=network_id
         ).iterrows():
-            section_id = all_section_device[
-                all_section_device["DeviceNumber"] == cyme_data["DeviceNumber"]
-            ]["SectionId"].values
-            pv_section = all_section[all_section["SectionId"] == section_id[0]]
+            section_id = table_find(
+                all_section_device, DeviceNumber=cyme_data["DeviceNumber"]
+            )["SectionId"].values
+            pv_section = table_find(all_section, SectionId=section_id[0])
             cyme_id = cyme_data["DeviceNumber"]
             glm.add(
                 "photovoltaic",
@@ -4,6 +4,7 @@ DOCS_UTILITIES += docs/Tools/Census.md
 DOCS_UTILITIES += docs/Tools/Enduse.md
 DOCS_UTILITIES += docs/Tools/Edit.md
 DOCS_UTILITIES += docs/Tools/Framework.md
+DOCS_UTILITIES += docs/Tools/Infrastructure.md
 DOCS_UTILITIES += docs/Tools/Location.md
 DOCS_UTILITIES += docs/Tools/Mapping.md
 DOCS_UTILITIES += docs/Tools/Modeler.md
@@ -17,3 +18,4 @@ DOCS_UTILITIES += docs/Tools/Substation.md
 DOCS_UTILITIES += docs/Tools/Timeseries.md
 DOCS_UTILITIES += docs/Tools/Unitcalc.md
 DOCS_UTILITIES += docs/Tools/Weather.md
+DOCS_UTILITIES += docs/Tools/Weather_store.md
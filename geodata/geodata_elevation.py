@@ -28,6 +28,8 @@ CONFIGURATION
 
     repourl - identifies the source URL for the elevation data (default is ""http://geodata.arras.energy/elevation/10m")
 
+    maxtiles - maximum number of elevation tiles kept open at once (default is 16)
+
 EXAMPLES
 
     % geodata merge -D elevation 37.5,-122.2 37.4,-122.3 --units=ft
@@ -39,6 +41,7 @@ EXAMPLES
 version = 1 # specify API version
 
 import sys, os
+import collections
 import requests
 import json
 import math, numpy
@@ -64,6 +67,7 @@ default_config = {
     "nan_error" : False,
     "cachedir" : f"{GLD_ETC}/geodata/elevation/10m",
     "repourl" : "http://geodata.arras.energy/elevation/10m",
+    "maxtiles" : 16,
 }
 
 units = {
@@ -105,20 +109,15 @@ def apply(data, options=default_options, config=default_config, warning=print):
 
     # convert lat,lon to address
     try:
-        path = list(zip(data["latitude"],data["longitude"]))
+        lat = numpy.array(data["latitude"],dtype=float)
+        lon = numpy.array(data["longitude"],dtype=float)
     except:
-        path = None
-    if type(path) == type(None):
         raise Exception("elevation dataset requires 'latitude' and 'longitude' fields")
-    elev = []
-    for pos in path:
-        try:
-            elev.append(get_elevation(pos,repourl=config["repourl"],cachedir=config["cachedir"]))
-        except Exception as err:
-            if config["nan_error"]:
-                elev.append(float("nan"))
-            else:
-                raise
+    elev = get_elevations(lat,lon,
+        repourl=config["repourl"],
+        cachedir=config["cachedir"],
+        maxtiles=config["maxtiles"] if "maxtiles" in config else default_config["maxtiles"],
+        nan_error=config["nan_error"])
     try:
         precision = int(options["precision"]["elevation"])
     except:
@@ -135,48 +134,81 @@ def apply(data, options=default_options, config=default_config, warning=print):
 #
 
 def get_elevation(pos,repourl=default_config["repourl"],cachedir=default_config["cachedir"]):
-    """Compute the elevations at the locations specified
-
-    Elevations are obtained for each entry in the args list.  If the
-    resolution is set, the elevations for each step along the path at the
-    specified resolution are provided.
+    """Compute the elevation at the location specified
 
     ARGUMENTS
-        args (tuple list) List of (lat,lon) tuples.
+        pos (tuple) The (lat,lon) tuple of the location
 
     RETURNS
-        DataFrame       Pandas dataframe containing the latitudes, longitudes,
-                        and elevations.
+        list        The elevation at the location
     """
-    n,e = get_imagedata(pos,repourl,cachedir)
-    row,col = get_rowcol(pos)
-    dx = 1.0-math.modf(abs(pos[1])*3600)[0]
-    dy = 1.0-math.modf(abs(pos[0])*3600)[0]
-    e00 = float(e[row][col])
-    if row > 0:
-        e10 = float(e[row-1][col])
-    else:
-        e10 = e00
-    if col > 0:
-        e01 = float(e[row][col-1])
-    else:
-        e01 = e00
-    if row > 0 and col > 0:
-        e11 = float(e[row-1][col-1])
-    else:
-        e11 = e00
-    e0 = dx*e00 + (1-dx)*e01
-    e1 = dx*e10 + (1-dx)*e11
+    return [float(get_elevations([pos[0]],[pos[1]],repourl=repourl,cachedir=cachedir)[0])]
 
-    elev = dy*e0 + (1-dy)*e1
+def get_elevations(lat,lon,
+        repourl=default_config["repourl"],
+        cachedir=default_config["cachedir"],
+        maxtiles=default_config["maxtiles"],
+        nan_error=False):
+    """Compute the elevations at the locations specified
 
+    The locations are grouped by image tile and the elevations of all the
+    locations in a tile are interpolated at once.
 
-    return [elev]
+    ARGUMENTS
+        lat (array)         Latitudes of the locations
+        lon (array)         Longitudes of the locations
+        repourl (str)       Source URL for the elevation data
+        cachedir (str)      Cache folder for the elevation data
+        maxtiles (int)      Maximum number of tiles kept open at once
+        nan_error (bool)    Return NaN for tiles that cannot be loaded instead
+                            of raising an exception
+
+    RETURNS
+        numpy.array         The elevations at the locations
+    """
+    lat = numpy.asarray(lat,dtype=float)
+    lon = numpy.asarray(lon,dtype=float)
+    result = numpy.full(len(lat),float("nan"))
+
+    # group the locations by tile
+    valid = numpy.flatnonzero(~(numpy.isnan(lat)|numpy.isnan(lon)))
+    if len(valid) == 0:
+        return result
+    keys = numpy.stack([numpy.floor(lat[valid]),numpy.floor(lon[valid]),
+        lat[valid]==0,lon[valid]==0],axis=1)
+    _,first,tile = numpy.unique(keys,axis=0,return_index=True,return_inverse=True)
+    tile = tile.ravel()
+    order = numpy.argsort(tile,kind="stable")
+    groups = numpy.split(valid[order],numpy.cumsum(numpy.bincount(tile))[:-1])
+
+    for n,index in zip(valid[first],groups):
+        try:
+            _,e = get_imagedata((lat[n],lon[n]),repourl,cachedir,maxtiles)
+        except Exception:
+            if nan_error:
+                continue
+            raise
+
+        # bilinear interpolation of the tile data
+        row,col = get_rowcol((lat[index],lon[index]))
+        dx = 1.0-numpy.modf(numpy.abs(lon[index])*3600)[0]
+        dy = 1.0-numpy.modf(numpy.abs(lat[index])*3600)[0]
+        up = numpy.maximum(row-1,0)
+        left = numpy.maximum(col-1,0)
+        e00 = e[row,col].astype(float)
+        e10 = e[up,col].astype(float)
+        e01 = e[row,left].astype(float)
+        e11 = numpy.where((row>0)&(col>0),e[up,left],e00).astype(float)
+        e0 = dx*e00 + (1-dx)*e01
+        e1 = dx*e10 + (1-dx)*e11
+        result[index] = dy*e0 + (1-dy)*e1
+
+    return result
 
 def get_rowcol(pos):
-    """Find the row and column index of a pixel for a position"""
-    row = 3600-int(math.modf(abs(pos[0]))[0]*3600)
-    col = 3600-int(math.modf(abs(pos[1]))[0]*3600)
+    """Find the row and column index of a pixel for a position or arrays of positions"""
+    row = 3600-(numpy.modf(numpy.abs(pos[0]))[0]*3600).astype(int)
+    col = 3600-(numpy.modf(numpy.abs(pos[1]))[0]*3600).astype(int)
     return row, col
 
 def get_position(pos):
@@ -237,11 +269,15 @@ def get_imagename(pos):
         lon = "0"
     return f"{lat}_{lon}"
 
-elevation_data = {}
+elevation_data = collections.OrderedDict() # open tiles in least recently used order
 
-def get_imagedata(pos,repourl,cachedir):
+def get_imagedata(pos,repourl,cachedir,maxtiles=default_config["maxtiles"]):
     """Get the image data for a location
 
+    The image is decoded once and stored in the cache folder as a numpy
+    array file, which is memory-mapped when used. At most `maxtiles` images
+    are kept open, with the least recently used closed first.
+
     ARGUMENTS
 
         pos (float,float)   The latitude and longitude of the location
@@ -253,8 +289,12 @@ def get_imagedata(pos,repourl,cachedir):
     """
     tifname = get_imagename(pos)
     global elevation_data
+    if tifname in elevation_data:
+        elevation_data.move_to_end(tifname)
+        return tifname, elevation_data[tifname]
     os.makedirs(cachedir,exist_ok=True)
-    if not tifname in elevation_data.keys():
+    npyname = f"{cachedir}/{tifname}.npy"
+    if not os.path.exists(npyname):
         srcname = f"{repourl}/{tifname}.tif"
         dstname = f"{cachedir}/{tifname}.tif"
         if not os.path.exists(dstname):
@@ -265,7 +305,13 @@ def get_imagedata(pos,repourl,cachedir):
                 for chunk in response.iter_content(chunk_size=1024*1024):
                     if chunk:
                         fh.write(chunk)
-        elevation_data[tifname] = numpy.array(Image.open(dstname))
+        tmpname = f"{npyname}.{os.getpid()}"
+        with open(tmpname,"wb") as fh:
+            numpy.save(fh,numpy.array(Image.open(dstname)))
+        os.replace(tmpname,npyname)
+    elevation_data[tifname] = numpy.load(npyname,mmap_mode="r")
+    while len(elevation_data) > maxtiles:
+        elevation_data.popitem(last=False)
     return tifname, elevation_data[tifname]
 
 
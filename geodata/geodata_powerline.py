@@ -127,6 +127,14 @@ OPTIONS
 
         horizontal - Horizontal clearance margin in meters (default is 2.0 meters)
 
+SCENARIOS
+
+    The linesag() and linesway() functions accept an optional scenarios
+    DataFrame with one row per scenario and any of the weather columns listed
+    in WEATHER. The scenario values override the data values and the result is
+    a DataFrame with one column per scenario.  The linescenarios() function
+    also computes the contact and strike values for each scenario.
+
 CONFIGURATION
 
     cabletype_file - File name for cable types (default is "/usr/local/share/gridlabd/geodata_powerline_cabletypes.csv")
@@ -235,35 +243,6 @@ def get_air_properties(temp):
 
     return specific_mass, thermal_conductivity, dynamic_viscosity
 
-hold_values = {}
-def hold0(name,value=None):
-    """Perform zero-order hold of value
-
-    Returns the previous value of the named variable if curretn value is None.
-    Otherwise return the current value.
-
-    ARGUMENTS
-
-        name (str)      variable name
-
-        value (object)  hold value (None for hold value), or 'init' to use
-                        set to initial value of OPTIONS
-
-    RETURNS
-
-        object          current value or hold value
-    """
-    global hold_values
-    if value == 'init':
-        hold_values[name] = OPTIONS[name]
-    elif value != None:
-        hold_values[name] = value
-        return value
-    elif not name in hold_values.keys():
-        return None
-    else:
-        return hold_values[name]
-
 def get_line_tension_coefficient(d_hori):
     """Compute line tension coefficient for the line length
 
@@ -295,7 +274,316 @@ def get_distance(pos1, pos2):
     a = sin((lat2-lat1)/2)**2+cos(lat1)*cos(lat2)*sin((lon2-lon1)/2)**2
     return 6371e3*(2*atan2(np.sqrt(a),sqrt(1-a)))
 
-def linesag(data):
+def get_distances(lat1, lon1, lat2, lon2):
+    """Compute haversine distances between arrays of locations
+
+    ARGUMENTS
+
+        lat1, lon1 (array)   Latitudes and longitudes of the first endpoints
+
+        lat2, lon2 (array)   Latitudes and longitudes of the second endpoints
+
+    RETURNS
+
+        array   Distances in meters
+    """
+    lat1 = np.asarray(lat1,dtype=float)*pi/180
+    lat2 = np.asarray(lat2,dtype=float)*pi/180
+    lon1 = np.asarray(lon1,dtype=float)*pi/180
+    lon2 = np.asarray(lon2,dtype=float)*pi/180
+    a = np.sin((lat2-lat1)/2)**2+np.cos(lat1)*np.cos(lat2)*np.sin((lon2-lon1)/2)**2
+    return 6371e3*(2*np.arctan2(np.sqrt(a),np.sqrt(1-a)))
+
+# weather values that are held along the path and may be varied by scenario
+WEATHER = ["air_temperature","wind_speed","wind_direction","ice_thickness",
+    "power_flow","global_horizontal_irradiance","ground_reflectance","ice_density"]
+
+def get_held_values(data,name):
+    """Get the zero-order hold of a column along the path
+
+    ARGUMENTS
+
+        data (DataFrame)   Powerline path data
+
+        name (str)         Column name
+
+    RETURNS
+
+        array   Column values with missing values held from the previous row, or
+                the OPTIONS value if the column is missing or no previous value
+                is available
+    """
+    default = OPTIONS[name] if name in OPTIONS else None
+    if not name in data.columns:
+        return np.full(len(data),default,dtype=object if type(default) is str else float)
+    values = data[name].astype(object).where(data[name].notna()).ffill()
+    if type(default) is str:
+        return values.fillna(default).to_numpy(dtype=object)
+    return values.astype(float).fillna(default).to_numpy(dtype=float)
+
+def get_path(data):
+    """Segment a powerline path at the poles
+
+    Rows with a pole height are poles. Rows between two poles are waypoints of
+    the span between them.  The span values are taken from the end pole of the
+    span, with the cable type and weather values held along the path.
+
+    ARGUMENTS
+
+        data (DataFrame)   Powerline path data (see linesag())
+
+    RETURNS
+
+        dict   Path data, or None if the path cannot be computed.  The entries
+               are 'pole' (pole row mask), 'height' (pole heights), 'rows' (row
+               numbers of waypoints), 'cable' (cable specs of the spans),
+               'd_hori' (span lengths), 'dt' (waypoint distances from the start
+               pole), 'z0' and 'z1' (pole top elevations), 'heading' (line
+               heading), 'elevation' (waypoint elevations), and the WEATHER
+               values of the spans.
+    """
+    global OPTIONS
+    if not 'cable_type' in data.columns and not 'cable_type' in OPTIONS.keys():
+        WARNING("cannot compute line sag without any cable type")
+        return None
+    if not 'latitude' in data.columns or not 'longitude' in data.columns:
+        WARNING("cannot compute line sag without latitude and longitude fields")
+        return None
+
+    # stop at the first invalid cable type
+    global CABLETYPES
+    cable_type = get_held_values(data,'cable_type')
+    valid = np.array([bool(x) and x in CABLETYPES.index for x in cable_type],dtype=bool)
+    stop = len(data) if valid.all() else int(np.argmin(valid))
+    if stop < len(data):
+        if not cable_type[stop]:
+            WARNING(f"cable_type not specified")
+        else:
+            WARNING(f"cable_type={cable_type[stop].__repr__()} not found")
+
+    # find poles and the spans of the waypoints
+    if 'pole_height' in data.columns:
+        height = data['pole_height'].to_numpy(dtype=float)[:stop]
+    else:
+        height = np.full(stop,float('nan'))
+    pole = ~np.isnan(height)
+    poles = np.flatnonzero(pole)
+    span = np.cumsum(pole) # number of poles up to each row
+    if ((span == 0) & ~pole).any():
+        WARNING("ignoring waypoints before first pole")
+    if ((span == len(poles)) & (span > 0) & ~pole).any():
+        WARNING("ignoring waypoints after last pole")
+    rows = np.flatnonzero(~pole & (span > 0) & (span < len(poles)))
+    start = poles[span[rows]-1]
+    end = poles[span[rows]]
+
+    latitude = data['latitude'].to_numpy(dtype=float)
+    longitude = data['longitude'].to_numpy(dtype=float)
+    elevation = get_held_values(data,'elevation')
+    result = dict(pole=pole,height=height,rows=rows,
+        cable=CABLETYPES.loc[cable_type[end]],
+        d_hori=get_distances(latitude[start],longitude[start],latitude[end],longitude[end]),
+        dt=get_distances(latitude[start],longitude[start],latitude[rows],longitude[rows]),
+        z0=elevation[start]+height[start],
+        z1=elevation[end]+height[end],
+        elevation=elevation[rows],
+        )
+    if 'heading' in data.columns:
+        result['heading'] = data['heading'].to_numpy(dtype=float)[end]
+    else:
+        result['heading'] = 180*np.arctan2(latitude[rows]-latitude[start],longitude[rows]-longitude[start])/np.pi
+    for name in WEATHER:
+        result[name] = get_held_values(data,name)[end]
+    return result
+
+def get_positive_roots(coef):
+    """Find the positive real roots of many polynomials at once
+
+    ARGUMENTS
+
+        coef (list)   Polynomial coefficients in decreasing powers, each of
+                      which may be a scalar or an array
+
+    RETURNS
+
+        array   The largest positive real root of each polynomial, or nan if none
+    """
+    coef = np.broadcast_arrays(*[np.asarray(x,dtype=float) for x in coef])
+    shape = coef[0].shape
+    p = np.stack([x.ravel() for x in coef],axis=-1)
+    n = p.shape[1] - 1
+    ok = np.isfinite(p).all(axis=1) & (p[:,0] != 0)
+    result = np.full(len(p),float('nan'))
+    if ok.any():
+        # same companion matrix as numpy.roots()
+        A = np.zeros((ok.sum(),n,n))
+        A[:,1:,:-1] = np.eye(n-1)
+        A[:,0,:] = -p[ok,1:]/p[ok,:1]
+        r = np.linalg.eigvals(A)
+        r = np.where((r.imag == 0) & (r.real > 0),r.real,float('nan'))
+        found = ~np.isnan(r).all(axis=1)
+        roots = np.full(len(r),float('nan'))
+        roots[found] = np.nanmax(r[found],axis=1)
+        result[ok] = roots
+    return result.reshape(shape)
+
+def get_line_position(d_hori,dt,z0,z1,heading,cable,
+        power_flow,global_horizontal_irradiance,ground_reflectance,
+        ice_thickness,wind_direction,air_temperature,wind_speed,ice_density):
+    """Calculate line elevation and sway at waypoints
+
+    All arguments may be scalars or arrays that broadcast together, e.g., span
+    values with shape (N,) and weather scenarios with shape (S,1).
+
+    ARGUMENTS
+
+        d_hori (array)    Horizontal distance between the poles
+
+        dt (array)        Horizontal distance from the start pole
+
+        z0, z1 (array)    Elevation of the line at the start and end poles
+
+        heading (array)   Line heading in degrees
+
+        cable (dict)      Cable specs (see geodata_powerline_cabletypes.csv)
+
+        ...               Weather values (see linesag())
+
+    RETURNS
+
+        array   Elevation of the line at the waypoints
+
+        array   Lateral displacement of the line at the waypoints
+    """
+    global OPTIONS
+    with np.errstate(divide='ignore',invalid='ignore'):
+        d_vert = abs(z0-z1)
+        # get the positive slope
+        k_slope = d_vert/d_hori
+        S_L = np.sqrt(d_hori**2 + d_vert**2)
+        k_init = get_line_tension_coefficient(d_hori)
+        rts = np.asarray(cable['rated_tensile_strength'],dtype=float)
+        unit_weight = np.asarray(cable['unit_weight'],dtype=float)
+        diameter = np.asarray(cable['diameter'],dtype=float)
+        air_mass, k_f, air_viscosity = get_air_properties(air_temperature)
+        # calculate the angle between line heading and wind direction
+        phi = (wind_direction - heading)*np.pi/180
+        # calculate the new line sag at loaded condition
+        ice_unit_weight = ice_density*np.pi*ice_thickness*(diameter+ice_thickness)*g
+        wind_unit_weight = 0.5*air_mass*(wind_speed*np.sin(phi))**2 *(diameter+2*ice_thickness)
+        total_unit_weight = np.sqrt(wind_unit_weight**2+(unit_weight+ice_unit_weight)**2)
+        k_init = np.where(d_vert/d_hori > 0.1,
+            np.minimum(k_init, total_unit_weight*d_hori*d_hori/(2*d_vert*rts)),
+            k_init)
+        H_init = rts*k_init
+        # for Q_I
+        Irms = power_flow/(sqrt(3)*np.asarray(cable['voltage_rating'],dtype=float))
+        R_20C = np.asarray(cable['nominal_resistance'],dtype=float)
+        coeff_Al = np.asarray(cable['resistivity'],dtype=float)
+        Q_I_coeff_first = Irms*Irms*R_20C*coeff_Al
+        Q_I_coeff_constant = Irms*Irms*R_20C*(1-coeff_Al*(20.0+273.0))
+        # for Q_S
+        k_a = 1.0 - np.asarray(cable['reflectivity'],dtype=float) # solar radiation absorption coefficient
+        Q_S_constant = k_a*(diameter+2*ice_thickness)*(1+ground_reflectance)*global_horizontal_irradiance
+        # for Q_C
+        k_angle = 1.194 - np.cos(phi) + 0.194*np.cos(2*phi) + 0.368*np.sin(2*phi)
+        Nre = wind_speed * (diameter + 2*ice_thickness) * air_mass / air_viscosity
+        Q_C_coeff_first = np.where(wind_speed < 0.82,
+            k_angle*(1.01+1.35*Nre**0.52)*k_f,
+            k_angle*0.754*(Nre**0.6)*k_f)
+        Q_C_constant = -Q_C_coeff_first*(air_temperature+273.0)
+        # for Q_R
+        k_e = np.asarray(cable['emissivity'],dtype=float)
+        Q_R_coeff_fourth = 5.6704e-8*k_e*(diameter+2.0*ice_thickness)*np.pi
+        Q_R_constant = -Q_R_coeff_fourth*(air_temperature+273.0)**4
+        # for new conductor temp under loading
+        temp_load = get_positive_roots([-Q_R_coeff_fourth,0.0,0.0,
+            Q_I_coeff_first-Q_C_coeff_first,
+            Q_I_coeff_constant+Q_S_constant-Q_C_constant-Q_R_constant]) - 273.0 # unit: degC
+
+        area = np.asarray(cable['conductor_crosssection_area'],dtype=float)
+        elasticity = np.asarray(cable['elasticity'],dtype=float)
+        coef_thermal = np.asarray(cable['thermal_expansion'],dtype=float)
+        H_load_second = (unit_weight*d_hori)**2 *area*elasticity/(24*H_init**2)-H_init+(temp_load-OPTIONS['nominal_temperature'])*coef_thermal*area*elasticity
+        H_load_constant = -(total_unit_weight*d_hori)**2 *area*elasticity/24
+        H_load = get_positive_roots([1.0,H_load_second,0.0,H_load_constant])
+
+        sag_angle = np.arctan(wind_unit_weight/(ice_unit_weight+unit_weight))
+        C_catenary = H_load/total_unit_weight
+        D = total_unit_weight*S_L**2/8/H_load
+        # the longer side of the line sag is on the side of the higher pole, see
+        # https://electricalengineerresources.com/2018/02/16/sample-calculation-of-sag-and-tension-in-transmission-line-uneven-elevation/
+        sign = np.where(z0 > z1,-1.0,1.0)
+        d0_hori = d_hori/2 - sign*d_hori*d_vert/8/D
+        sag0 = total_unit_weight*d0_hori**2 /(2*H_load)
+        sag0_cosh = sag0 + sign*k_slope*dt - C_catenary*(np.cosh((dt-d0_hori)/C_catenary)-1)
+        return z0 + sign*k_slope*dt - sag0_cosh*np.cos(sag_angle), sag0_cosh*np.sin(sag_angle)
+
+def get_scenario_values(path,scenarios=None):
+    """Get the weather values of the path for scenarios
+
+    ARGUMENTS
+
+        path (dict)              Path data (see get_path())
+
+        scenarios (DataFrame)    Scenario weather values, one row per scenario,
+                                 which override the path values of the columns
+                                 given (see WEATHER)
+
+    RETURNS
+
+        dict   Weather values with shape (N,) or (S,1) if scenarios are given
+    """
+    result = {name:path[name] for name in WEATHER}
+    if scenarios is not None:
+        for name in WEATHER:
+            if name in scenarios.columns:
+                result[name] = scenarios[name].to_numpy(dtype=float)[:,np.newaxis]
+            else:
+                result[name] = result[name][np.newaxis,:]
+    return result
+
+def get_line_values(data,scenarios=None):
+    """Compute line sag and sway along a powerline path
+
+    ARGUMENTS
+
+        data (DataFrame)         Powerline path data (see linesag())
+
+        scenarios (DataFrame)    Optional weather scenarios (see
+                                 get_scenario_values())
+
+    RETURNS
+
+        array   Line sag with shape (N,) or (S,N) if scenarios are given
+
+        array   Line sway with shape (N,) or (S,N) if scenarios are given
+    """
+    S = () if scenarios is None else (len(scenarios),)
+    linesag = np.full(S+(len(data),),float('nan'))
+    linesway = np.full(S+(len(data),),float('nan'))
+    path = get_path(data)
+    if path is None:
+        return linesag, linesway
+
+    # pole values
+    pole = np.flatnonzero(path['pole'])
+    linesag[...,pole] = path['height'][pole]
+    linesway[...,pole] = 0.0
+
+    # waypoint values
+    rows = path['rows']
+    if len(rows) > 0:
+        cable = {name:path['cable'][name].to_numpy() for name in path['cable'].columns}
+        elevation, sway = get_line_position(path['d_hori'],path['dt'],
+            path['z0'],path['z1'],path['heading'],cable,
+            **get_scenario_values(path,scenarios))
+        # the line sag is defined as the distance between the line and the ground
+        linesag[...,rows] = np.round(elevation - path['elevation'],OPTIONS["precision"]["linesag"])
+        linesway[...,rows] = np.round(sway,OPTIONS["precision"]["linesag"])
+    return linesag, linesway
+
+def linesag(data,scenarios=None):
     """Linesag calculations
 
     ARGUMENTS
@@ -324,493 +612,111 @@ def linesag(data):
 
             heading        Line run heading is calculated if missing.
 
+        scenarios (DataFrame)   Optional weather values, one row per scenario,
+                           that override the data values (see WEATHER)
+
     RETURNS
 
-        DataFrame   The data input dataframe is returned with the "linesag"
-                    column added.  If the line sag cannot be computed at a given
-                    location, a "nan" value will be stored. If any "nan" values
-                    are encountered, a warning will be generating explaining the
-                    cause of the "nan" value(s).
+        Series      The "linesag" values of the data input.  If the line sag
+                    cannot be computed at a given location, a "nan" value will
+                    be stored. If any "nan" values are encountered, a warning
+                    will be generating explaining the cause of the "nan"
+                    value(s).
+
+        DataFrame   The linesag values of each scenario (columns) at each
+                    location (rows) if scenarios are given.
     """
 
     # Sources:
     #  https://www.ncbi.nlm.nih.gov/pmc/articles/PMC5795940/
     #
-
-    data['linesag'] = float('nan') # default result
-    result = data['linesag'].to_dict()
-    # read cable specs from cable type
-    global OPTIONS
-    if not 'cable_type' in data.columns and not 'cable_type' in OPTIONS.keys():
-        WARNING("cannot compute line sag without any cable type")
-        return data['linesag']
-
-    # read optional initial hold values
-    for name,value in OPTIONS.items():
-        if not name in data.columns:
-            hold0(name,'init')
-    air_temperature = hold0('air_temperature')
-    wind_speed = hold0('wind_speed')
-    wind_direction = hold0('wind_direction')
-    ice_thickness = hold0('ice_thickness')
-    power_flow = hold0('power_flow')
-    global_horizontal_irradiance = hold0('global_horizontal_irradiance')
-    ground_reflectance = hold0('ground_reflectance')
-    ice_density = hold0('ice_density')
-    cable_type = hold0('cable_type')
-    elevation = hold0('elevation')
-
-    # check lat,lon
-    if not 'latitude' in data.columns or not 'longitude' in data.columns:
-        WARNING("cannot compute line sag without latitude and longitude fields")
-        return data['linesag']
-
-    # TODO: vectorize this loop
-    p0 = None # start pole lat,lon
-    p1 = None # end pole lat,lon
-    z0 = None # start pole sag (elevation+height)
-    z1 = None # end pole sag height (elevation+height)
-    ld = {} # line data at waypoints
-    for id, line in data.iterrows():
-        if 'cable_type' in data.columns:
-            cable_type = hold0('cable_type',line['cable_type'])
-        global CABLETYPES
-        if not cable_type:
-            WARNING(f"cable_type not specified")
-            break
-        elif not cable_type in CABLETYPES.index:
-            WARNING(f"cable_type={cable_type.__repr__()} not found")
-            break
-        else:
-            cable = CABLETYPES.loc[cable_type]
-
-        # air Temperature
-        if 'air_temperature' in data.columns:
-            air_temperature = hold0('air_temperature',line['air_temperature'])
-
-        # wind speed
-        if 'wind_speed' in data.columns:
-            wind_speed = hold0('wind_speed',line['wind_speed'])
-
-        # wind direction
-        if 'wind_direction' in data.columns:
-            wind_direction = hold0('wind_direction',line['wind_direction'])
-
-        # ice thickness
-        if 'ice_thickness' in data.columns:
-            ice_thickness = hold0('ice_thickness',line['ice_thickness'])
-
-        # power flow
-        if 'power_flow' in data.columns:
-            power_flow = hold0('power_flow',line['power_flow'])
-
-        # ground reflectance
-        if 'ground_reflectance' in data.columns:
-            ground_reflectance = hold0('ground_reflectance',line['ground_reflectance'])
-
-        # elevation
-        if 'elevation' in data.columns:
-            elevation = hold0('elevation',line['elevation'])
-
-        # pole height - only present for pole, absent at waypoints
-        # breakpoint()
-        if 'pole_height' in data.columns and not isnan(line['pole_height']):
-
-            if not p0: # start of a line segment
-
-                p0 = [line['latitude'],line['longitude']]
-                d0 = 0.0
-                z0 = elevation + line['pole_height']
-                sag = line['pole_height']
-                result[id] = sag
-
-            else: # end of a line segment
-
-                p1 = [line['latitude'],line['longitude']]
-                d1 = get_distance(p0,p1)
-                z1 = elevation + line['pole_height']
-                sag = line['pole_height']
-                result[id] = sag
-
-                # compute linesag at waypoints
-                for n,l in ld.items():
-                    p = [l['latitude'],l['longitude']]
-                    d_hori = get_distance(p0,p1)
-                    try:
-                        elevation = l['elevation']
-                    except:
-                        pass
-                    sag = get_sag_value(d_hori,line,cable,p0,p,z0,z1,
-                        power_flow,global_horizontal_irradiance,ground_reflectance,
-                        ice_thickness,wind_direction,air_temperature,wind_speed,ice_density)
-                    # the line sag is defined as the distance between the interested point on the line and the ground
-                    sag = sag - elevation
-                    result[n] = round(sag,OPTIONS["precision"]["linesag"])
-
-                # reset for next segment
-                p0 = p1
-                z0 = z1
-                ld = {}
-
-
-        elif p0: # continue a line segment
-
-            # end last segment
-            ld[id] = line
-
-        else:
-
-            WARNING("ignoring waypoints before first pole")
-
-
-    if ld:
-        WARNING("ignoring waypoints after last pole")
-    return pandas.DataFrame(result.values(),columns=["linesag"],index=result.keys())["linesag"]
+    result, _ = get_line_values(data,scenarios)
+    if scenarios is None:
+        return pandas.Series(result,index=data.index,name="linesag")
+    return pandas.DataFrame(result.T,index=data.index,columns=scenarios.index)
 
 def get_sag_value(d_hori,line,cable,p0,p1,z0,z1,
         power_flow,global_horizontal_irradiance,ground_reflectance,
         ice_thickness,wind_direction,air_temperature,wind_speed,ice_density):
     # p1 is the location (lat, lon) of interested point, while p0 is the previous pole
     """Calculate line sag values"""
-    global OPTIONS
-    d_vert = abs(z0-z1)
-    # get the positive slope
-    k_slope = d_vert/d_hori 
-    S_L = sqrt(d_hori**2 + d_vert**2)    
-    k_init = get_line_tension_coefficient(d_hori)
-    span = sqrt(d_hori*d_hori + d_vert*d_vert)
-    rts = cable['rated_tensile_strength']
-    unit_weight = cable['unit_weight']
-    diameter = cable['diameter']
-    air_mass, k_f, air_viscosity = get_air_properties(air_temperature)
-    # calculate the line heading and the angle between line heading and wind direction
     try:
         line_angle = line['heading']
     except:
         line_angle = 180*atan2(p1[0]-p0[0],p1[1]-p0[1])/np.pi
-    phi = (wind_direction - line_angle)*np.pi/180
-    # calculate the new line sag at loaded condition
-    ice_unit_weight = ice_density*np.pi*ice_thickness*(diameter+ice_thickness)*g
-    wind_unit_weight = 0.5*air_mass*(wind_speed*sin(phi))**2 *(diameter+2*ice_thickness)
-    total_unit_weight = sqrt(wind_unit_weight**2+(unit_weight+ice_unit_weight)**2)
-    if d_vert/d_hori > 0.1:
-        k_init = min(k_init, total_unit_weight*d_hori*d_hori/(2*d_vert*rts))
-    H_init = rts*k_init
-    sag_init = unit_weight*span*span/(8*H_init)
-    # for Q_I
-    P_rated = power_flow
-    Vll_rated = cable['voltage_rating']
-    Irms =  P_rated/(sqrt(3)*Vll_rated)
-    R_20C = cable['nominal_resistance']
-    coeff_Al = cable['resistivity']
-    Q_I_coeff_first = Irms*Irms*R_20C*coeff_Al
-    Q_I_coeff_constant = Irms*Irms*R_20C*(1-coeff_Al*(20.0+273.0))
-    # for Q_S
-    k_a = 1.0 - cable['reflectivity'] # solar radiation absorption coefficient
-    GHI = global_horizontal_irradiance # unit: W/m2
-    k_g = ground_reflectance # ground reflect
-    Q_S_constant = k_a*(diameter+2*ice_thickness)*(1+k_g)*GHI
-    # for Q_C
-    k_angle = 1.194 - cos(phi) + 0.194*cos(2*phi) + 0.368*sin(2*phi)
-    Nre = wind_speed * (diameter + 2*ice_thickness) * air_mass / air_viscosity
-    if wind_speed < 0.82:
-        Q_C_coeff_first = k_angle*(1.01+1.35*Nre**0.52)*k_f
-        Q_C_constant = -k_angle*(1.01+1.35*Nre**0.52)*k_f*(air_temperature+273.0)
-    else:
-        Q_C_coeff_first = k_angle*0.754*(Nre**0.6)*k_f
-        Q_C_constant = -k_angle*0.754*(Nre**0.6)*k_f*(air_temperature+273.0)
-    # for Q_R
-    k_e = cable['emissivity']
-    Q_R_constant = -5.6704e-8*k_e*(diameter+2.0*ice_thickness)*np.pi*(air_temperature+273.0)**4
-    Q_R_coeff_fourth = 5.6704e-8*k_e*(diameter+2.0*ice_thickness)*np.pi
-    # for new conductor temp under loading
-    coef_sag = [-Q_R_coeff_fourth,0.0,0.0,Q_I_coeff_first-Q_C_coeff_first,Q_I_coeff_constant+Q_S_constant-Q_C_constant-Q_R_constant]
-    r = np.roots(coef_sag)
-    r = r[~np.iscomplex(r)]
-    temp_load = np.absolute(r[r > 0.0]) # unit: K
-    temp_load = temp_load - 273.0 # unit: DegC
-
-    area = cable['conductor_crosssection_area']
-    elasticity = cable['elasticity']
-    temp_init = OPTIONS['nominal_temperature']
-    coef_thermal = cable['thermal_expansion']
-    H_load_second = (unit_weight*d_hori)**2 *area*elasticity/(24*H_init**2)-H_init+(temp_load-temp_init)*coef_thermal*area*elasticity
-    H_load_constant = -(total_unit_weight*d_hori)**2 *area*elasticity/24
-    coef_H = [1, float(H_load_second), 0.0, float(H_load_constant)]
-    r = np.roots(coef_H)
-    r = r[~np.iscomplex(r)]
-    H_load = np.absolute(r[r > 0.0])
-
-    # sag_load = total_unit_weight*span*span/(8*H_load)
-    sag_angle = atan(wind_unit_weight/(ice_unit_weight+unit_weight))
-    C_catenary = H_load/total_unit_weight      # should be total_unit_weight; ok
-    # calculate the D; 
-    D = total_unit_weight*S_L**2/8/H_load 
-    if z0 > z1:
-        # d0_hori = d_hori/2 + H_load*d_vert/(total_unit_weight*d_hori)
-        d0_hori = d_hori/2 + d_hori*d_vert/8/D
-        d1_hori = d_hori - d0_hori
-        # sag0 is D_A, the longer side of the line sag
-        # https://electricalengineerresources.com/2018/02/16/sample-calculation-of-sag-and-tension-in-transmission-line-uneven-elevation/
-        sag0 = total_unit_weight*d0_hori**2 /(2*H_load)
-        dt = get_distance(p0,p1)
-        sag0_cosh = sag0 - k_slope*dt - C_catenary*(np.cosh((dt-d0_hori)/C_catenary)-1)
-        sag_elevation = z0 - k_slope*dt - sag0_cosh*cos(sag_angle)
-        # sag0_cosh = 1
-    else:
-        # d0_hori = d_hori/2 - H_load*d_vert/(total_unit_weight*d_hori)
-        d0_hori = d_hori/2 - d_hori*d_vert/8/D
-        d1_hori = d_hori - d0_hori
-        sag0 = total_unit_weight*d0_hori**2 /(2*H_load)
-        dt = get_distance(p0,p1)
-        sag0_cosh = sag0 + k_slope*dt - C_catenary*(np.cosh((dt-d0_hori)/C_catenary)-1)
-        sag_elevation = z0 + k_slope*dt - sag0_cosh*cos(sag_angle)
-        # sag0_cosh = 0
-    result = sag_elevation[0]
-    # print(f"get_sag_value(d_hori={round(d_hori).__repr__()},p0={p0.__repr__()},p1={p1.__repr__()},z0={z0.__repr__()},z1={z1.__repr__()},...) --> {result}")
-    return result
-
-def linesway(data):
-    # just copy the linesag code
+    result, _ = get_line_position(d_hori,get_distance(p0,p1),z0,z1,line_angle,cable,
+        power_flow,global_horizontal_irradiance,ground_reflectance,
+        ice_thickness,wind_direction,air_temperature,wind_speed,ice_density)
+    return float(result)
 
-    data['linesway'] = float('nan') # default result
-    result = data['linesway'].to_dict()
+def linesway(data,scenarios=None):
+    """Linesway calculations
 
-    # read cable specs from cable type
-    global OPTIONS
-    if not 'cable_type' in data.columns and not 'cable_type' in OPTIONS.keys():
-        WARNING("cannot compute line sag without any cable type")
-        return data['linesway']
-
-    # read optional initial hold values
-    for name,value in OPTIONS.items():
-        if not name in data.columns:
-            hold0(name,'init')
-    air_temperature = hold0('air_temperature')
-    wind_speed = hold0('wind_speed')
-    wind_direction = hold0('wind_direction')
-    ice_thickness = hold0('ice_thickness')
-    power_flow = hold0('power_flow')
-    global_horizontal_irradiance = hold0('global_horizontal_irradiance')
-    ground_reflectance = hold0('ground_reflectance')
-    ice_density = hold0('ice_density')
-    cable_type = hold0('cable_type')
-    elevation = hold0('elevation')
-
-    # check lat,lon
-    if not 'latitude' in data.columns or not 'longitude' in data.columns:
-        WARNING("cannot compute line sag without latitude and longitude fields")
-        return data['linesway']
-
-    # TODO: vectorize this loop
-    p0 = None # start pole lat,lon
-    p1 = None # end pole lat,lon
-    z0 = None # start pole sag (elevation+height)
-    z1 = None # end pole sag height (elevation+height)
-    ld = {} # line data at waypoints
-    for id, line in data.iterrows():
-        if 'cable_type' in data.columns:
-            cable_type = hold0('cable_type',line['cable_type'])
-        global CABLETYPES
-        if not cable_type:
-            WARNING(f"cable_type not specified")
-            break
-        elif not cable_type in CABLETYPES.index:
-            WARNING(f"cable_type={cable_type.__repr__()} not found")
-            break
-        else:
-            cable = CABLETYPES.loc[cable_type]
-
-        # air Temperature
-        if 'air_temperature' in data.columns:
-            air_temperature = hold0('air_temperature',line['air_temperature'])
-
-        # wind speed
-        if 'wind_speed' in data.columns:
-            wind_speed = hold0('wind_speed',line['wind_speed'])
-
-        # wind direction
-        if 'wind_direction' in data.columns:
-            wind_direction = hold0('wind_direction',line['wind_direction'])
-
-        # ice thickness
-        if 'ice_thickness' in data.columns:
-            ice_thickness = hold0('ice_thickness',line['ice_thickness'])
-
-        # power flow
-        if 'power_flow' in data.columns:
-            power_flow = hold0('power_flow',line['power_flow'])
-
-        # ground reflectance
-        if 'ground_reflectance' in data.columns:
-            ground_reflectance = hold0('ground_reflectance',line['ground_reflectance'])
-
-        # elevation
-        if 'elevation' in data.columns:
-            elevation = hold0('elevation',line['elevation'])
-
-        # pole height - only present for pole, absent at waypoints
-        # breakpoint()
-        if 'pole_height' in data.columns and not isnan(line['pole_height']):
-
-            if not p0: # start of a line segment
-
-                p0 = [line['latitude'],line['longitude']]
-                d0 = 0.0
-                z0 = elevation + line['pole_height']
-                sag = 0.0
-                result[id] = sag
-
-            else: # end of a line segment
-
-                p1 = [line['latitude'],line['longitude']]
-                d1 = get_distance(p0,p1)
-                z1 = elevation + line['pole_height']
-                sag = 0.0
-                result[id] = sag
-
-                # compute linesway at waypoints
-                for n,l in ld.items():
-                    p = [l['latitude'],l['longitude']]
-                    # print(p)
-                    d_hori = get_distance(p0,p1)        # the distance between two poles; constant
-                    try:
-                        elevation = l['elevation']
-                    except:
-                        pass
-                    sag = get_sway_value(d_hori,line,cable,p0,p,z0,z1,
-                        power_flow,global_horizontal_irradiance,ground_reflectance,
-                        ice_thickness,wind_direction,air_temperature,wind_speed,ice_density)
-                    # the line sag is defined as the distance between the interested point on the line and the ground
-                    # sag = sag - elevation
-                    result[n] = round(sag,OPTIONS["precision"]["linesag"])
-
-                # reset for next segment
-                p0 = p1
-                z0 = z1
-                ld = {}
-
-
-        elif p0: # continue a line segment
-
-            # end last segment
-            ld[id] = line
+    ARGUMENTS
 
-        else:
+        data (DataFrame)        Powerline path data (see linesag())
 
-            WARNING("ignoring waypoints before first pole")
+        scenarios (DataFrame)   Optional weather scenarios (see linesag())
 
+    RETURNS
 
-    if ld:
-        WARNING("ignoring waypoints after last pole")
+        Series      The "linesway" values of the data input
 
-    return pandas.DataFrame(result.values(),columns=["linesway"],index=result.keys())["linesway"]
+        DataFrame   The linesway values of each scenario (columns) at each
+                    location (rows) if scenarios are given.
+    """
+    _, result = get_line_values(data,scenarios)
+    if scenarios is None:
+        return pandas.Series(result,index=data.index,name="linesway")
+    return pandas.DataFrame(result.T,index=data.index,columns=scenarios.index)
 
 def get_sway_value(d_hori,line,cable,p0,p1,z0,z1,
         power_flow,global_horizontal_irradiance,ground_reflectance,
         ice_thickness,wind_direction,air_temperature,wind_speed,ice_density):
     # p1 is the location (lat, lon) of interested point, while p0 is the previous pole
-    """Calculate line sag values"""
-    global OPTIONS
-    d_vert = abs(z0-z1)
-    # get the positive slope
-    k_slope = d_vert/d_hori 
-    S_L = sqrt(d_hori**2 + d_vert**2)
-    k_init = get_line_tension_coefficient(d_hori)
-    span = sqrt(d_hori*d_hori + d_vert*d_vert)
-    rts = cable['rated_tensile_strength']
-    unit_weight = cable['unit_weight']
-    diameter = cable['diameter']
-    air_mass, k_f, air_viscosity = get_air_properties(air_temperature)
-    # calculate the line heading and the angle between line heading and wind direction
+    """Calculate line sway values"""
     try:
         line_angle = line['heading']
     except:
         line_angle = 180*atan2(p1[0]-p0[0],p1[1]-p0[1])/np.pi
-    phi = (wind_direction - line_angle)*np.pi/180
-    # calculate the new line sag at loaded condition
-    ice_unit_weight = ice_density*np.pi*ice_thickness*(diameter+ice_thickness)*g
-    wind_unit_weight = 0.5*air_mass*(wind_speed*sin(phi))**2 *(diameter+2*ice_thickness)
-    total_unit_weight = sqrt(wind_unit_weight**2+(unit_weight+ice_unit_weight)**2)
-    if d_vert/d_hori > 0.1:
-        k_init = min(k_init, total_unit_weight*d_hori*d_hori/(2*d_vert*rts))
-    H_init = rts*k_init
-    sag_init = unit_weight*span*span/(8*H_init)
-    # for Q_I
-    P_rated = power_flow
-    Vll_rated = cable['voltage_rating']
-    Irms =  P_rated/(sqrt(3)*Vll_rated)
-    R_20C = cable['nominal_resistance']
-    coeff_Al = cable['resistivity']
-    Q_I_coeff_first = Irms*Irms*R_20C*coeff_Al
-    Q_I_coeff_constant = Irms*Irms*R_20C*(1-coeff_Al*(20.0+273.0))
-    # for Q_S
-    k_a = 1.0 - cable['reflectivity'] # solar radiation absorption coefficient
-    GHI = global_horizontal_irradiance # unit: W/m2
-    k_g = ground_reflectance # ground reflect
-    Q_S_constant = k_a*(diameter+2*ice_thickness)*(1+k_g)*GHI
-    # for Q_C
-    k_angle = 1.194 - cos(phi) + 0.194*cos(2*phi) + 0.368*sin(2*phi)
-    Nre = wind_speed * (diameter + 2*ice_thickness) * air_mass / air_viscosity
-    if wind_speed < 0.82:
-        Q_C_coeff_first = k_angle*(1.01+1.35*Nre**0.52)*k_f
-        Q_C_constant = -k_angle*(1.01+1.35*Nre**0.52)*k_f*(air_temperature+273.0)
-    else:
-        Q_C_coeff_first = k_angle*0.754*(Nre**0.6)*k_f
-        Q_C_constant = -k_angle*0.754*(Nre**0.6)*k_f*(air_temperature+273.0)
-    # for Q_R
-    k_e = cable['emissivity']
-    Q_R_constant = -5.6704e-8*k_e*(diameter+2.0*ice_thickness)*np.pi*(air_temperature+273.0)**4
-    Q_R_coeff_fourth = 5.6704e-8*k_e*(diameter+2.0*ice_thickness)*np.pi
-    # for new conductor temp under loading
-    coef_sag = [-Q_R_coeff_fourth,0.0,0.0,Q_I_coeff_first-Q_C_coeff_first,Q_I_coeff_constant+Q_S_constant-Q_C_constant-Q_R_constant]
-    r = np.roots(coef_sag)
-    r = r[~np.iscomplex(r)]
-    temp_load = np.absolute(r[r > 0.0]) # unit: K
-    temp_load = temp_load - 273.0 # unit: DegC
-
-    area = cable['conductor_crosssection_area']
-    elasticity = cable['elasticity']
-    temp_init = OPTIONS['nominal_temperature']
-    coef_thermal = cable['thermal_expansion']
-    H_load_second = (unit_weight*d_hori)**2 *area*elasticity/(24*H_init**2)-H_init+(temp_load-temp_init)*coef_thermal*area*elasticity
-    H_load_constant = -(total_unit_weight*d_hori)**2 *area*elasticity/24
-    coef_H = [1, float(H_load_second), 0.0, float(H_load_constant)]
-    r = np.roots(coef_H)
-    r = r[~np.iscomplex(r)]
-    H_load = np.absolute(r[r > 0.0])
-
-    # sag_load = total_unit_weight*span*span/(8*H_load)
-    sag_angle = atan(wind_unit_weight/(ice_unit_weight+unit_weight))
-    C_catenary = H_load/total_unit_weight      # should be total_unit_weight; ok
-    # calculate the D; 
-    D = total_unit_weight*S_L**2/8/H_load 
-    if z0 > z1:
-        # d0_hori = d_hori/2 + H_load*d_vert/(total_unit_weight*d_hori)
-        d0_hori = d_hori/2 + d_hori*d_vert/8/D
-        d1_hori = d_hori - d0_hori
-        # sag0 is D_A, the longer side of the line sag
-        # https://electricalengineerresources.com/2018/02/16/sample-calculation-of-sag-and-tension-in-transmission-line-uneven-elevation/
-        sag0 = total_unit_weight*d0_hori**2 /(2*H_load)
-        dt = get_distance(p0,p1)
-        sag0_cosh = sag0 - k_slope*dt - C_catenary*(np.cosh((dt-d0_hori)/C_catenary)-1)
-        sag_elevation = sag0_cosh*sin(sag_angle)
-        # sag0_cosh = 1
-    else:
-        # d0_hori = d_hori/2 - H_load*d_vert/(total_unit_weight*d_hori)
-        d0_hori = d_hori/2 - d_hori*d_vert/8/D
-        d1_hori = d_hori - d0_hori
-        sag0 = total_unit_weight*d0_hori**2 /(2*H_load)
-        dt = get_distance(p0,p1)
-        # dt is the distance to p0
-        sag0_cosh = sag0 + k_slope*dt - C_catenary*(np.cosh((dt-d0_hori)/C_catenary)-1)
-        sag_elevation = sag0_cosh*sin(sag_angle)
-        # sag0_cosh = 0
-    result = sag_elevation[0]
-    # print(f"get_sag_value(d_hori={round(d_hori).__repr__()},p0={p0.__repr__()},p1={p1.__repr__()},z0={z0.__repr__()},z1={z1.__repr__()},...) --> {result}")
-    # print(sag0_cosh)
-    return result
+    _, result = get_line_position(d_hori,get_distance(p0,p1),z0,z1,line_angle,cable,
+        power_flow,global_horizontal_irradiance,ground_reflectance,
+        ice_thickness,wind_direction,air_temperature,wind_speed,ice_density)
+    return float(result)
 
+def linescenarios(data,scenarios):
+    """Compute powerline results for many weather scenarios at once
+
+    ARGUMENTS
+
+        data (DataFrame)        Powerline path data (see linesag()), with the
+                                vegetation columns 'height', 'cover', 'width',
+                                and 'base' if contact and strike are desired
+
+        scenarios (DataFrame)   Weather values, one row per scenario (see
+                                WEATHER)
+
+    RETURNS
+
+        DataFrame   The linesag, linesway, and if possible contact and strike
+                    values indexed by scenario and location
+    """
+    sag, sway = get_line_values(data,scenarios)
+    S, N = sag.shape
+    result = pandas.DataFrame(
+        {name:np.tile(data[name].to_numpy(),S) for name in ['height','cover','width','base'] if name in data.columns},
+        index=pandas.MultiIndex.from_product([scenarios.index,data.index]))
+    if 'wind_speed' in scenarios.columns:
+        result['wind_speed'] = np.repeat(scenarios['wind_speed'].to_numpy(dtype=float),N)
+    else:
+        result['wind_speed'] = np.tile(get_held_values(data,'wind_speed'),S)
+    result['linesag'] = sag.ravel()
+    result['linesway'] = sway.ravel()
+    if set(['height','cover','width']).issubset(data.columns):
+        result['contact'] = contact(result)
+        if 'base' in data.columns:
+            result['strike'] = linegallop(result)
+    return result.drop(columns=['height','cover','width','base','wind_speed'],errors='ignore')
 
 # show a small probability when tree_height < powerline_height
 def contact(data):
@@ -845,7 +751,7 @@ def contact(data):
 def lognorm_cdf(x, mu, sigma):
     shape  = sigma
     loc    = 0
-    scale  = exp(mu)
+    scale  = np.exp(mu)
 
     return stats.lognorm.cdf(x, shape, loc, scale)
 
@@ -885,16 +791,8 @@ def linegallop(data):
     mu = beta_mu[0]  + beta_mu[1]*height  + beta_mu[2]*(crown/height)
     sig= beta_sig[0] + beta_sig[1]*height + beta_sig[2]*(crown/height)
 
-    # cannot do vector
-    # cdf = lognorm_cdf(data['wind_speed']*1, mu, sig)
-    # cdf_vec = [0]*len(mu)        # for initilization
-    cdf_vec = min_strike
-    strike  = min_strike
-    wind_speed = data['wind_speed']
-    for idx, x in enumerate(mu):
-        cdf = lognorm_cdf(wind_speed[idx]*3, x, sig[idx])
-        cdf_vec[idx]= cdf
-        strike[idx] = 1 - (1-cdf)**n_tree[idx]
+    cdf = lognorm_cdf(data['wind_speed']*3, mu, sig)
+    strike = 1 - (1-cdf)**n_tree
 
     # strike = cdf_vec
     # strike = mu
@@ -968,6 +866,21 @@ if __name__ == '__main__':
             result = linesway(pandas.DataFrame(data))
             self.assertEqual(result.to_list(),[0,0,0])
 
+        def test_scenarios(self):
+            scenarios = pandas.DataFrame({'air_temperature':[0.0,10.0],'wind_speed':[0.0,20.0]})
+            result = linesag(pandas.DataFrame(data),scenarios)
+            self.assertEqual(result.shape,(3,2))
+            for n,scenario in scenarios.iterrows():
+                expected = linesag(pandas.DataFrame(data).assign(**scenario))
+                self.assertEqual(result[n].round(3).to_list(),expected.round(3).to_list())
+            for column,value in {'air_temperature':10.0,'wind_speed':20.0}.items():
+                result = linesag(pandas.DataFrame(data),pandas.DataFrame({column:[value]}))
+                expected = linesag(pandas.DataFrame(data).assign(**{column:value}))
+                self.assertEqual(result[0].round(3).to_list(),expected.round(3).to_list())
+                self.assertNotEqual(result[0].round(3).to_list(),linesag(pandas.DataFrame(data)).round(3).to_list())
+            result = linescenarios(pandas.DataFrame(data),scenarios)
+            self.assertEqual(result.loc[0,'linesway'].to_list(),[0,0,0])
+
         def test_linegallop(self):
             data_test = pandas.DataFrame({'linesag':[18,15,14], 'linesway':[0,0.3,0.6], 'cover':[0.68, 0.71, 0.71], 'width':[5,5,5], 'height':[13,14,16], 'base':[2,2,2], 'wind_speed':[10,10,10]})
             result = linegallop(pandas.DataFrame(data_test))
@@ -51,6 +51,8 @@ CONFIGURATION
 
     maximum_image_size - Maximum size of remote data block (default is 2e9 bytes)
 
+    maxtiles - Maximum number of processed layer tiles kept open at once (default is 16)
+
 EXAMPLES
 
     The following command retrieves the vegetation someplace in the Santa Cruz Mountains:
@@ -63,6 +65,7 @@ EXAMPLES
 version = 1 # specify API version
 
 import sys, os
+import collections
 import requests
 import json
 import math, numpy
@@ -98,6 +101,7 @@ default_config = {
         "usecache" : True,
     },
     "maximum_image_size" : 2000000000,
+    "maxtiles" : 16,
 }
 
 #
@@ -173,10 +177,9 @@ def apply(data, options=default_options, config=default_config, warning=lambda x
 
     # convert lat,lon to address
     try:
-        path = list(zip(data["latitude"],data["longitude"]))
+        lat = numpy.array(data["latitude"],dtype=float)
+        lon = numpy.array(data["longitude"],dtype=float)
     except:
-        path = None
-    if type(path) == type(None):
         raise Exception("vegetation dataset requires 'latitude' and 'longitude' fields")
     try:
         precision = int(options["precision"]["vegetation"])
@@ -187,38 +190,20 @@ def apply(data, options=default_options, config=default_config, warning=lambda x
     if "units" not in options.keys() or options["units"] not in units.keys():
         raise Exception(f"unit '{options['units']}' or is not valid")
     unit = float(units[options["units"]])
-    result = {}
-    for pos in path:
-        if math.isnan(pos[0]) or math.isnan(pos[1]):
-            warning(f"field of 'latitude' or 'longitude' is missing, use 'nan' for vegetation data.")
-            values={'base': [numpy.nan], 'cover': [numpy.nan], 'height': [numpy.nan]}
-            for key, value in values.items():
-                if config["layer_units"][key] == "m":
-                    value = list(map(lambda x:round(float(x)*unit,int(precision)),value))
-                elif config["layer_units"][key] == "%":
-                    value = list(map(lambda x:round(float(x),int(precision+2)),value))
-                if key in result.keys():
-                    result[key].extend(value)
-                else:
-                    result[key] = value
-        else:
-            try:
-                values = get_vegetation(pos,lambda x:warning(x),repourl=config["repourl"],cachedir=config["cachedir"],layers=config["layers"])
-                for key, value in values.items():
-                    if config["layer_units"][key] == "m":
-                        value = list(map(lambda x:round(float(x)*unit,int(precision)),value))
-                    elif config["layer_units"][key] == "%":
-                        value = list(map(lambda x:round(float(x),int(precision+2)),value))
-                    if key in result.keys():
-                        result[key].extend(value)
-                    else:
-                        result[key] = value
-            except Exception as err:
-                if config["nan_error"]:
-                    elev.append(float("nan"))
-                else:
-                    raise
+    missing = numpy.isnan(lat) | numpy.isnan(lon)
+    if missing.any():
+        warning(f"field of 'latitude' or 'longitude' is missing in {missing.sum()} rows, use 'nan' for vegetation data.")
+    result = get_vegetations(lat,lon,lambda x:warning(x),
+        repourl=config["repourl"],
+        cachedir=config["cachedir"],
+        layers=config["layers"],
+        maxtiles=config["maxtiles"] if "maxtiles" in config else default_config["maxtiles"],
+        nan_error=config["nan_error"])
     for key, values in result.items():
+        if config["layer_units"][key] == "m":
+            values = (values*unit).round(precision)
+        elif config["layer_units"][key] == "%":
+            values = values.round(precision+2)
         data[key] = values
     return data
 
@@ -227,33 +212,72 @@ def get_vegetation(pos,warning=lambda x:print(x,file=sys.stderr),
         cachedir = default_config["cachedir"],
         layers = default_config["layers"],
         year = default_options["year"]):
-    """Compute the vegetation at the locations specified
-
-    Elevations are obtained for each entry in the args list.  If the
-    resolution is set, the vegetation for each step along the path at the
-    specified resolution are provided.
+    """Compute the vegetation at the location specified
 
     ARGUMENTS
-        args (tuple list) List of (lat,lon) tuples.
+        pos (tuple) The (lat,lon) tuple of the location
 
     RETURNS
         layer_data (dict)   Layer vegetation data
     """
-    result = {}
-    for layer in layers:
-        name,data = get_imagedata(layer,pos,repourl,cachedir,warning,year)
-        data = layer_process[layer](data)
-        row,col = get_rowcol(pos,data)
+    result = get_vegetations([pos[0]],[pos[1]],warning,repourl,cachedir,layers,year)
+    return {layer:[values[0]] for layer,values in result.items()}
+
+def get_vegetations(lat,lon,warning=lambda x:print(x,file=sys.stderr),
+        repourl = default_config["repourl"],
+        cachedir = default_config["cachedir"],
+        layers = default_config["layers"],
+        year = default_options["year"],
+        maxtiles = default_config["maxtiles"],
+        nan_error = False):
+    """Compute the vegetation at the locations specified
+
+    The locations are grouped by image tile and the values of all the
+    locations in a tile are sampled at once from the processed layer data.
+
+    ARGUMENTS
+        lat (array)         Latitudes of the locations
+        lon (array)         Longitudes of the locations
+        maxtiles (int)      Maximum number of layer tiles kept open at once
+        nan_error (bool)    Return NaN for tiles that cannot be loaded instead
+                            of raising an exception
 
-        result[layer] = [data[row][col]]
+    RETURNS
+        layer_data (dict)   Layer vegetation data arrays
+    """
+    lat = numpy.asarray(lat,dtype=float)
+    lon = numpy.asarray(lon,dtype=float)
+    result = {layer:numpy.full(len(lat),float("nan")) for layer in layers}
+
+    # group the locations by tile
+    valid = numpy.flatnonzero(~(numpy.isnan(lat)|numpy.isnan(lon)))
+    if len(valid) == 0:
+        return result
+    keys = numpy.stack([numpy.floor(lat[valid]*10),numpy.floor(lon[valid]*10),
+        lat[valid]==0,lon[valid]==0],axis=1)
+    _,first,tile = numpy.unique(keys,axis=0,return_index=True,return_inverse=True)
+    tile = tile.ravel()
+    order = numpy.argsort(tile,kind="stable")
+    groups = numpy.split(valid[order],numpy.cumsum(numpy.bincount(tile))[:-1])
+
+    for n,index in zip(valid[first],groups):
+        for layer in layers:
+            try:
+                _,data = get_imagedata(layer,(lat[n],lon[n]),repourl,cachedir,warning,year,maxtiles=maxtiles)
+            except Exception:
+                if nan_error:
+                    continue
+                raise
+            row,col = get_rowcol((lat[index],lon[index]),data)
+            result[layer][index] = data[row,col]
     return result
 
 def get_rowcol(pos,data):
-    """Get the row and column location in a 1 degree^2 image tile"""
+    """Get the row and column location in a 1 degree^2 image tile for a position or arrays of positions"""
     height = len(data)
     width = len(data[0])
-    row = height-math.floor(math.modf(abs(pos[0]))[0]*height)-1
-    col = width-math.floor(math.modf(abs(pos[1]))[0]*width)-1
+    row = height-numpy.floor(numpy.modf(numpy.abs(pos[0]))[0]*height).astype(int)-1
+    col = width-numpy.floor(numpy.modf(numpy.abs(pos[1]))[0]*width).astype(int)-1
     return row, col
 
 def get_position(pos):
@@ -317,11 +341,16 @@ def get_imagename(layer,pos):
         lon = "0"
     return f"{layer}/{lat}_{lon}"
 
-vegetation_data = {}
+vegetation_data = collections.OrderedDict() # open processed tiles in least recently used order
+
+def get_imagedata(layer,pos,repourl,cachedir,warning=lambda x:print(x,file=sys.stderr),year=default_options['year'],maximum_image_size=default_config['maximum_image_size'],maxtiles=default_config['maxtiles']):
 
-def get_imagedata(layer,pos,repourl,cachedir,warning=lambda x:print(x,file=sys.stderr),year=default_options['year'],maximum_image_size=default_config['maximum_image_size']):
+    """Get the processed image data for a location
 
-    """Get the image data for a location
+    The layer process is applied once when the image is first loaded and the
+    result is stored in the cache folder as a numpy array file, which is
+    memory-mapped when used. At most `maxtiles` layer images are kept open,
+    with the least recently used closed first.
 
     ARGUMENTS
 
@@ -331,12 +360,17 @@ def get_imagedata(layer,pos,repourl,cachedir,warning=lambda x:print(x,file=sys.s
     RETURNS
 
         tifname (str)       The name of the image tile used
-        vegetation (nparray) The vegetation data from the image
+        vegetation (nparray) The processed vegetation data from the image
     """
     tifname = get_imagename(layer,pos)
+    key = f"{year}/{tifname}"
     global vegetation_data
+    if key in vegetation_data:
+        vegetation_data.move_to_end(key)
+        return tifname, vegetation_data[key]
     os.makedirs(f"{cachedir}/{year}/{layer}",exist_ok=True)
-    if not tifname in vegetation_data.keys():
+    npyname = f"{cachedir}/{year}/{tifname}.npy"
+    if not os.path.exists(npyname):
         srcname = f"{repourl}/{year}/{tifname}.tif"
         dstname = f"{cachedir}/{year}/{tifname}.tif"
 
@@ -353,8 +387,14 @@ def get_imagedata(layer,pos,repourl,cachedir,warning=lambda x:print(x,file=sys.s
                             fh.write(chunk)
 
         Image.MAX_IMAGE_PIXELS = maximum_image_size
-        vegetation_data[tifname] = numpy.array(Image.open(dstname))
-    return tifname, vegetation_data[tifname]
+        tmpname = f"{npyname}.{os.getpid()}"
+        with open(tmpname,"wb") as fh:
+            numpy.save(fh,layer_process[layer](numpy.array(Image.open(dstname))))
+        os.replace(tmpname,npyname)
+    vegetation_data[key] = numpy.load(npyname,mmap_mode="r")
+    while len(vegetation_data) > maxtiles:
+        vegetation_data.popitem(last=False)
+    return tifname, vegetation_data[key]
 
 
 #
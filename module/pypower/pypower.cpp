@@ -26,6 +26,9 @@ double solver_update_resolution = 1e-8;
 bool save_case = false;
 bool enforce_q_limits = false;
 bool use_dc_powerflow = false;
+bool warm_start = true;
+int32 solver_rebuilds = 0;
+int32 solver_reuses = 0;
 typedef enum {
     PPSF_CSV = 0, // CSV files
     PPSF_JSON = 1, // JSON file
@@ -175,6 +178,21 @@ EXPORT CLASS *init(CALLBACKS *fntable, MODULE *module, int argc, char *argv[])
         PT_DESCRIPTION, "Enable use of DC powerflow solution",
         NULL);
 
+    gl_global_create("pypower::warm_start",
+        PT_bool, &warm_start,
+        PT_DESCRIPTION, "Enable reuse of admittance matrices and last solution between solver runs",
+        NULL);
+
+    gl_global_create("pypower::solver_rebuilds",
+        PT_int32, &solver_rebuilds,
+        PT_DESCRIPTION, "Number of solver runs that rebuilt the admittance matrices",
+        NULL);
+
+    gl_global_create("pypower::solver_reuses",
+        PT_int32, &solver_reuses,
+        PT_DESCRIPTION, "Number of solver runs that reused the admittance matrices",
+        NULL);
+
     gl_global_create("pypower::save_format",
         PT_enumeration, &save_format,
         PT_KEYWORD, "CSV", (enumeration)PPSF_CSV,
@@ -472,6 +490,7 @@ EXPORT bool on_init(void)
     }
     PyDict_SetItemString(data,"enforce_q_limits",enforce_q_limits?Py_True:Py_False);
     PyDict_SetItemString(data,"use_dc_powerflow",use_dc_powerflow?Py_True:Py_False);
+    PyDict_SetItemString(data,"warm_start",warm_start?Py_True:Py_False);
     PyDict_SetItemString(data,"save_case",save_case?Py_True:Py_False);
     PyDict_SetItemString(data,"save_format",PyUnicode_FromString((const char*)save_formats[save_format]));
     char buffer[1025];
@@ -987,6 +1006,18 @@ static TIMESTAMP update_solution(TIMESTAMP t0)
                 solver_status = SS_SUCCESS;
             }
 
+            // read solver session counters
+            PyObject *rebuilds = PyDict_GetItemString(result,"solver_rebuilds");
+            if ( rebuilds && PyLong_Check(rebuilds) )
+            {
+                solver_rebuilds = PyLong_AsLong(rebuilds);
+            }
+            PyObject *reuses = PyDict_GetItemString(result,"solver_reuses");
+            if ( reuses && PyLong_Check(reuses) )
+            {
+                solver_reuses = PyLong_AsLong(reuses);
+            }
+
             // copy values back from solver
             PyObject *busdata = PyDict_GetItemString(result,"bus");
             if ( nbus > 0 && busdata == NULL )
@@ -2,6 +2,8 @@
 # Copyright (C) 2024 Regents of the Leland Stanford Junior University
 
 import os, sys
+import hashlib
+from concurrent.futures import ProcessPoolExecutor
 
 # version issues with numpy and pypower
 import numpy as np
@@ -10,8 +12,14 @@ if not hasattr(np,"Inf"):
 elif not hasattr(np,"inf"):
     np.inf = np.Inf
 
-from numpy import array, set_printoptions, inf
-from pypower.api import ppoption, runpf, runopf
+from numpy import array, set_printoptions, inf, pi, exp, ones, ix_
+import scipy.sparse as sp
+from pypower.api import ppoption, runpf, runopf, ext2int, int2ext
+from pypower.api import makeYbus, makeSbus, makeB, newtonpf, fdpf, gausspf, pfsoln, printpf
+from pypower.bustypes import bustypes
+from pypower.idx_bus import BUS_TYPE, GS, BS, VM, VA
+from pypower.idx_brch import F_BUS, T_BUS, BR_R, BR_X, BR_B, TAP, SHIFT, BR_STATUS, PF, QF, PT, QT
+from pypower.idx_gen import GEN_BUS, GEN_STATUS, VG, PG, QG
 from math import sqrt
 import json, csv
 
@@ -36,6 +44,7 @@ opf_feasibility_tolerance = 1e-06
 opf_gradient_tolerance = 1e-06
 opf_condition_tolerance = 1e-06
 opf_cost_tolerance = 1e-06
+warm_start = True # reuse admittance matrices and last solution between solves
 
 csv_headers = {
     "bus" : "bus_i,type,Pd,Qd,Gs,Bs,area,Vm,Va,baseKV,zone,Vmax,Vmin,lam_P,lam_Q,mu_Vmax,mu_Vmin",
@@ -152,50 +161,221 @@ def jsonify(data):
         result = data
     return result
 
+def internal_case(version,baseMVA,casedata):
+    """Convert case arrays to a pypower case with internal indexing"""
+    branch = casedata['branch']
+    if branch.shape[1] <= QT:
+        branch = np.c_[branch,np.zeros((branch.shape[0],QT-branch.shape[1]+1))]
+    return ext2int(dict(version=version,
+        baseMVA=baseMVA,
+        bus=casedata['bus'],
+        branch=branch,
+        gen=casedata['gen'],
+        ))
+
+def external_results(ppc,success):
+    """Convert a solved internal case back to external indexing"""
+    ppc["success"] = success
+    results = int2ext(ppc)
+
+    # zero out result fields of out-of-service gens & branches
+    if len(results["order"]["gen"]["status"]["off"]) > 0:
+        results["gen"][ix_(results["order"]["gen"]["status"]["off"],[PG,QG])] = 0
+    if len(results["order"]["branch"]["status"]["off"]) > 0:
+        results["branch"][ix_(results["order"]["branch"]["status"]["off"],[PF,QF,PT,QT])] = 0
+
+    return results
+
+def initial_voltage(bus,gen,ref,pq,V=None):
+    """Get the initial bus voltages, optionally starting from a previous solution"""
+    if V is None:
+        V0 = bus[:,VM] * exp(1j * pi/180 * bus[:,VA])
+    else:
+        V0 = V.copy()
+        V0[ref] = abs(V0[ref]) * exp(1j * pi/180 * bus[ref,VA])
+    on = np.flatnonzero(gen[:,GEN_STATUS] > 0)
+    gbus = gen[on,GEN_BUS].astype(int)
+    vcb = ones(V0.shape)
+    vcb[pq] = 0
+    k = np.flatnonzero(vcb[gbus])
+    V0[gbus[k]] = gen[on[k],VG] / abs(V0[gbus[k]]) * V0[gbus[k]]
+    return V0
+
+class SolverSession:
+    """Persistent powerflow solver state
+
+    The session keeps the case arrays, the admittance matrices, and the last
+    converged voltage solution between calls to `solver()`. Only the rows
+    that changed since the last call are patched, the admittance matrices
+    are rebuilt only when the network data changes, and the AC powerflow is
+    started from the previous solution.
+
+    The OPF, DC powerflow, Q-limit enforcement, and DC line cases are not
+    handled by the session and always use `runpf()` or `runopf()`.
+    """
+
+    # columns that require the admittance matrices to be rebuilt when changed
+    ybus_columns = {
+        "bus" : {GS,BS},
+        "branch" : {F_BUS,T_BUS,BR_R,BR_X,BR_B,TAP,SHIFT,BR_STATUS},
+        "gen" : set(),
+        }
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        """Discard all cached solver data"""
+        self.baseMVA = None
+        self.casedata = {}
+        self.order = None
+        self.ybus = None
+        self.B = {}
+        self.V = None
+        self.rebuilds = 0
+        self.reuses = 0
+        self.patches = 0
+
+    def patch(self,name,data):
+        """Update the cached case array with the rows that changed
+
+        Returns the set of columns changed, or `None` if the array was
+        replaced because its shape changed.
+        """
+        new = array(data,dtype=float)
+        old = self.casedata.get(name)
+        if old is None or old.shape != new.shape:
+            self.casedata[name] = new
+            return None
+        diff = (old != new) & ~(np.isnan(old) & np.isnan(new))
+        rows = diff.any(axis=1)
+        if rows.any():
+            old[rows] = new[rows]
+            self.patches += int(rows.sum())
+        return set(np.flatnonzero(diff.any(axis=0)).tolist())
+
+    def update(self,casedata):
+        """Load new case data into the session
+
+        Returns `True` if the admittance matrices must be rebuilt.
+        """
+        dirty = ( self.baseMVA != casedata['baseMVA'] )
+        self.baseMVA = casedata['baseMVA']
+        for name,columns in self.ybus_columns.items():
+            changed = self.patch(name,casedata[name])
+            if changed is None or changed & columns:
+                dirty = True
+        return dirty
+
+    def solve(self,casedata,options):
+        """Solve the AC powerflow using the cached solver data
+
+        Returns `(results,success)` like `runpf()`.
+        """
+        dirty = self.update(casedata)
+
+        ppc = internal_case(casedata['version'],self.baseMVA,self.casedata)
+        baseMVA, bus, gen, branch = ppc["baseMVA"], ppc["bus"], ppc["gen"], ppc["branch"]
+
+        # reuse admittance matrices only if the internal ordering is unchanged
+        order = [ppc['order']['bus']['i2e'],ppc['order']['branch']['status']['on']]
+        same_bus = self.order is not None and np.array_equal(self.order[0],order[0])
+        same_branch = self.order is not None and np.array_equal(self.order[1],order[1])
+        self.order = order
+        if dirty or not same_bus or not same_branch or self.ybus is None:
+            self.ybus = makeYbus(baseMVA,bus,branch)
+            self.B = {}
+            self.rebuilds += 1
+        else:
+            self.reuses += 1
+        Ybus, Yf, Yt = self.ybus
+
+        ref, pv, pq = bustypes(bus,gen)
+        Sbus = makeSbus(baseMVA,bus,gen)
+        warm = warm_start and same_bus and self.V is not None
+        V0 = initial_voltage(bus,gen,ref,pq,self.V if warm else None)
+        V, success = self.run(Ybus,Sbus,V0,ref,pv,pq,bus,branch,options)
+        if not success and warm:
+            # previous solution may be a poor starting point after a large change
+            V0 = initial_voltage(bus,gen,ref,pq)
+            V, success = self.run(Ybus,Sbus,V0,ref,pv,pq,bus,branch,options)
+        self.V = V if success else None
+
+        # update data matrices with solution
+        ppc["bus"], ppc["gen"], ppc["branch"] = pfsoln(baseMVA,bus,gen,branch,Ybus,Yf,Yt,V,ref,pv,pq)
+        results = external_results(ppc,success)
+
+        if options["OUT_ALL"]:
+            printpf(results,sys.stdout,options)
+
+        return results, success
+
+    def run(self,Ybus,Sbus,V0,ref,pv,pq,bus,branch,options):
+        """Run the AC powerflow algorithm selected by the options"""
+        alg = options["PF_ALG"]
+        if alg == 1:
+            V, success, _ = newtonpf(Ybus,Sbus,V0,ref,pv,pq,options)
+        elif alg in [2,3]:
+            if alg not in self.B:
+                self.B[alg] = makeB(self.baseMVA,bus,branch,alg)
+            Bp, Bpp = self.B[alg]
+            V, success, _ = fdpf(Ybus,Sbus,V0,Bp,Bpp,ref,pv,pq,options)
+        elif alg == 4:
+            V, success, _ = gausspf(Ybus,Sbus,V0,ref,pv,pq,options)
+        else:
+            raise PypowerError(f"solver_method={alg} is not valid")
+        return V, success
+
+session = SolverSession()
+
+def get_options(pf_case):
+    """Read the solver settings from the case and get the pypower options"""
+    for key in globals():
+        if key in pf_case:
+            globals()[key] = pf_case[key]
+            if debug:
+                print("option",key,'=',pf_case[key],file=sys.stderr)
+    options = ppoption(
+        PF_ALG = solver_method,
+        PF_TOL = solution_tolerance,
+        PF_MAX_IT = maximum_iterations_nr,
+        PF_MAX_IT_FD = maximum_iterations_fd,
+        PF_MAX_IT_GS = maximum_iterations_gs,
+        ENFORCE_Q_LIMS = enforce_q_limits,
+        PF_DC = use_dc_powerflow,
+        OUT_ALL = 1 if verbose else 0,
+        VERBOSE = 3 if debug else 0,
+        OUT_SYS_SUM = verbose,
+        OUT_AREA_SUM = verbose,
+        OUT_BUS = verbose,
+        OUT_BRTANCH = verbose,
+        OUT_GEN = verbose,
+        OUT_ALL_LIM = verbose,
+        OUT_V_LIM = verbose,
+        OUT_LINE_LIM = verbose,
+        OUT_PG_LIM = verbose,
+        OUT_QG_LIM = verbose,
+        PDIPM_MAX_IT = maximum_iterations_opf,
+        PDIPM_FEASTOL = opf_feasibility_tolerance,
+        PDIPM_GRADTOL = opf_gradient_tolerance,
+        PDIPM_COMPTOL = opf_condition_tolerance,
+        PDIPM_COSTTOL = opf_cost_tolerance,
+        )
+    for key in options:
+        if key in pf_case:
+            options[key] = pf_case[key]
+    if debug:
+        print("ppoptions = {",file=sys.stderr)
+        for x,y in options.items():
+            print(f"             '{x}' = {repr(y)},",file=sys.stderr)
+        print("            }",file=sys.stderr)
+    return options
+
 def solver(pf_case):
 
     try:
 
-        # read options from case
-        for key in globals():
-            if key in pf_case:
-                globals()[key] = pf_case[key]
-                if debug:
-                    print("option",key,'=',pf_case[key],file=sys.stderr)
-        options = ppoption(
-            PF_ALG = solver_method,
-            PF_TOL = solution_tolerance,
-            PF_MAX_IT = maximum_iterations_nr,
-            PF_MAX_IT_FD = maximum_iterations_fd,
-            PF_MAX_IT_GS = maximum_iterations_gs,
-            ENFORCE_Q_LIMS = enforce_q_limits,
-            PF_DC = use_dc_powerflow,
-            OUT_ALL = 1 if verbose else 0,
-            VERBOSE = 3 if debug else 0,
-            OUT_SYS_SUM = verbose,
-            OUT_AREA_SUM = verbose,
-            OUT_BUS = verbose,
-            OUT_BRTANCH = verbose,
-            OUT_GEN = verbose,
-            OUT_ALL_LIM = verbose,
-            OUT_V_LIM = verbose,
-            OUT_LINE_LIM = verbose,
-            OUT_PG_LIM = verbose,
-            OUT_QG_LIM = verbose,
-            PDIPM_MAX_IT = maximum_iterations_opf,
-            PDIPM_FEASTOL = opf_feasibility_tolerance,
-            PDIPM_GRADTOL = opf_gradient_tolerance,
-            PDIPM_COMPTOL = opf_condition_tolerance,
-            PDIPM_COSTTOL = opf_cost_tolerance,
-            )
-        for key in options:
-            if key in pf_case:
-                options[key] = pf_case[key]
-        if debug:
-            print("ppoptions = {",file=sys.stderr)
-            for x,y in options.items():
-                print(f"             '{x}' = {repr(y)},",file=sys.stderr)
-            print("            }",file=sys.stderr)
+        options = get_options(pf_case)
 
         # setup casedata
         casedata = dict(version=str(pf_case['version']),baseMVA=pf_case['baseMVA'])
@@ -288,9 +468,16 @@ def solver(pf_case):
                 success = results['success']
             else:
                 raise PypowerError("cannot solve OPF without gencost data")
+        elif warm_start and not use_dc_powerflow and not enforce_q_limits and 'dcline' not in casedata:
+            results,success = session.solve(casedata,options)
         else:
+            session.reset()
             results,success = runpf(casedata,options) 
 
+        # report solver session counters
+        pf_case['solver_rebuilds'] = session.rebuilds
+        pf_case['solver_reuses'] = session.reuses
+
         # save results to file
         if save_case:
             write_case(results,f"{modelname}_results.{save_format}",False)
@@ -329,3 +516,146 @@ def solver(pf_case):
 
         return False
 
+
+#
+# Batch solver
+#
+
+# columns that determine whether scenarios share the same network structure
+structure_columns = {
+    "bus" : [BUS_TYPE,GS,BS],
+    "branch" : [F_BUS,T_BUS,BR_R,BR_X,BR_B,TAP,SHIFT,BR_STATUS],
+    "gen" : [GEN_BUS,GEN_STATUS],
+    }
+
+def batch_case(pf_case,scenario):
+    """Get the case data arrays for a batch scenario"""
+    casedata = {}
+    for name in ['bus','branch','gen','dcline']:
+        data = scenario[name] if name in scenario else pf_case.get(name)
+        if data is not None:
+            casedata[name] = array(data,dtype=float)
+    return casedata
+
+def batch_structure(casedata):
+    """Get the network structure key of a batch scenario"""
+    key = hashlib.sha1()
+    for name,columns in structure_columns.items():
+        data = casedata[name][:,columns]
+        key.update(repr(data.shape).encode())
+        key.update(np.ascontiguousarray(data).tobytes())
+    return key.hexdigest()
+
+def solve_stacked(version,baseMVA,cases,options):
+    """Solve structurally identical cases as one block-diagonal powerflow
+
+    The mismatch and Jacobian of all the cases are assembled at once from a
+    block-diagonal admittance matrix, so the Newton-Raphson iterations are
+    vectorized across the cases. Returns `None` if the stacked solution does
+    not converge.
+    """
+    ppcs = [internal_case(version,baseMVA,casedata) for casedata in cases]
+    bus, gen, branch = ppcs[0]["bus"], ppcs[0]["gen"], ppcs[0]["branch"]
+    Ybus, Yf, Yt = makeYbus(baseMVA,bus,branch)
+    ref, pv, pq = bustypes(bus,gen)
+
+    N = bus.shape[0]
+    offset = np.arange(len(ppcs)) * N
+    def stack(index):
+        return (offset[:,None] + np.asarray(index,dtype=int)[None,:]).ravel()
+    Sbus = np.concatenate([makeSbus(baseMVA,ppc["bus"],ppc["gen"]) for ppc in ppcs])
+    V0 = np.concatenate([initial_voltage(ppc["bus"],ppc["gen"],ref,pq) for ppc in ppcs])
+    Yblock = sp.block_diag([Ybus]*len(ppcs),format="csr")
+    V, success, _ = newtonpf(Yblock,Sbus,V0,stack(ref),stack(pv),stack(pq),options)
+    if not success:
+        return None
+
+    results = []
+    for n,ppc in enumerate(ppcs):
+        ppc["bus"], ppc["gen"], ppc["branch"] = pfsoln(baseMVA,ppc["bus"],ppc["gen"],ppc["branch"],
+            Ybus,Yf,Yt,V[offset[n]:offset[n]+N],ref,pv,pq)
+        results.append((external_results(ppc,success),success))
+    return results
+
+def solve_group(version,baseMVA,cases,options):
+    """Solve a group of batch scenarios
+
+    Scenarios that share the same network structure are solved together
+    using `solve_stacked()` when possible. Otherwise each scenario is solved
+    in turn by a solver session, which reuses the admittance matrices and
+    warm-starts from the previous scenario. Cases that are not supported by
+    the solver session are solved using `runpf()`.
+    """
+    if options["PF_DC"] or options["ENFORCE_Q_LIMS"] or "dcline" in cases[0]:
+        return [runpf(dict(version=version,baseMVA=baseMVA,**casedata),options) for casedata in cases]
+    if len(cases) > 1 and options["PF_ALG"] == 1:
+        results = solve_stacked(version,baseMVA,cases,options)
+        if results:
+            return results
+    group = SolverSession()
+    return [group.solve(dict(version=version,baseMVA=baseMVA,**casedata),options) for casedata in cases]
+
+def solve_batch(pf_case,scenarios,processes=None):
+    """Solve the powerflow for many perturbed versions of a case
+
+    Arguments:
+
+    * `pf_case`: the base case data, as given to `solver()`
+
+    * `scenarios`: `list` or `dict` of scenarios, each of which is a `dict`
+      that contains the `bus`, `branch`, and/or `gen` data that replaces the
+      base case data for that scenario
+
+    * `processes`: the maximum number of processes used to solve scenarios
+      that do not share the same network structure (default is the number of
+      CPUs, 1 disables the process pool)
+
+    Returns:
+
+    * `dict`: the scenario names in `scenarios`, the solver `success` flags,
+      and the `bus`, `branch` and `gen` results stacked with the scenario as
+      the first axis
+    """
+    options = get_options(pf_case)
+    options["OUT_ALL"] = 0
+
+    if isinstance(scenarios,dict):
+        names = list(scenarios)
+        scenarios = list(scenarios.values())
+    else:
+        names = list(range(len(scenarios)))
+    cases = [batch_case(pf_case,scenario) for scenario in scenarios]
+    for name in ['bus','branch','gen']:
+        shapes = set(casedata[name].shape for casedata in cases)
+        if len(shapes) > 1:
+            raise PypowerError(f"batch scenarios do not have the same {name} data size")
+
+    # group scenarios by network structure
+    groups = {}
+    for n,casedata in enumerate(cases):
+        groups.setdefault(batch_structure(casedata),[]).append(n)
+    groups = list(groups.values())
+
+    version, baseMVA = str(pf_case['version']), pf_case['baseMVA']
+    group_cases = [[cases[n] for n in group] for group in groups]
+    if processes is None:
+        processes = os.cpu_count()
+    if processes > 1 and len(groups) > 1:
+        with ProcessPoolExecutor(min(processes,len(groups))) as pool:
+            solutions = list(pool.map(solve_group,
+                [version]*len(groups),[baseMVA]*len(groups),group_cases,[options]*len(groups)))
+    else:
+        solutions = [solve_group(version,baseMVA,item,options) for item in group_cases]
+
+    # stack results in scenario order
+    result = [None] * len(cases)
+    for group,solution in zip(groups,solutions):
+        for n,item in zip(group,solution):
+            result[n] = item
+    return dict(
+        scenarios = names,
+        success = array([bool(success) for _,success in result]),
+        bus = np.stack([results['bus'] for results,_ in result]),
+        branch = np.stack([results['branch'] for results,_ in result]),
+        gen = np.stack([results['gen'] for results,_ in result]),
+        )
@@ -1,6 +1,6 @@
 ''' Functions for manipulting electrical distribution feeder models. '''
 
-import datetime, copy, os, re, warnings, networkx as nx, json, matplotlib
+import datetime, copy, os, re, sys, time, warnings, networkx as nx, json, matplotlib
 from matplotlib import pyplot as plt
 from functools import *
 
@@ -40,26 +40,29 @@ def parse(inputStr, filePath=True):
 	tokens = _tokenizeGlm(inputStr, filePath)
 	return _parseTokenList(tokens)
 
+def iterWrite(inTree, sort=False):
+	''' Generate the GLM-formatted strings of the objects in an omf.feeder tree, one object at a time.
+	If sort is True, the objects are ordered by their key.
+	'''
+	if sort:
+		try:
+			keys = sorted(inTree.keys(), key=int)
+		except ValueError:
+			raise Exception
+	else:
+		keys = inTree.keys()
+	for key in keys:
+		yield _dictToString(inTree[key]) + '\n'
+
 def write(inTree):
 	''' Turn an omf.feeder tree object into a GLM-formatted string. '''
-	output = ''
-	for key in inTree:
-		output += _dictToString(inTree[key]) + '\n'
-	return output
+	return ''.join(iterWrite(inTree))
 
 def sortedWrite(inTree):
 	''' Write out a GLM from a tree, and order all tree objects by their key. 
 	Sometimes Gridlab breaks if you rearrange a GLM.
 	'''
-	sortedKeys = sorted(inTree.keys(), key=int)
-	output = ''
-	try:
-		for key in sortedKeys:
-			# print inTree[key]
-			output += _dictToString(inTree[key]) + '\n'
-	except ValueError:
-		raise Exception
-	return output
+	return ''.join(iterWrite(inTree, sort=True))
 
 def glmToOmd(glmPath, omdPath, attachFilePaths=[]):
 	''' Read in a glm file and take a shot at writing an omd. '''
@@ -83,9 +86,8 @@ def omdToGlm(omdPath, outPath):
 		with open (outPath.replace(".glm",f"-{attach}"),'w') as attachFile:
 			attachFile.write(attachments[attach])
 	# Write the glm.
-	glmString = sortedWrite(omd['tree'])
 	with open(outPath,'w') as glmFile:
-		glmFile.write(glmString)
+		glmFile.writelines(iterWrite(omd['tree'], sort=True))
 
 def chart(inTree, labels=False, neatoLayout=False, showPlot=False):
 	''' Return a matplotlib chart of a feeder.'''
@@ -372,7 +374,7 @@ def latLonNxGraph(inGraph, labels=False, neatoLayout=False, showPlot=False):
 	if showPlot: plt.show()
 
 def _tokenizeGlm(inputStr, filePath=True):
-	''' Turn a GLM file/string into a linked list of tokens.
+	''' Turn a GLM file/string into a list of tokens.
 
 	E.g. turn a string like this:
 	clock {clockey valley;};
@@ -394,35 +396,37 @@ def _tokenizeGlm(inputStr, filePath=True):
 	# Also strip non-single whitespace because it's only for humans:
 	data = data.replace('\n','').replace('\r','').replace('\t',' ')
 	# Tokenize around semicolons, braces and whitespace.
-	tokenized = re.split(r'(;|\}|\{|\s)',data)
-	# Get rid of whitespace strings.
-	basicList = filter(lambda x:x!='' and x!=' ', tokenized)
-	return basicList
+	return _tokenPattern.findall(data)
+
+# Tokens are semicolons, braces, or runs of anything else except whitespace.
+_tokenPattern = re.compile(r'[;{}]|[^;{}\s]+')
 
 def _parseTokenList(tokenList):
 	''' Given a list of tokens from a GLM, parse those into a tree data structure. '''
 	def currentLeafAdd(key, value):
 		# Helper function to add to the current leaf we're visiting.
-		current = tree
-		for x in guidStack:
-			current = current[x]
-		current[key] = value
+		(leafStack[-1] if leafStack else tree)[key] = value
 	def listToString(listIn):
 		# Helper function to turn a list of strings into one string with some decent formatting.
-		if len(listIn) == 0:
-			return ''
-		else:
-			return reduce(lambda x,y:str(x)+' '+str(y),listIn[1:-1])
+		return ' '.join([str(x) for x in listIn[1:-1]])
+	def nextToken(ends):
+		# Helper function to collect tokens from the cursor until one of the ends is found.
+		nonlocal pos
+		start = pos
+		while tokenList[pos] not in ends:
+			pos += 1
+		pos += 1
+		return tokenList[start:pos]
 	# Tree variables.
 	tree = {}
 	guid = 0
 	guidStack = []
-	# Pop off a full token, put it on the tree, rinse, repeat.
-	while tokenList != []:
-		# Pop, then keep going until we have a full token (i.e. 'object house', not just 'object')
-		fullToken = []
-		while fullToken == [] or fullToken[-1] not in ['{',';','}']:
-			fullToken.append(tokenList.pop(0))
+	leafStack = []
+	pos = 0
+	# Take a full token, put it on the tree, rinse, repeat.
+	while pos < len(tokenList):
+		# Keep going until we have a full token (i.e. 'object house', not just 'object')
+		fullToken = nextToken(('{',';','}'))
 		# Work with what we've collected.
 		if fullToken[-1] == ';':
 			# Special case when we have zero-attribute items (like #include, #set, module).
@@ -435,26 +439,24 @@ def _parseTokenList(tokenList):
 		elif fullToken[-1] == '}':
 			if len(fullToken) > 1:
 				currentLeafAdd(fullToken[0],listToString(fullToken))
-			try:
-				# Need try in case of zero length stack.
+			if guidStack:
 				guidStack.pop()
-			except:
-				pass
+				leafStack.pop()
 		elif fullToken[0] == 'schedule':
 			# Special code for those ugly schedule objects:
-			while fullToken[-1] not in ['}']:
-				fullToken.append(tokenList.pop(0))
+			fullToken += nextToken(('}',))
 			tree[guid] = {'object':'schedule','name':fullToken[1], 'cron':' '.join(fullToken[3:-2])}
 			guid += 1
 		elif fullToken[0] == 'class':
 			# Special code for the weirdo class objects:
-			while fullToken[-1] not in ['}']:
-				fullToken.append(tokenList.pop(0))
+			fullToken += nextToken(('}',))
 			tree[guid] = {'omftype':'class ' + fullToken[1],'argument':'{\n\t' + ' '.join(fullToken[3:-2]) + ';\n}'}
 			guid += 1
 		elif fullToken[-1] == '{':
-			currentLeafAdd(guid,{})
+			leaf = {}
+			currentLeafAdd(guid,leaf)
 			guidStack.append(guid)
+			leafStack.append(leaf)
 			guid += 1
 			# Wrapping this currentLeafAdd is defensive coding so we don't crash on malformed glms.
 			if len(fullToken) > 1:
@@ -467,23 +469,23 @@ def _parseTokenList(tokenList):
 
 def _gatherKeyValues(inDict, keyToAvoid):
 	''' Helper function: put key/value pairs for objects into the format Gridlab needs. '''
-	otherKeyValues = ''
+	otherKeyValues = []
 	for key in inDict:
 		if type(inDict[key]) is dict:
 			# WARNING: RECURSION HERE
-			otherKeyValues += _dictToString(inDict[key])
+			otherKeyValues.append(_dictToString(inDict[key]))
 		elif key != keyToAvoid:
 			if key == 'comment':
-				otherKeyValues += (inDict[key] + '\n')
+				otherKeyValues.append(inDict[key] + '\n')
 			elif key == 'name' or key == 'parent':
 				if len(inDict[key]) <= 62:
-					otherKeyValues += ('\t' + key + ' ' + str(inDict[key]) + ';\n')
+					otherKeyValues.append('\t' + key + ' ' + str(inDict[key]) + ';\n')
 				else:
 					warnings.warn("{:s} argument is longer that 64 characters. Truncating.".format(key), RuntimeWarning)
-					otherKeyValues += ('\t' + key + ' ' + str(inDict[key])[0:62] + '; // truncated from {:s}\n'.format(inDict[key]))
+					otherKeyValues.append('\t' + key + ' ' + str(inDict[key])[0:62] + '; // truncated from {:s}\n'.format(inDict[key]))
 			else:
-				otherKeyValues += ('\t' + key + ' ' + str(inDict[key]) + ';\n')
-	return otherKeyValues
+				otherKeyValues.append('\t' + key + ' ' + str(inDict[key]) + ';\n')
+	return ''.join(otherKeyValues)
 
 def _dictToString(inDict):
 	''' Helper function: given a single dict representing a GLM object, concatenate it into a string. '''
@@ -637,5 +639,31 @@ def _tests():
 	# Contig line merging test
 	mergeContigLines(tree)
 
+def _benchmark(objectCount=10000):
+	''' Time the tokenizer, parser and writer on a synthetic feeder with objectCount lines and nodes. '''
+	glm = ['module powerflow {\n\tsolver_method NR;\n};',
+		'clock {\n\ttimezone PST+8PDT;\n\tstarttime \'2000-01-01 00:00:00\';\n\tstoptime \'2000-01-02 00:00:00\';\n};']
+	for n in range(objectCount):
+		glm.append('object overhead_line {\n\tname line%d; // line\n\tfrom node%d;\n\tto node%d;\n\tlength 100 ft;\n'
+			'\tconfiguration object line_configuration {\n\t\tconductor_A cond;\n\t};\n};' % (n,n,n+1))
+		glm.append('object node {\n\tname node%d;\n\tphases ABCN;\n\tnominal_voltage 7200;\n};' % (n+1))
+	glm = '\n'.join(glm) + '\n'
+	tic = time.time()
+	tokens = _tokenizeGlm(glm, filePath=False)
+	toc = time.time()
+	print('Tokenized %d bytes into %d tokens in %.3f s' % (len(glm), len(tokens), toc-tic))
+	tic = time.time()
+	tree = _parseTokenList(tokens)
+	toc = time.time()
+	print('Parsed %d tokens into %d tree objects in %.3f s' % (len(tokens), len(tree), toc-tic))
+	tic = time.time()
+	output = write(tree)
+	toc = time.time()
+	print('Wrote %d tree objects into %d bytes in %.3f s' % (len(tree), len(output), toc-tic))
+	assert parse(output, filePath=False) == tree, 'written GLM does not parse to the same tree'
+
 if __name__ == '__main__':
-	_tests()
\ No newline at end of file
+	if len(sys.argv) > 1 and sys.argv[1] == 'benchmark':
+		_benchmark(*[int(x) for x in sys.argv[2:3]])
+	else:
+		_tests()
\ No newline at end of file
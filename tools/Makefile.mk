@@ -28,6 +28,7 @@ dist_pkgdata_DATA += tools/gridlabd-editor.py
 dist_pkgdata_DATA += tools/modeler.py
 dist_pkgdata_DATA += tools/runner.py
 dist_pkgdata_DATA += tools/group.py
+dist_pkgdata_DATA += tools/infrastructure.py
 dist_pkgdata_DATA += tools/insights.py
 dist_pkgdata_DATA += tools/install.py
 dist_pkgdata_DATA += tools/isone.py
@@ -57,3 +58,4 @@ dist_pkgdata_DATA += tools/timeseries.py
 dist_pkgdata_DATA += tools/ucar_weather.py
 dist_pkgdata_DATA += tools/unitcalc.py
 dist_pkgdata_DATA += tools/weather.py
+dist_pkgdata_DATA += tools/weather_store.py
@@ -12,25 +12,72 @@ Commands:
 
 * `clear`: clear the cache
 
-* `peek`: peek at the cache contents
+* `peek=NAME[,...]`: peek at the cache contents
+
+* `stats`: display the cache statistics
 
 Description:
 
 The `cache` command manipulate the `gridlabd` cache data.
+
+Cache entries are limited by total size (`MAXSIZE` bytes) and count
+(`MAXCOUNT` entries), with the least recently used entries removed first when
+a limit is exceeded.  Entries may be given a time-to-live, after which they
+are refreshed when next accessed.  Entries are written to a temporary file
+and renamed into the cache, and access to each entry is locked so that
+concurrent jobs using the same cache do not conflict.
+
+Entries may contain text, bytes, pickled python data, or numpy arrays.  The
+`memoize` decorator caches the return value of a function by its arguments,
+e.g.,
+
+~~~
+import gridlabd.cache as cache
+
+@cache.memoize("mytool",ttl=86400)
+def get_data(url):
+    return requests.get(url).content
+~~~
 """
 
 import os
 import sys
+import json
+import time
+import fcntl
+import pickle
+import random
+import hashlib
+import functools
+import contextlib
 import gridlabd.framework as app
 
 CACHEDIR = os.path.join(os.environ["GLD_ETC"],".cache")
 
+MAXSIZE = 1000000000 # maximum total size of cache entries in bytes (None is unlimited)
+MAXCOUNT = 10000 # maximum number of cache entries (None is unlimited)
+TTL = None # default entry time-to-live in seconds (None is forever)
+
+FORMATS = ["text","bytes","pickle","npy"]
+
 class CacheError(Exception):
     """Cache exception"""
 
 class Cache:
 
-    def __init__(self,tool=None):
+    def __init__(self,tool=None,maxsize=None,maxcount=None,ttl=None):
+        """Access a cache
+
+        Arguments:
+
+        * `tool`: the tool cache name (default is the shared cache)
+
+        * `maxsize`: maximum total size of entries in bytes (default is `MAXSIZE`)
+
+        * `maxcount`: maximum number of entries (default is `MAXCOUNT`)
+
+        * `ttl`: default entry time-to-live in seconds (default is `TTL`)
+        """
 
         # get/check cachedir
         self.cachedir = os.path.join(CACHEDIR,tool) if tool else CACHEDIR
@@ -38,23 +85,32 @@ class Cache:
 
             os.makedirs(self.cachedir,exist_ok=True)
 
-    def get(self,name,on_fail=None,args=[],kwargs={}):
+        self.maxsize = maxsize if maxsize else MAXSIZE
+        self.maxcount = maxcount if maxcount else MAXCOUNT
+        self.ttl = ttl if ttl else TTL
+
+    def get(self,name,on_fail=None,args=[],kwargs={},ttl=None,format=None):
         """Get data from the cache
 
         Arguments:
-        
+
         * `name`: the file name
 
         * `on_fail`: the function to call if the name does not exist in the cache
 
+        * `ttl`: the time-to-live of the entry in seconds (default is the cache `ttl`)
+
+        * `format`: the entry format, i.e., `text`, `bytes`, `pickle`, or
+          `npy` (default is based on the type of the data)
+
         Returns:
 
-        * `str`: the contents of the cache
+        * `str|bytes|object`: the contents of the cache
 
         Description:
 
         Retrieves data from the cache if found. If the data is not found, the
-        `on_fail(name,*args,**kwargs)` function is called and the return
+        `on_fail(*args,**kwargs)` function is called and the return
         value is stored in the cache.
 
         If `on_fail` is not specified, the `get` peeks at the cache and
@@ -62,25 +118,117 @@ class Cache:
         exception is raised.
         """
         pathname = os.path.join(self.cachedir,name)
-        if os.path.exists(pathname):
-            return open(pathname,"r").read()
-        if not on_fail:
-            raise CacheError(f"'{name}' not found")
-        result = on_fail(*args,**kwargs)
-        try:
-            with open(pathname,"w") as fh:
-                fh.write(str(result))
-                return result
-        except:
+        with self._lock(name):
+
+            if self._valid(name):
+                try:
+                    os.utime(pathname)
+                    result = self._read(name)
+                    self._count("hits")
+                    return result
+                except FileNotFoundError:
+                    pass # removed by another process, e.g., clear()
+            self._count("misses")
+            if not on_fail:
+                raise CacheError(f"'{name}' not found")
+            result = on_fail(*args,**kwargs)
+            self.put(name,result,ttl=ttl,format=format,locked=True)
+            return result
+
+    def put(self,name,data,ttl=None,format=None,locked=False):
+        """Put data in the cache
 
-            # remove anything that causes a failure so it has a chance of working next time
-            os.remove(pathname)
-            raise
+        Arguments:
+
+        * `name`: the file name
+
+        * `data`: the data to store
+
+        * `ttl`: the time-to-live of the entry in seconds (default is the cache `ttl`)
+
+        * `format`: the entry format (default is based on the type of the data)
+
+        * `locked`: the entry is already locked by the caller
+        """
+        if format is None:
+            format = _format(data)
+        if format not in FORMATS:
+            raise CacheError(f"format '{format}' is invalid")
+        if ttl is None:
+            ttl = self.ttl
+        with (contextlib.nullcontext() if locked else self._lock(name)):
+            pathname = os.path.join(self.cachedir,name)
+            tmpname = os.path.join(self.cachedir,f".{name}.{os.getpid()}")
+            try:
+                with open(tmpname,"w" if format == "text" else "wb") as fh:
+                    if format == "text":
+                        fh.write(str(data))
+                    elif format == "bytes":
+                        fh.write(data)
+                    elif format == "pickle":
+                        pickle.dump(data,fh)
+                    else:
+                        import numpy
+                        numpy.save(fh,data,allow_pickle=False)
+                with open(tmpname+".meta","w") as fh:
+                    json.dump({"format":format,"expires":time.time()+ttl if ttl else None},fh)
+                os.replace(tmpname+".meta",self._metaname(name))
+                os.replace(tmpname,pathname)
+            except:
+
+                # remove anything that causes a failure so it has a chance of working next time
+                for file in [tmpname,tmpname+".meta",pathname,self._metaname(name)]:
+                    if os.path.exists(file):
+                        os.remove(file)
+                raise
+        self._count("writes")
+        self.evict()
+
+    def evict(self):
+        """Remove the least recently used entries until the cache is within its limits
+
+        Returns:
+
+        * `int`: the number of entries removed
+        """
+        if not self.maxsize and not self.maxcount:
+            return 0
+        with self._lock():
+            entries = sorted((x.stat().st_mtime,x.stat().st_size,x.name)
+                for x in os.scandir(self.cachedir) if x.is_file() and not x.name.startswith("."))
+            size = sum(x[1] for x in entries)
+            count = len(entries)
+            removed = 0
+            for _,nbytes,name in entries:
+                if ( not self.maxsize or size <= self.maxsize ) and ( not self.maxcount or count <= self.maxcount ):
+                    break
+                with self._lock(name,blocking=False) as fh:
+                    if fh is None:
+                        continue # entry is in use
+                    self._remove(name)
+                size -= nbytes
+                count -= 1
+                removed += 1
+        if removed:
+            self._count("evictions",removed)
+        return removed
 
     def list(self):
         """List the cache contents"""
         return [x for x in os.listdir(self.cachedir) if not x.startswith(".")]
 
+    def stats(self):
+        """Get the cache statistics
+
+        Returns:
+
+        * `dict`: number of entries, total size, hits, misses, writes, and evictions
+        """
+        entries = [x.stat().st_size for x in os.scandir(self.cachedir) if x.is_file() and not x.name.startswith(".")]
+        result = {"entries":len(entries),"size":sum(entries),"hits":0,"misses":0,"writes":0,"evictions":0}
+        result.update(self._stats())
+        return result
+
     def clear(self):
         """Clear the cache
 
@@ -90,6 +238,132 @@ class Cache:
         for item in [x for x in os.listdir(self.cachedir) if x not in [".",".."]]:
             os.remove(os.path.join(self.cachedir,item))
 
+    def _metaname(self,name):
+        return os.path.join(self.cachedir,f".{name}.meta")
+
+    def _valid(self,name):
+        if not os.path.exists(os.path.join(self.cachedir,name)):
+            return False
+        try:
+            with open(self._metaname(name),"r") as fh:
+                expires = json.load(fh)["expires"]
+        except FileNotFoundError:
+            return True
+        if expires and expires < time.time():
+            self._remove(name)
+            return False
+        return True
+
+    def _read(self,name):
+        try:
+            with open(self._metaname(name),"r") as fh:
+                format = json.load(fh)["format"]
+        except FileNotFoundError:
+            format = "text"
+        pathname = os.path.join(self.cachedir,name)
+        if format == "text":
+            with open(pathname,"r") as fh:
+                return fh.read()
+        with open(pathname,"rb") as fh:
+            if format == "bytes":
+                return fh.read()
+            elif format == "pickle":
+                return pickle.load(fh)
+            else:
+                import numpy
+                return numpy.load(fh,allow_pickle=False)
+
+    def _remove(self,name):
+        # caller must hold the entry lock
+        for file in [os.path.join(self.cachedir,name),self._metaname(name),self._lockname(name)]:
+            if os.path.exists(file):
+                os.remove(file)
+
+    def _lockname(self,name=None):
+        return os.path.join(self.cachedir,f".{name}.lock" if name else ".lock")
+
+    @contextlib.contextmanager
+    def _lock(self,name=None,blocking=True):
+        lockname = self._lockname(name)
+        while True:
+            fh = open(lockname,"a")
+            try:
+                fcntl.flock(fh,fcntl.LOCK_EX if blocking else fcntl.LOCK_EX|fcntl.LOCK_NB)
+            except BlockingIOError:
+                fh.close()
+                yield None
+                return
+            try:
+                # the lock file may have been removed with its entry while waiting
+                if os.stat(lockname).st_ino == os.fstat(fh.fileno()).st_ino:
+                    break
+            except FileNotFoundError:
+                pass
+            fh.close()
+        try:
+            yield fh
+        finally:
+            fcntl.flock(fh,fcntl.LOCK_UN)
+            fh.close()
+
+    def _stats(self):
+        try:
+            with open(os.path.join(self.cachedir,".stats"),"r") as fh:
+                return json.load(fh)
+        except (FileNotFoundError,json.JSONDecodeError):
+            return {}
+
+    def _count(self,stat,n=1):
+        with self._lock(".stats"):
+            stats = self._stats()
+            stats[stat] = stats.get(stat,0) + n
+            tmpname = os.path.join(self.cachedir,f".stats.{os.getpid()}.tmp")
+            with open(tmpname,"w") as fh:
+                json.dump(stats,fh)
+            os.replace(tmpname,os.path.join(self.cachedir,".stats"))
+
+def _format(data):
+    if isinstance(data,str):
+        return "text"
+    if isinstance(data,(bytes,bytearray)):
+        return "bytes"
+    if type(data).__module__ == "numpy" and type(data).__name__ == "ndarray" and data.dtype.kind != "O":
+        return "npy"
+    return "pickle"
+
+def memoize(tool=None,ttl=None,format=None,**options):
+    """Cache the return value of a function by its arguments
+
+    Arguments:
+
+    * `tool`: the tool cache name (default is the function's module name)
+
+    * `ttl`: the time-to-live of the entries in seconds
+
+    * `format`: the entry format (default is `pickle`)
+
+    * `**options`: other cache options (see `Cache`)
+
+    Returns:
+
+    * `callable`: the function decorator
+
+    Description:
+
+    The arguments of the function must be picklable. The cache used is
+    available as the `cache` attribute of the decorated function.
+    """
+    def decorator(function):
+        cache = Cache(tool if tool else function.__module__,**options)
+        @functools.wraps(function)
+        def wrapper(*args,**kwargs):
+            key = hashlib.md5(pickle.dumps((function.__qualname__,args,sorted(kwargs.items())))).hexdigest()
+            return cache.get(f"{function.__name__}-{key}",function,args,kwargs,
+                ttl=ttl,format=format if format else "pickle")
+        wrapper.cache = cache
+        return wrapper
+    return decorator
+
 def main(argv:list[str]) -> int:
     """Main routine
 
@@ -118,7 +392,8 @@ def main(argv:list[str]) -> int:
 
         elif key == "list":
 
-            Cache(tool).list()
+            for item in sorted(Cache(tool).list()):
+                print(item,file=sys.stdout)
 
         elif key == "clear":
 
@@ -126,7 +401,16 @@ def main(argv:list[str]) -> int:
 
         elif key == "peek":
 
-            Cache(tool).get(value)
+            for item in value:
+                print(Cache(tool).get(item),file=sys.stdout)
+
+        elif key == "stats":
+
+            stats = Cache(tool).stats()
+            lookups = stats["hits"] + stats["misses"]
+            stats["hit_ratio"] = f"{stats['hits']/lookups*100:.1f}%" if lookups else "-"
+            for item,data in stats.items():
+                print(f"{item}: {data}",file=sys.stdout)
 
         elif key in ["--tool"]:
 
@@ -142,11 +426,20 @@ def main(argv:list[str]) -> int:
     # normal termination condition
     return app.E_OK
 
+def _test_access(args):
+    name,seed = args
+    cache = Cache(name,maxcount=5)
+    random.seed(seed)
+    for n in range(200):
+        key = f"key{random.randint(0,15)}"
+        if cache.get(key,lambda:key*10) != key*10:
+            return False
+    return True
+
 def test() -> (int,int):
 
     n_tested = 0
     n_failed = 0
-    import random
     import shutil
     name = f".test-{hex(random.randint(0,2**64-1))[2:]}"
     cache = Cache(name)
@@ -160,6 +453,45 @@ def test() -> (int,int):
 
         n_tested += 1
 
+        assert cache.get("bytes",lambda:b"\x00\xff") == b"\x00\xff", "cache bytes value does not match"
+        assert cache.get("bytes") == b"\x00\xff", "cached bytes value does not match"
+        assert cache.get("pickle",lambda:{"a":[1,2]}) == {"a":[1,2]}, "cache pickle value does not match"
+        assert cache.get("pickle") == {"a":[1,2]}, "cached pickle value does not match"
+        cache.get("expired",lambda:"old",ttl=-1)
+        assert cache.get("expired",lambda:"new") == "new", "expired value was not refreshed"
+        stats = cache.stats()
+        assert stats["hits"] == 2 and stats["misses"] == 4, f"cache statistics {stats} are incorrect"
+
+        n_tested += 1
+
+        cache.clear()
+        cache.maxcount = 2
+        for n in range(3):
+            cache.put(f"item{n}",str(n))
+            os.utime(os.path.join(cache.cachedir,f"item{n}"),(n,n))
+        cache.evict()
+        assert sorted(cache.list()) == ["item1","item2"], "least recently used item was not evicted"
+
+        n_tested += 1
+
+        @memoize(name)
+        def square(x):
+            square.calls += 1
+            return x*x
+        square.calls = 0
+        assert square(3) == 9 and square(3) == 9 and square.calls == 1, "memoized function was not cached"
+
+        n_tested += 1
+
+        import multiprocessing
+        cache.clear()
+        with multiprocessing.Pool(4) as pool:
+            assert all(pool.map(_test_access,[(name,n) for n in range(4)])), "concurrent access failed"
+        locks = [x for x in os.listdir(cache.cachedir) if x.endswith(".lock")]
+        assert len(locks) <= len(cache.list()) + 2, f"{len(locks)} lock files remain for {len(cache.list())} entries"
+
+        n_tested += 1
+
     except:
 
         e_type,e_value,e_trace = sys.exc_info()
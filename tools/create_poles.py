@@ -169,6 +169,7 @@ SEE ALSO
 import sys, os, json, datetime, subprocess
 import math, pandas
 from haversine import haversine, Unit
+import gridlabd.framework as app
 import gridlabd.nsrdb_weather as nsrdb_weather
 
 def error(msg,code=None):
@@ -413,14 +414,15 @@ def main(inputfile,**options):
     if inputfile.endswith(".glm"):
         glmfile = inputfile
         jsonfile = inputfile.replace(".glm",".json")
-        code = os.system(f"gridlabd -C {glmfile} -o {jsonfile}")
-        if code != 0:
-            error(f"unable to compile '{glmfile}' into {jsonfile} (error code {code})",2)
+        f,result = app.open_glm(glmfile,tmp=os.path.dirname(jsonfile),exception=False)
+        if f is None:
+            error(f"unable to compile '{glmfile}' into {jsonfile} (error code {result.returncode})",2)
     elif inputfile.endswith(".json"):
         jsonfile = inputfile
+        f = open(jsonfile,"r")
     else:
         error(f"main(inputfile='{inputfile}',options={options}): inputfile type not recognized",1)
-    with open(jsonfile,"r") as f:
+    with f:
         model = json.load(f)
 
     # process pole-mounted equipment in model and short lines
@@ -35,6 +35,11 @@ location.
 The `player` FILENAME must include `{building_type}` if more than one `type`
 is specified.
 
+Building type data is downloaded concurrently and the weather data is loaded
+once per county. The processed enduse data is cached by building type,
+weather, timestep, timezone, and electrification so that repeated requests do
+not need to process the downloaded data again.
+
 If the `start` and `end` dates are not specified, then the date range of
 enduse load data will be used. The current default data range is the year 2018.
 
@@ -72,6 +77,9 @@ import os
 import sys
 import re
 import json
+import hashlib
+import urllib.error
+from concurrent.futures import ThreadPoolExecutor
 import gridlabd.eia_recs as eia
 import pandas as pd
 import gridlabd.census as census
@@ -238,6 +246,7 @@ FLOATFORMAT = ".4g"
 START = None
 END = None
 TIMESTEP = "1h"
+MAXTHREADS = 8 # maximum number of concurrent downloads
 
 class EnduseError(Exception):
     """Enduse exception"""
@@ -298,102 +307,143 @@ class Enduse:
             timestep = TIMESTEP
         if not isinstance(building_types,list) and not building_types is None:
             raise TypeError("building_types is not a list or None")
+        for field in electrification:
+            if field not in ENDUSES or field == "heatgain":
+                raise EnduseError(f"electrification '{field}' is not a valid enduse")
+        timezone = TIMEZONE if TIMEZONE else tzinfo
         self.data = {}
         self.weather = {}
+        matches = []
         for pattern in ['.*'] if building_types is None else building_types:
             for sector,types in [(x,y) for x,y in BUILDING_TYPE.items()]:
                 for btype,spec in [(x,y) for x,y in types.items() if re.match(pattern,x)]:
+                    if not (sector,btype,spec) in matches:
+                        matches.append((sector,btype,spec))
+
+        # processed data is cached by timestep, timezone, and electrification
+        key = hashlib.md5(json.dumps([timestep,timezone,electrification],sort_keys=True,default=str).encode()).hexdigest()
+        def processed(name):
+            return os.path.join(cachedir,f"{name}-{key}.pkl")
+
+        def download(sector,btype,spec):
+            if os.path.exists(processed(btype.lower())):
+                return None
+            cachefile = os.path.join(cachedir,f"{btype.lower()}.csv.gz")
+            if os.path.exists(cachefile):
+                return pd.read_csv(cachefile,index_col=[0],parse_dates=True)
+            url = ENDUSE_URL[sector].format(state=state,gcode=gcode,type=spec,weather=weather)
+            try:
+                data = pd.read_csv(url,
+                    usecols = list(range(2,len(CONVERTERS[sector])+1)),
+                    index_col = [0],
+                    parse_dates = True,
+                    converters = {x:y[1] for x,y in CONVERTERS[sector].items() if isinstance(y,list)},
+                    )
+                data.to_csv(cachefile,index=True,header=True)
+                return data
+            except urllib.error.HTTPError as err:
+                app.error(f"{btype} not available ({err} for {url})")
+                if ignore:
+                    return None
+                raise
+
+        # download building type data concurrently
+        with ThreadPoolExecutor(max_workers=MAXTHREADS) as pool:
+            downloads = list(pool.map(lambda x:download(*x),matches))
+
+        weather_data = None
+        for (sector,btype,spec),data in zip(matches,downloads):
+
+            # skip unavailable building types
+            cachefile = processed(btype.lower())
+            if data is None and not os.path.exists(cachefile):
+                continue
+
+            # handle weather (loaded once for all building types)
+            if weather_data is None:
+                weather_data = self._get_weather(cachedir,processed("weather"),weather,gcode,timestep,timezone,ignore)
+                if weather_data is None:
+                    break
 
-                    # handle load data cache
-                    cachefile = os.path.join(cachedir,f"{btype.lower()}.csv.gz")
-                    if os.path.exists(cachefile):
-                        data = pd.read_csv(cachefile,index_col=[0],parse_dates=True)
-                    else:
-                        url = ENDUSE_URL[sector].format(state=state,gcode=gcode,type=spec,weather=weather)
-                        import urllib
-                        try:
-                            data = pd.read_csv(url,
-                                usecols = list(range(2,len(CONVERTERS[sector])+1)),
-                                index_col = [0],
-                                parse_dates = True,
-                                converters = {x:y[1] for x,y in CONVERTERS[sector].items() if isinstance(y,list)},
-                                )
-                            data.to_csv(cachefile,index=True,header=True)
-                        except urllib.error.HTTPError as err:
-                            app.error(f"{btype} not available ({err} for {url})")
-                            if ignore:
-                                continue
-                            raise
-
-                    # handle weather cache
-                    cachefile = os.path.join(cachedir,f"weather.csv.gz")
-                    if os.path.exists(cachefile):
-                        weather_data = pd.read_csv(cachefile,index_col=[0],parse_dates=True)
-                    else:
-                        url = WEATHER_URL[weather].format(gcode=gcode.upper())
-                        import urllib
-                        try:
-                            weather_data = pd.read_csv(url,
-                                index_col = [0],
-                                parse_dates = True,
-                                dtype = float,
-                                )
-                            weather_data.to_csv(cachefile,index=True,header=True)
-                        except urllib.error.HTTPError as err:
-                            app.error(f"weather not available ({err} for {url})")
-                            if ignore:
-                                continue
-                            raise
-                    weather_data.columns = [WEATHER_COLUMNS[x] for x in weather_data.columns]
-
-                    # resample load data
-                    data = data.resample(timestep).sum()
-                    data.index = data.index.tz_localize("EST").tz_convert(TIMEZONE if TIMEZONE else tzinfo)
-
-                    # resample weather data
-                    weather_data = weather_data.resample(timestep).sum()
-                    weather_data.index = weather_data.index.tz_localize("EST").tz_convert(TIMEZONE if TIMEZONE else tzinfo)
-
-                    # drop unused inputs
-                    for field in [x for x in data.columns if x.startswith("in.")] \
-                            + [x for x,y in CONVERTERS[sector].items() if y == None]:
-                        if field in data.columns:
-                            data.drop(field,axis=1,inplace=True)
-
-                    # rename disaggregated fields
-                    for field,convert in {x:y for x,y in CONVERTERS[sector].items() if x in data.columns and isinstance(y,list) and y[2] == None}.items():
-                        data.rename({field:convert[0]},inplace=True,axis=1)
-
-                    # initialize aggregate fields
-                    for field in ENDUSES:
-                        data[field] = 0.0
-                    electric_loads = {x:y[0] for x,y in CONVERTERS[sector].items() if x in data.columns and isinstance(y,list) and y[2] == True}
-                    for source,field in electric_loads.items():
-                        data[field] += data[source]
-                        data.drop(source,axis=1,inplace=True)
-
-                    # check electrification
-                    for field in electrification:
-                        if field not in ENDUSES or field == "heatgain":
-                            raise EnduseError(f"electrification '{field}' is not a valid enduse")
-
-                    # compute heatgains and update fields
-                    nonelectric_loads = {x:y[0] for x,y in CONVERTERS[sector].items() if x in data.columns and isinstance(y,list) and y[2] == False}
-                    for source,field in nonelectric_loads.items():
-                        try:
-                            factor = float(electrification[field])
-                        except (KeyError, TypeError):
-                            factor = 0.0
-                        data["heatgain"] += data[source] * (1-factor)
-                        data[field] += data[source] * factor
-                        data.drop(source,axis=1,inplace=True)
-                    for field in ENDUSES:
-                        data[field] /= data["units"]
-                    data.drop("units",axis=1,inplace=True)
-
-                    # save results
-                    self.data[btype] = data
-                    self.weather = weather_data
+            # handle processed data cache
+            if os.path.exists(cachefile):
+                data = pd.read_pickle(cachefile)
+            else:
+                data = self._convert(sector,data,timestep,timezone,electrification)
+                data.to_pickle(cachefile)
+
+            # save results
+            self.data[btype] = data
+            self.weather = weather_data
+
+    def _get_weather(self,cachedir,cachefile,weather,gcode,timestep,timezone,ignore):
+        """Get resampled weather data (None if not available and ignored)"""
+        if os.path.exists(cachefile):
+            return pd.read_pickle(cachefile)
+        rawfile = os.path.join(cachedir,f"weather.csv.gz")
+        if os.path.exists(rawfile):
+            weather_data = pd.read_csv(rawfile,index_col=[0],parse_dates=True)
+        else:
+            url = WEATHER_URL[weather].format(gcode=gcode.upper())
+            try:
+                weather_data = pd.read_csv(url,
+                    index_col = [0],
+                    parse_dates = True,
+                    dtype = float,
+                    )
+                weather_data.to_csv(rawfile,index=True,header=True)
+            except urllib.error.HTTPError as err:
+                app.error(f"weather not available ({err} for {url})")
+                if ignore:
+                    return None
+                raise
+        weather_data.columns = [WEATHER_COLUMNS[x] for x in weather_data.columns]
+
+        # resample weather data
+        weather_data = weather_data.resample(timestep).sum()
+        weather_data.index = weather_data.index.tz_localize("EST").tz_convert(timezone)
+        weather_data.to_pickle(cachefile)
+        return weather_data
+
+    def _convert(self,sector,data,timestep,timezone,electrification):
+        """Convert downloaded enduse data to enduse loads"""
+
+        # resample load data
+        data = data.resample(timestep).sum()
+        data.index = data.index.tz_localize("EST").tz_convert(timezone)
+
+        # drop unused inputs
+        for field in [x for x in data.columns if x.startswith("in.")] \
+                + [x for x,y in CONVERTERS[sector].items() if y == None]:
+            if field in data.columns:
+                data.drop(field,axis=1,inplace=True)
+
+        # rename disaggregated fields
+        for field,convert in {x:y for x,y in CONVERTERS[sector].items() if x in data.columns and isinstance(y,list) and y[2] == None}.items():
+            data.rename({field:convert[0]},inplace=True,axis=1)
+
+        # initialize aggregate fields
+        for field in ENDUSES:
+            data[field] = 0.0
+        electric_loads = {x:y[0] for x,y in CONVERTERS[sector].items() if x in data.columns and isinstance(y,list) and y[2] == True}
+        for source,field in electric_loads.items():
+            data[field] += data[source]
+            data.drop(source,axis=1,inplace=True)
+
+        # compute heatgains and update fields
+        nonelectric_loads = {x:y[0] for x,y in CONVERTERS[sector].items() if x in data.columns and isinstance(y,list) and y[2] == False}
+        for source,field in nonelectric_loads.items():
+            try:
+                factor = float(electrification[field])
+            except (KeyError, TypeError):
+                factor = 0.0
+            data["heatgain"] += data[source] * (1-factor)
+            data[field] += data[source] * factor
+            data.drop(source,axis=1,inplace=True)
+        for field in ENDUSES:
+            data[field] /= data["units"]
+        data.drop("units",axis=1,inplace=True)
+        return data
 
     def has_buildingtype(self,building_type:str) -> bool:
         """Checks whether data include building type
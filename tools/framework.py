@@ -62,6 +62,9 @@ import sys
 import io
 import json
 import math
+import re
+import shutil
+import hashlib
 import subprocess
 import gridlabd.unitcalc as unitcalc
 import geocoder
@@ -299,11 +302,18 @@ def location(refresh=False):
         LOCATION = geocoder.ip('me').geojson['features'][0]['properties']
     return LOCATION
 
+COMPILECACHE = True # enable compiled model cache in open_glm()
+DYNAMICMACROS = ["#system","#command","#exec","#gridlabd","#start","#wget","#curl",
+    "#input","#begin","#ifexist","#ifmissing","#on_exit","#read","#wait","#sleep"] # macros that prevent caching
+DYNAMICVARIABLES = ["SHELL","PYTHON","RANDOM","NOW","TMPFILE","FIND","FINDFILE","GEOCODE",
+    "RANGE","SEQ_"] # variables that prevent caching (names ending with "_" are prefixes)
+
 def open_glm(file:str,
         tmp:str=None,
         init:bool=False,
         exception=True,
         passthru=True,
+        cache:bool=None,
         ) -> TypeVar('io.TextIOWrapper'):
     """Open GLM file as JSON
 
@@ -319,14 +329,50 @@ def open_glm(file:str,
 
     * `passthru`: enable passing stderr output through to app
 
+    * `cache`: enable the compiled model cache (default is `COMPILECACHE`)
+
     Return:
 
     * File handle to JSON file after conversion from GLM
+
+    Description:
+
+    Compiled models are kept in the `compile` cache (see `gridlabd.cache`)
+    using a digest of the GLM file, the files it includes, the files and
+    environment variables it refers to, and the gridlabd version.  Models
+    that use macros that run commands or read external data when loaded
+    (see `DYNAMICMACROS`), that include the output of commands or URLs, e.g.,
+    `#include (command)` or `#include [url]`, or that use macro functions or
+    variables that change when expanded, e.g., `${SHELL command}` or `${RANDOM}`
+    (see `DYNAMICVARIABLES`), are not cached.
     """
     if tmp is None:
         tmp = "."
     outfile = os.path.join(tmp,os.path.splitext(os.path.basename(file))[0]+".json")
-    result = gridlabd("-I" if init else "-C",file,"-o",outfile)
+    digest = glm_digest(file,init,outfile) if ( COMPILECACHE if cache is None else cache ) else None
+    if digest:
+        import gridlabd.cache as gldcache
+        compiled = []
+        def convert():
+            result = gridlabd("-I" if init else "-C",file,"-o",outfile)
+            compiled.append(result)
+            if result.returncode != 0:
+                raise ApplicationError("GLM conversion to JSON failed")
+            with open(outfile,"rb") as fh:
+                return fh.read()
+        try:
+            data = gldcache.Cache("compile").get(f"{digest}.json",convert,format="bytes")
+            if compiled:
+                result = compiled[0]
+            else:
+                debug(f"Using compiled model {digest} for {file}")
+                with open(outfile,"wb") as fh:
+                    fh.write(data)
+                result = subprocess.CompletedProcess(["gridlabd","-I" if init else "-C",file,"-o",outfile],0,b"",b"")
+        except ApplicationError:
+            result = compiled[0]
+    else:
+        result = gridlabd("-I" if init else "-C",file,"-o",outfile)
     if passthru:
         for msg in result.stderr.decode("utf-8").split("\n"):
             if WARNING and msg.startswith("WARNING "):
@@ -341,6 +387,81 @@ def open_glm(file:str,
         return None,result
     return open(outfile,"r"),result
 
+def glm_digest(file:str,init:bool=False,outfile:str=None) -> str|None:
+    """Get the digest of a GLM file and its dependencies
+
+    Arguments:
+
+    * `file`: GLM filename
+
+    * `init`: model initialization is enabled
+
+    * `outfile`: JSON output filename
+
+    Returns:
+
+    * `str`: digest of the model, or `None` if the model cannot be cached
+    """
+    digest = hashlib.md5(f"{os.path.abspath(file)}|{init}|{outfile and os.path.abspath(outfile)}".encode())
+    for binary in [shutil.which("gridlabd"),os.path.join(os.environ.get("GLD_BIN",""),"gridlabd.bin")]:
+        if binary and os.path.exists(binary):
+            info = os.stat(binary)
+            digest.update(f"{binary}|{info.st_size}|{info.st_mtime}".encode())
+    found = []
+    pending = [os.path.abspath(file)]
+    while pending:
+        pathname = pending.pop()
+        if pathname in found:
+            continue
+        found.append(pathname)
+        try:
+            with open(pathname,"rb") as fh:
+                data = fh.read()
+        except OSError:
+            return None
+        digest.update(pathname.encode())
+        digest.update(data)
+        text = data.decode("utf-8",errors="replace")
+        folder = os.path.dirname(pathname)
+        for line in text.split("\n"):
+            line = line.strip()
+            if not line.startswith("#"):
+                continue
+            if any(line.startswith(x) for x in DYNAMICMACROS):
+                return None
+            include = re.match(r'#include\s+(using\([^)]*\)\s*)?"([^"]+)"',line)
+            insert = re.match(r'#insert\s+([^\s(]+)',line)
+            if ( line.startswith("#include") and not include ) or ( line.startswith("#insert") and not insert ):
+                return None # e.g., #include (command) or #include [url]
+            if include or insert:
+                name = include.group(2) if include else insert.group(1)+".glm"
+                pathname = _find_glm(name,folder)
+                if not pathname:
+                    return None
+                pending.append(pathname)
+        for name,call in re.findall(r'\$\{([A-Za-z_][A-Za-z0-9_]*)(\s?)',text):
+            if call or any(name == x or ( x.endswith("_") and name.startswith(x) ) for x in DYNAMICVARIABLES):
+                return None # e.g., ${SHELL command}, ${RANDOM}, or ${SEQ_name...}
+        for name in sorted(set(re.findall(r'\$\{?([A-Za-z_][A-Za-z0-9_]*)',text))):
+            digest.update(f"{name}={os.environ.get(name)}".encode())
+        for name in sorted(set(re.findall(r'"([^"\n]+)"',text))):
+            pathname = os.path.join(folder,name)
+            if os.path.isfile(pathname) and not pathname in found:
+                info = os.stat(pathname)
+                digest.update(f"{pathname}|{info.st_size}|{info.st_mtime}".encode())
+    return digest.hexdigest()
+
+def _find_glm(name,folder):
+    if os.path.isabs(name):
+        return name if os.path.exists(name) else None
+    paths = [folder,os.getcwd()] + os.environ.get("GLPATH","").split(":")
+    if "GLD_ETC" in os.environ:
+        paths.append(os.environ["GLD_ETC"])
+    for path in paths:
+        if path and os.path.exists(os.path.join(path,name)):
+            return os.path.abspath(os.path.join(path,name))
+    return None
+
 def version(terms:str=None) -> str:
     """Get gridlabd version
 
@@ -36,10 +36,23 @@ Examples
 6. Set a property
 
     sim.set_property(objname,propname,value)
+
+7. Read many object properties as a numpy array of doubles in one request
+
+    values = sim.get_properties(objnames,[propname1,propname2],astype=GldDouble)
+
+8. Set many object properties in one request
+
+    sim.set_properties({objname1:{propname:value1},objname2:{propname:value2}})
+
+9. Get the request count and latency counters
+
+    print(sim.get_stats())
 """
 
 import sys, os
 import requests
+import numpy as np
 import subprocess
 import json
 import time
@@ -188,6 +201,8 @@ class GridlabdServer:
     TIMEOUT = 5.0 # default timeout to use when starting/stopping
     RETRYTIME = 0.1 # initial retry time to use when starting/stopping
     LOGFILE = None # file in which to store simulation output (or None, or subprocess.PIPE)
+    POOLSIZE = 10 # number of persistent connections to keep in the session pool
+    MAXURI = 1000 # maximum length of bulk request URIs accepted by the server
 
     def __init__(self,*args,detached=True):
         """Start a server
@@ -206,6 +221,12 @@ class GridlabdServer:
         self.status = None
         self.args = args
         self.port = None
+        self.proc = None
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=1,pool_maxsize=self.POOLSIZE)
+        self.session.mount("http://",adapter)
+        self.session.mount("https://",adapter)
+        self.reset_stats()
         if len(args) > 0:
             self.start(*args,detached=detached)
 
@@ -319,18 +340,56 @@ class GridlabdServer:
         if self.port is None:
             return None
         url = f"{self.PROTOCOL}://{self.HOST}:{self.port}/{'/'.join(args)}"
+        self.counters["requests"] += 1
+        start = time.time()
         try:
-            result = requests.get(url)
+            result = self.session.get(url)
+            self.counters["latency"] += time.time() - start
             self.status = result.status_code
             verbose(f"query '{url}' --> '{result.text}' (code {result.status_code})")
-            return astype(result.text) if result.status_code == 200 else None
+            if result.status_code != 200:
+                self.counters["failures"] += 1
+                return None
+            return astype(result.text)
         except Exception as err:
+            self.counters["latency"] += time.time() - start
+            self.counters["failures"] += 1
             self.status = sys.exc_info()
             verbose(f"query '{url}' --> {self.status[0].__name__}")
             if onfail:
                 onfail(err)
             return None
 
+    def reset_stats(self):
+        """Reset the request counters"""
+        self.counters = {"requests":0,"failures":0,"latency":0.0}
+
+    def get_stats(self):
+        """Get the request counters
+
+        Returns:
+
+            dict    Number of requests, number of failed requests, total
+                    latency, and mean latency per request in seconds
+        """
+        result = dict(self.counters)
+        result["mean_latency"] = result["latency"]/result["requests"] if result["requests"] > 0 else float('nan')
+        return result
+
+    def batches(self,items,action):
+        """Split bulk request items into batches the server accepts"""
+        batch = []
+        size = len(action) + 2
+        for item in items:
+            if batch and size + len(item) + 1 > self.MAXURI:
+                yield ";".join(batch)
+                batch = []
+                size = len(action) + 2
+            batch.append(item)
+            size += len(item) + 1
+        if batch:
+            yield ";".join(batch)
+
     def get_global(self,name,astype=str):
         """Get a global variable from the simulation"""
         return self.query("raw",name,astype=astype)
@@ -347,6 +406,59 @@ class GridlabdServer:
         """Set an object property"""
         self.query("modify",f"{obj}.{name}={value}")
 
+    def get_properties(self,objects,names,astype=str):
+        """Get many object properties using bulk read requests
+
+        Arguments:
+
+            objects (list)  Object names
+
+            names (list)    Property names
+
+            astype (class)  Property type, e.g., GldDouble, GldComplex, or
+                            GldTimestamp (default str)
+
+        Returns:
+
+            numpy.array     Property values by object (rows) and property
+                            (columns). The dtype is float for GldDouble and
+                            complex for GldComplex. Values that cannot be read
+                            are nan or None.
+        """
+        if type(objects) is str:
+            objects = [objects]
+        if type(names) is str:
+            names = [names]
+        dtype = {GldDouble:float,GldComplex:complex}.get(astype,object)
+        result = np.full((len(objects),len(names)),None if dtype is object else np.nan,dtype=dtype)
+        index = {(obj,name):(n,m) for n,obj in enumerate(objects) for m,name in enumerate(names)}
+        values = {}
+        for batch in self.batches([f"{obj}.{name}" for obj,name in index],"read"):
+            reply = self.query("read",batch,astype=json.loads)
+            for item in reply if reply else []:
+                value = item["value"]
+                if not value in values:
+                    try:
+                        values[value] = astype(value)
+                    except Exception as err:
+                        warning(f"{item['object']}.{item['property']}='{value}' is not valid for {astype.__name__} ({err})")
+                        values[value] = None
+                if not values[value] is None:
+                    result[index[(item["object"],item["property"])]] = values[value]
+        return result
+
+    def set_properties(self,mapping):
+        """Set many object properties using bulk modify requests
+
+        Arguments:
+
+            mapping (dict)  Property values by object name and property name,
+                            i.e., {objname:{propname:value,...},...}
+        """
+        items = [f"{obj}.{name}={value}" for obj,values in mapping.items() for name,value in values.items()]
+        for batch in self.batches(items,"modify"):
+            self.query("modify",batch)
+
     def get_objects(self,collection):
         """Get a list of objects from a collection"""
         result = self.query("find",collection)
@@ -413,7 +525,28 @@ clock {{
                     time.sleep(2)
                     self.assertEqual(sim.get_property("load_1","constant_power_A",astype=GldComplex),GldComplex(50000,25000))
                     self.assertEqual(round(sim.get_property("load_1","voltage_A",astype=GldComplex).real,1),2384.5)
-                    
+
+            def test_bulk(self):
+                """Verify that properties can be read and written in bulk"""
+                fh.seek(0)
+                with GridlabdServer(fh.name) as sim:
+                    loads = sim.get_objects("class=load")
+                    sim.reset_stats()
+                    values = sim.get_properties(loads,["voltage_A","voltage_B"],astype=GldComplex)
+                    self.assertEqual(values.shape,(85,2))
+                    self.assertLess(sim.get_stats()["requests"],85)
+                    sim.set_properties({"load_1":{"constant_power_A":GldComplex(40000,20000)}})
+                    time.sleep(2)
+                    self.assertEqual(sim.get_properties("load_1","constant_power_A",astype=GldComplex)[0,0],40000+20000j)
+
+            def test_batches(self):
+                """Verify that bulk requests are split into batches"""
+                sim = GridlabdServer()
+                items = [f"object_{n}.property" for n in range(1000)]
+                batches = list(sim.batches(items,"read"))
+                self.assertEqual(";".join(batches).split(";"),items)
+                self.assertTrue(all([len(x)+6 <= sim.MAXURI for x in batches]))
+
         unittest.main()
     if TMPFILE and os.path.exists(TMPFILE):
         warning(f"temporary file {TMPFILE} was not deleted after test completed")
@@ -27,6 +27,9 @@ Options
 
     -m|--modify	        output GLM modify statements instead of full modify
 
+    -u|--update         output only the GLM modify statements that change
+                        the groupid found in the input model
+
     -o|--output=OUTPUT  output file name (JSON or GLM, default is stdout)
 
     -p|--prefix=PREFIX  set the groupid prefix (default "island_")
@@ -58,6 +61,13 @@ group that has a swing bus.
 The `-f|--force` option is used to overwrite any existing `groupid` values
 found in the model.
 
+The `-u|--update` option is used to regroup a model that was already
+grouped, e.g., after switching events.  Only the objects whose `groupid`
+changes are output as GLM modify statements, and the python variables are
+not output. Each island keeps the `groupid` that most of its objects had in
+the input model, and only new islands are given new `groupid` values. It
+implies `--modify` and `--force`.
+
 Example:
 
 The following example generates a GLM modify file for the IEEE 123 model based
@@ -73,11 +83,13 @@ gridlabd group -i=123.json --modify -o=groups.glm --force
 import sys, os
 import json
 import datetime
+from collections import deque
 
 class GroupException(Exception):
 	pass
 
 MODIFY = False
+UPDATE = False
 FORCE = False
 DEBUG = False
 WARNING = False
@@ -85,7 +97,7 @@ QUIET = False
 GROUPER = 'island'
 PREFIX = 'island_'
 CONTROL = 'control'
-CUTOBJECTS = 'switch'
+CUTOBJECTS = {'switch'}
 INPUT = "/dev/stdin"
 OUTPUT = None
 COPYFROM = 'pole_mount.equipment'
@@ -127,6 +139,8 @@ def debug(msg):
 	if DEBUG:
 		print(f"DEBUG [group]: {msg}",file=sys.stderr)
 
+PREVIOUS = {} # groupid values found in the input model
+
 def grouper_island(input=None):
 	"""Group object by connectivity in powerflow solution
 
@@ -144,16 +158,17 @@ def grouper_island(input=None):
 	#
 	with open(input,"r") as fh:
 		model = json.load(fh)
+	PREVIOUS.clear()
 
 	#
 	# Check groupid
 	#
-	if not FORCE:
+	if not FORCE and not UPDATE:
 		for obj,data in model['objects'].items():
 			if 'groupid' in data and data['groupid']:
 				error(f"{obj}.groupid='{data['groupid']}' (use --force to overwrite)",E_FAILED)
 
-	# 
+	#
 	# Find swing buses and build network graph
 	#
 	swing_buses = []
@@ -161,6 +176,7 @@ def grouper_island(input=None):
 	links = {}
 	nodes = {}
 	for obj,data in model['objects'].items():
+		PREVIOUS[obj] = data['groupid'] if 'groupid' in data else None
 		model['objects'][obj]['groupid'] = None
 		if 'bustype' in data and data['bustype'] in ["SWING","SWING_PQ"]:
 				swing_buses.append(obj)
@@ -170,47 +186,45 @@ def grouper_island(input=None):
 			from_node = data['from']
 			to_node = data['to']
 			links[obj] = [from_node,to_node]
-			if not from_node in nodes:
-				nodes[from_node] = [obj]
-			elif obj not in nodes[from_node]:
-				nodes[from_node].append(obj)
-			if not to_node in nodes:
-				nodes[to_node] = [obj]
-			elif obj not in nodes[to_node]:
-				nodes[to_node].append(obj)
+			nodes.setdefault(from_node,{})[obj] = None # dict preserves link order
+			nodes.setdefault(to_node,{})[obj] = None
 
 	#
 	# Process each swing_bus
 	#
 	def group(bus):
 		groupid = model['objects'][bus]['groupid']
-		if not bus in nodes:
-			return
-		for link in nodes[bus]:
-			link_data = model['objects'][link]
-			if not link_data['class'] in CUTOBJECTS:
-				debug(f"tagging link '{link}' from '{bus}' as '{groupid}'")
-				model['objects'][link]['groupid'] = groupid
-				for node in links[link]:
-					if model['objects'][node]['groupid'] is None:
-						debug(f"tagging node '{node}' from '{link}' as '{groupid}'")
-						model['objects'][node]['groupid'] = groupid
-						group(node)
-			else:
-				model['objects'][link]['groupid'] = CONTROL
-				debug(f"tagging control '{link}' from '{bus}' as '{CONTROL}'")
+		queue = deque([bus])
+		while queue:
+			bus = queue.popleft()
+			if not bus in nodes:
+				continue
+			for link in nodes[bus]:
+				link_data = model['objects'][link]
+				if not link_data['class'] in CUTOBJECTS:
+					debug(f"tagging link '{link}' from '{bus}' as '{groupid}'")
+					link_data['groupid'] = groupid
+					for node in links[link]:
+						if model['objects'][node]['groupid'] is None:
+							debug(f"tagging node '{node}' from '{link}' as '{groupid}'")
+							model['objects'][node]['groupid'] = groupid
+							queue.append(node)
+				else:
+					link_data['groupid'] = CONTROL
+					debug(f"tagging control '{link}' from '{bus}' as '{CONTROL}'")
 	for bus in swing_buses:
 		group(bus)
 
 	#
-	# Recursively tag objects
+	# Tag remaining objects
 	#
+	isolated = []
 	for obj,data in model['objects'].items():
 		if 'bustype' in data and data['groupid'] is None:
 			if 'parent' not in data:
 				model['objects'][obj]['groupid'] = f'{PREFIX}{groupid}'
 				group(obj)
-				warning(f"group '{data['groupid']}' does not have a swing bus")
+				isolated.append(data['groupid'])
 				groupid += 1
 				# del model['objects'][obj]['groupid']
 			else:
@@ -230,11 +244,12 @@ def grouper_island(input=None):
 	#
 	# Process linkages and children
 	#
+	copyfrom = [linkage.split('.') for linkage in COPYFROM.split(',')]
+	copyto = [children.split('.') for children in COPYTO.split(',')]
 	for obj,data in model['objects'].items():
 
 		# copy groupid from objects
-		for linkage in COPYFROM.split(','):
-			classname,propname = linkage.split('.')
+		for classname,propname in copyfrom:
 			if data['class'] == classname and propname in data:
 				if data['groupid'] is None:
 					ref_name = data[propname]
@@ -245,8 +260,7 @@ def grouper_island(input=None):
 					warning(f"{classname} link from {ref_name} {ref['groupid']} differs from {obj} {data['groupid']}")
 
 		# copy groupid to objects
-		for children in COPYTO.split(','):
-			classname,propname = children.split('.')
+		for classname,propname in copyto:
 			if data['class'] == classname:
 				ref_name = data[propname]
 				ref = model['objects'][ref_name]
@@ -256,8 +270,60 @@ def grouper_island(input=None):
 				elif data['groupid'] != ref['groupid'] and ref['groupid'] != CONTROL:
 					warning(f"{classname} link to {ref_name} {ref['groupid']} differs from {obj} {data['groupid']}")
 
+	renumber = renumber_islands(model) if UPDATE else {}
+	for groupid in isolated:
+		warning(f"group '{renumber.get(groupid,groupid)}' does not have a swing bus")
+
 	return model
 
+def renumber_islands(model):
+	"""Keep the previous groupid of islands found in the input model
+
+	Each island is given the previous groupid that most of its members had.
+	Islands that no previous groupid is left for are given new groupids.
+
+	Parameters:
+	  model (dict) - processed gridlabd model
+
+	Returns:
+	  dict - new groupid of each island
+	"""
+	# count previous groupid of island members
+	votes = {}
+	for obj,data in model['objects'].items():
+		groupid = data['groupid'] if 'groupid' in data else None
+		if groupid and groupid.startswith(PREFIX):
+			votes.setdefault(groupid,{})
+			previous = PREVIOUS[obj]
+			if previous and previous.startswith(PREFIX):
+				votes[groupid][previous] = votes[groupid].get(previous,0) + 1
+
+	# assign previous groupid by decreasing number of members
+	renumber = {}
+	used = set()
+	matches = [(count,groupid,previous) for groupid,counts in votes.items() for previous,count in counts.items()]
+	for count,groupid,previous in sorted(matches,key=lambda x:-x[0]):
+		if not groupid in renumber and not previous in used:
+			renumber[groupid] = previous
+			used.add(previous)
+
+	# assign new groupid to new islands
+	numbers = [int(x[len(PREFIX):]) for x in PREVIOUS.values() if x and x.startswith(PREFIX) and x[len(PREFIX):].isdigit()]
+	number = max(numbers) + 1 if numbers else 1
+	for groupid in votes:
+		if not groupid in renumber:
+			while f"{PREFIX}{number}" in used:
+				number += 1
+			renumber[groupid] = f"{PREFIX}{number}"
+			used.add(renumber[groupid])
+			number += 1
+
+	for obj,data in model['objects'].items():
+		if 'groupid' in data and data['groupid'] in renumber:
+			data['groupid'] = renumber[data['groupid']]
+
+	return renumber
+
 #
 # Process argument list
 #
@@ -286,7 +352,7 @@ for arg in sys.argv[1:]:
 	# -c|--cut=CUTOBJECTS
 	#
 	elif token in ['-c','--cut']:
-		CUTOBJECTS = value.split(',') if ',' in value else [value]
+		CUTOBJECTS = set(value.split(','))
     
     #
     # --control=NAME      set control groupid (default "control_")
@@ -333,6 +399,13 @@ for arg in sys.argv[1:]:
 	#
 	elif token in ['-m','--modify']:
 		MODIFY = True
+
+	#
+	# -u|--update			output only GLM modify statements that change groupid
+	#
+	elif token in ['-u','--update']:
+		MODIFY = True
+		UPDATE = True
 	
 	#
 	# -o|--output=OUTPUT  output file name (JSON or GLM)
@@ -403,9 +476,9 @@ if __name__ == "__main__":
 				groups = {}
 				controls = {}
 				swingbus = {}
-				isolated = []
+				isolated = {} # dict preserves insertion order
 				for obj,data in model['objects'].items():
-					groupid = data['groupid']
+					groupid = data['groupid'] if 'groupid' in data else None
 					if groupid:
 						if groupid.startswith(PREFIX):
 							if not data['groupid'] in groups:
@@ -413,27 +486,31 @@ if __name__ == "__main__":
 							else:
 								groups[groupid].append(obj)
 							if not groupid in isolated and not groupid in swingbus:
-								isolated.append(groupid)
+								isolated[groupid] = None
 							if 'bustype' in data and data['bustype'] in ['SWING','SWING_PG']:
 								if not obj in swingbus:
 									swingbus[groupid] = [obj]
 								else:
 									swingbus[groupid].append(obj)
 								if groupid in isolated:
-									isolated.remove(groupid)
+									del isolated[groupid]
 						elif groupid == CONTROL and 'from' in data and 'to' in data:
 							controls[obj] = [model['objects'][data[x]]['groupid'] for x in ['from','to']]
-				print(f"""#begin python
+				if not UPDATE:
+					print(f"""#begin python
 groups = {groups}
 controls = {controls}
 swingbus = {swingbus}
-isolated = {isolated}
+isolated = {list(isolated)}
 #end
 """,file=fh)
 				# output modify directives
 				for obj,data in model['objects'].items():
-					groupid = data['groupid']
-					if groupid:
+					groupid = data['groupid'] if 'groupid' in data else None
+					if UPDATE:
+						if ( groupid or "" ) != ( PREVIOUS[obj] or "" ):
+							print(f"modify {obj}.groupid '{groupid or ''}';",file=fh)
+					elif groupid:
 						print(f"modify {obj}.groupid '{groupid}';",file=fh)
 			else:
 				json.dump(model,fh,indent=4)
@@ -0,0 +1,324 @@
+"""Infrastructure dataset store
+
+The `infrastructure` module stores preprocessed infrastructure datasets, e.g.,
+substations and powerlines, so that tools read only the data they need
+instead of parsing the national dataset every time.
+
+A dataset is stored once in a columnar layout, partitioned by the values of
+the partition columns, e.g., country and state.  Each column of a partition
+is saved in a separate numpy file.  For each partition the store keeps the
+range of values of the numeric columns, e.g., latitude and longitude, and an
+index of the rows having each value of the index columns, e.g., county.
+
+Filters are applied in the following order, each using only the columns it
+needs: partition values, numeric ranges of the partition, indexed values,
+and then the remaining value and range filters.  The other columns are read
+only for the rows found.
+
+Example:
+
+The following python code stores a dataset and reads the rows in a county.
+
+~~~
+import gridlabd.infrastructure as infra
+store = infra.InfrastructureStore("substations",partition=["country","state"],index=["county"])
+if not store.is_current(source):
+    store.build(data,source)
+data = store.read(where={"state":["WA"],"county":["Snohomish"]})
+~~~
+"""
+
+import os
+import sys
+import json
+import shutil
+import numpy as np
+import pandas as pd
+
+STOREDIR = os.path.join(os.environ["GLD_ETC"] if "GLD_ETC" in os.environ
+    else "/usr/local/share/gridlabd",".cache","infrastructure_store")
+
+class InfrastructureError(Exception):
+    """Infrastructure store exception"""
+
+class InfrastructureStore:
+    """Infrastructure dataset store"""
+    def __init__(self,
+            name:str,
+            partition:list[str]=[],
+            index:list[str]=[],
+            storedir:str=None,
+            ):
+        """Access an infrastructure dataset store
+
+        Arguments:
+
+        * `name`: dataset name
+
+        * `partition`: columns used to partition the dataset
+
+        * `index`: columns for which row indexes are kept
+
+        * `storedir`: store folder (default is `STOREDIR`)
+        """
+        self.name = name
+        self.partition = list(partition)
+        self.index = list(index)
+        self.path = os.path.join(storedir if storedir else STOREDIR,name)
+        self._catalog = None
+
+    def catalog(self) -> dict:
+        """Get the dataset catalog, or `None` if the dataset is not stored"""
+        if self._catalog is None:
+            try:
+                with open(os.path.join(self.path,"catalog.json"),"r") as fh:
+                    self._catalog = json.load(fh)
+            except FileNotFoundError:
+                return None
+        return self._catalog
+
+    def is_current(self,source:str) -> bool:
+        """Check whether the dataset is stored from the current source file
+
+        Arguments:
+
+        * `source`: source file name
+        """
+        catalog = self.catalog()
+        return not catalog is None and catalog["source"] == _signature(source) \
+            and catalog["partition"] == self.partition and catalog["index"] == self.index
+
+    def build(self,data:pd.DataFrame,source:str=None):
+        """Store a dataset
+
+        Arguments:
+
+        * `data`: dataset with rows indexed by name
+
+        * `source`: source file name (used to check whether the store is current)
+        """
+        tmpdir = f"{self.path}.{os.getpid()}"
+        shutil.rmtree(tmpdir,ignore_errors=True)
+        os.makedirs(tmpdir)
+        try:
+            data = data.assign(_row=np.arange(len(data)))
+            partitions = []
+            groups = data.groupby(self.partition,sort=True,dropna=False) if self.partition else [((),data)]
+            for n,(values,part) in enumerate(groups):
+                path = f"p{n}"
+                partitions.append(dict(
+                    path = path,
+                    values = dict(zip(self.partition,[_native(x) for x in _aslist(values)])),
+                    rows = len(part),
+                    ranges = _write_partition(os.path.join(tmpdir,path),part,self.index),
+                    ))
+            with open(os.path.join(tmpdir,"catalog.json"),"w") as fh:
+                json.dump(dict(
+                    source = _signature(source) if source else None,
+                    partition = self.partition,
+                    index = self.index,
+                    columns = [str(x) for x in data.columns if x != "_row"],
+                    name = data.index.name,
+                    partitions = partitions,
+                    ),fh,default=_native)
+            shutil.rmtree(self.path,ignore_errors=True)
+            os.rename(tmpdir,self.path)
+        finally:
+            shutil.rmtree(tmpdir,ignore_errors=True)
+        self._catalog = None
+
+    def read(self,
+            where:dict={},
+            ranges:dict={},
+            match:str="all",
+            columns:list[str]=None,
+            ) -> pd.DataFrame:
+        """Read rows from the dataset
+
+        Arguments:
+
+        * `where`: values allowed for columns, e.g., `{"state":["CA","WA"]}`
+
+        * `ranges`: `(min,max)` allowed for columns (`None` for no limit).
+          Missing values are not excluded by ranges.
+
+        * `match`: rows must match `all` or `any` of the `where` filters
+
+        * `columns`: columns to read (default is all columns)
+
+        Returns:
+
+        * `pandas.DataFrame`: rows found in the order of the original dataset
+        """
+        catalog = self.catalog()
+        if catalog is None:
+            raise InfrastructureError(f"dataset '{self.name}' is not stored")
+        if match not in ["all","any"]:
+            raise InfrastructureError(f"match '{match}' is invalid")
+        where = {x:set(_aslist(y)) for x,y in where.items()}
+        columns = catalog["columns"] if columns is None else columns
+        result = []
+        for partition in catalog["partitions"]:
+            if not _in_ranges(partition["ranges"],ranges):
+                continue
+            path = os.path.join(self.path,partition["path"])
+            if match == "all" and any(x in where and not y in where[x] for x,y in partition["values"].items()):
+                continue
+            selected = None
+            for column,values in where.items():
+                if column in partition["values"]:
+                    found = None if partition["values"][column] in values else np.zeros(0,dtype=int)
+                elif column in catalog["index"]:
+                    found = _index_rows(path,column,values)
+                else:
+                    found = np.flatnonzero(pd.Series(_load(path,catalog["columns"].index(column),None)).isin(values).values)
+                if match == "all":
+                    selected = found if selected is None else ( selected if found is None else np.intersect1d(selected,found) )
+                elif found is None:
+                    selected = None
+                    break
+                else:
+                    selected = found if selected is None else np.union1d(selected,found)
+            for column,(lower,upper) in ranges.items():
+                values = _load(path,catalog["columns"].index(column),selected)
+                keep = np.ones(len(values),dtype=bool)
+                if not lower is None:
+                    keep &= ~(values < lower)
+                if not upper is None:
+                    keep &= ~(values > upper)
+                selected = np.flatnonzero(keep) if selected is None else selected[keep]
+            if not selected is None and len(selected) == 0:
+                continue
+            data = pd.DataFrame({x:_load(path,catalog["columns"].index(x),selected) for x in columns},
+                index=pd.Index(_load(path,"name",selected),name=catalog["name"]))
+            data["_row"] = _load(path,"row",selected)
+            result.append(data)
+        if not result:
+            return pd.DataFrame({x:[] for x in columns},index=pd.Index([],name=catalog["name"]))
+        return pd.concat(result).sort_values("_row").drop("_row",axis=1)
+
+def _aslist(x):
+    return list(x) if type(x) in [list,tuple,set,dict] else [x]
+
+def _native(value):
+    if isinstance(value,float) and np.isnan(value):
+        return None
+    return value.item() if hasattr(value,"item") else value
+
+def _signature(source):
+    info = os.stat(source)
+    return f"{os.path.abspath(source)}|{info.st_size}|{info.st_mtime}"
+
+def _write_partition(path,data,index):
+    os.makedirs(path)
+    ranges = {}
+    for n,column in enumerate(data.columns):
+        values = data[column].to_numpy()
+        if column == "_row":
+            np.save(os.path.join(path,"row.npy"),values)
+            continue
+        _save(os.path.join(path,f"{n}"),values)
+        if values.dtype.kind in "iuf" and len(values):
+            ranges[column] = [_native(np.nanmin(values)) if not np.isnan(values).all() else None,
+                _native(np.nanmax(values)) if not np.isnan(values).all() else None,
+                bool(np.isnan(values).any()) if values.dtype.kind == "f" else False]
+        if column in index:
+            keys = np.array([str(x) for x in values],dtype=str)
+            order = np.argsort(keys,kind="stable")
+            unique,first = np.unique(keys[order],return_index=True)
+            np.save(os.path.join(path,f"{column}.keys.npy"),unique)
+            np.save(os.path.join(path,f"{column}.offsets.npy"),np.append(first,len(order)))
+            np.save(os.path.join(path,f"{column}.rows.npy"),order)
+    _save(os.path.join(path,"name"),data.index.to_numpy())
+    return ranges
+
+def _save(file,values):
+    if values.dtype.kind == "O":
+        null = pd.isna(values)
+        kinds = {type(x) for x in values[~null]}
+        if kinds <= {str}:
+            values = np.where(null,"",values).astype(str)
+        elif kinds <= {float,int,np.float64,np.int64}:
+            values = np.where(null,np.nan,values).astype(float)
+        else:
+            np.save(file+".npy",values,allow_pickle=True)
+            return
+        np.save(file+".null.npy",null)
+    np.save(file+".npy",values)
+
+def _load(path,column,rows):
+    file = os.path.join(path,f"{column}")
+    if not os.path.exists(file+".null.npy"):
+        try:
+            values = np.load(file+".npy",mmap_mode="r")
+        except ValueError:
+            values = np.load(file+".npy",allow_pickle=True)
+        return np.array(values if rows is None else values[rows])
+    values = np.load(file+".npy",mmap_mode="r")
+    null = np.load(file+".null.npy",mmap_mode="r")
+    values = np.array(values if rows is None else values[rows]).astype(object)
+    values[np.array(null if rows is None else null[rows])] = None
+    return values
+
+def _index_rows(path,column,values):
+    keys = np.load(os.path.join(path,f"{column}.keys.npy"),mmap_mode="r")
+    offsets = np.load(os.path.join(path,f"{column}.offsets.npy"),mmap_mode="r")
+    rows = np.load(os.path.join(path,f"{column}.rows.npy"),mmap_mode="r")
+    values = np.array(sorted({str(x) for x in values}),dtype=str)
+    if len(values) == 0 or len(keys) == 0:
+        return np.zeros(0,dtype=int)
+    found = np.searchsorted(keys,values)
+    values = values[found < len(keys)]
+    found = found[found < len(keys)]
+    found = found[keys[found] == values]
+    found = [rows[offsets[n]:offsets[n+1]] for n in found]
+    return np.unique(np.concatenate(found)) if found else np.zeros(0,dtype=int)
+
+def _in_ranges(known,ranges):
+    for column,(lower,upper) in ranges.items():
+        if not column in known:
+            continue
+        low,high,missing = known[column]
+        if missing:
+            continue
+        if low is None or ( not lower is None and high < lower ) or ( not upper is None and low > upper ):
+            return False
+    return True
+
+def test() -> (int,int):
+
+    n_tested = 0
+    n_failed = 0
+    import tempfile
+    with tempfile.TemporaryDirectory() as tmpdir:
+
+        data = pd.DataFrame(dict(
+                state = ["WA","CA","WA","CA"],
+                county = ["King","Alameda","Pierce","Marin"],
+                latitude = [47.5,37.8,float('nan'),38.0],
+                sub = ["A",None,"C","D"],
+                ),
+            index = pd.Index(["S1","S2","S3","S4"],name="name"))
+        store = InfrastructureStore("test",partition=["state"],index=["county","sub"],storedir=tmpdir)
+        store.build(data)
+
+        try:
+            assert store.read().equals(data), "stored data does not match"
+            assert list(store.read(where={"state":"WA"}).index) == ["S1","S3"], "partition filter failed"
+            assert list(store.read(where={"county":["Marin","King"]}).index) == ["S1","S4"], "index filter failed"
+            assert list(store.read(ranges={"latitude":(37,37.9)}).index) == ["S2","S3"], "range filter failed"
+            assert list(store.read(where={"state":"CA","sub":"C"},match="any").index) == ["S2","S3","S4"], "any filter failed"
+            assert store.read(where={"state":"NY"}).empty, "missing partition filter failed"
+        except AssertionError as err:
+            print(f"ERROR: {err}",file=sys.stderr)
+            n_failed += 1
+        n_tested += 1
+
+    return n_failed,n_tested
+
+if __name__ == "__main__":
+
+    if not sys.argv[0]:
+
+        n,m = test()
+        print(f"{os.path.basename(__file__)}: {m} tests, {n} failed")
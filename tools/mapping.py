@@ -33,6 +33,16 @@ Two network modules are currently supported, `powerflow` and `pypower`.
 Symbols for various object types and hover popups can be configured in the
 mapping configuration file.
 
+Links are drawn using one trace for each line color and width, and link
+devices using one trace for each marker symbol.  When the model has more than
+`LOD_LINKS` links, the map is drawn at a level of detail suited to the zoom,
+i.e., only one node is drawn in each `LOD_PIXELS` pixel grid cell, and links
+within a grid cell or between grid cells already connected are not drawn.
+The level of detail grid size may be specified using the `lod:PIXELS` option
+of `--save` or `--show`, with `lod:0` drawing all nodes and links.  The number
+of nodes, links, and traces drawn, and the render time are output when the
+`--verbose` option is used.
+
 Examples:
 
 To generate a map image use the `--save` option, e.g.,
@@ -59,6 +69,7 @@ import sys
 import io
 import json
 import math
+import time
 import pandas as pd
 import plotly.express as px
 import gridlabd.unitcalc as unitcalc
@@ -68,6 +79,8 @@ import traceback
 import gridlabd.framework as app
 
 DEFAULT_MAPPER = "map" # "map" or "mapbox"
+LOD_LINKS = 5000 # number of links above which level of detail is used
+LOD_PIXELS = 4 # level of detail grid size in pixels
 
 #
 # Load custom mapping configuration (if any)
@@ -226,7 +239,7 @@ def get_options(value:str,default:dict=None) -> dict:
         try:
             if x == "center" and ";" in y:
                 options[x] = {["lat","lon"][n]:float(z) for n,z in enumerate(y.split(";"))}
-            elif x in ["zoom","width","height"]:
+            elif x in ["zoom","width","height","lod"]:
                 options[x] = int(y)
             else:
                 options[x] = y
@@ -411,11 +424,15 @@ class Map:
         # return swing node list
         return self.swing
 
-    def render(self,**options) -> TypeVar('plotly.graph_objects.Figure'):
+    def render(self,lod:int|bool=None,**options) -> TypeVar('plotly.graph_objects.Figure'):
         """Render the map
 
         Arguments:
 
+        * `lod`: level of detail grid size in pixels, `True` to use
+          `LOD_PIXELS`, `False` or `0` to draw all nodes and links (default
+          enables `LOD_PIXELS` when the model has more than `LOD_LINKS` links)
+
         * `options`: plotly scattermap options
 
         Returns:
@@ -440,9 +457,25 @@ class Map:
                 lon = (self.data[lon].min()+self.data[lon].max())/2
                 self.options["center"] = {"lat" : lat,"lon" : lon,}
 
-        self.map = getattr(px,f"scatter_{config.mapper}")(self.data.dropna(),
-            **self.options)
+        # level of detail grid cell size (deg) at the map zoom
+        if lod is None:
+            lod = LOD_PIXELS if len(self.links) > LOD_LINKS else 0
+        elif lod is True:
+            lod = LOD_PIXELS
+        cell = lod*360/(512*2**float(self.options["zoom"])) if lod else None
+
+        tic = time.time()
         lat,lon = [self.defaults[x] for x in ["lat","lon"]]
+        nodes = self.data.dropna()
+        if cell:
+            nodes = nodes[~pd.DataFrame({"lat":(nodes[lat]//cell),"lon":(nodes[lon]//cell)}).duplicated().values]
+        self.map = getattr(px,f"scatter_{config.mapper}")(nodes,
+            **self.options)
+
+        # collect links by line style and markers by symbol
+        lines = {}
+        markers = {}
+        drawn = set()
         for key,value in self.links.items():
             n0,n1 = [self.model["objects"][x] for x in value["nodes"]]
             if lat in n0 and lon in n0 and lat in n1 and lon in n1:
@@ -452,19 +485,14 @@ class Map:
                 color = "#"+"".join([f"{int(255*x):02x}" for x in self.violation_color[data["violation_detected"]]])
                 x0,y0,x2,y2 = float(n0[lat]),float(n0[lon]),float(n1[lat]),float(n1[lon])
                 x1,y1 = (x0+x2)/2,(y0+y2)/2
-                self.map.add_scattermap(
-                    lat=[x0,x2],
-                    lon=[y0,y2],
-                    line={
-                        "color": color,
-                        "width": width,
-                        },
-                    mode="lines",
-                    hoverinfo="skip",
-                    showlegend=False,
-                    )
-                if hasattr(config,"node_options"):
-                    self.map.update_traces(**config.node_options,selector={"type":f"scatter{config.mapper}"})
+                if cell:
+                    c0,c1 = (x0//cell,y0//cell),(x2//cell,y2//cell)
+                    if c0 == c1 or (c0,c1) in drawn or (c1,c0) in drawn:
+                        continue # link is too short or already drawn at this zoom
+                    drawn.add((c0,c1))
+                line = lines.setdefault((color,width),{"lat":[],"lon":[]})
+                line["lat"].extend([x0,x2,None])
+                line["lon"].extend([y0,y2,None])
                 power_out = app.complex_unit(data["power_out"],'real')
                 symbols = {
                     "switch" : "square-stroked" if power_out<0.1 else "square",
@@ -473,6 +501,7 @@ class Map:
                     }
                 devtype = data["class"]
                 flow = data["flow_direction"]
+                direction = 1
                 if devtype in symbols:
                     symbol = symbols[devtype]
                 else:
@@ -483,21 +512,48 @@ class Map:
                         direction = -1
                     else:
                         symbol = "diamond"
-
-                self.map.add_scattermap(
-                    lat=[x1],
-                    lon=[y1],
-                    marker={
-                        "symbol" : symbol,
-                        "size": width+5,
-                        "allowoverlap": True,
-                        "color": color,
-                        "angle": math.atan2(direction*(y2-y0),direction*(x2-x0))*180/3.1416,
+                marker = markers.setdefault(symbol,{"lat":[],"lon":[],"size":[],"color":[],"angle":[],"text":[]})
+                marker["lat"].append(x1)
+                marker["lon"].append(y1)
+                marker["size"].append(width+5)
+                marker["color"].append(color)
+                marker["angle"].append(math.atan2(direction*(y2-y0),direction*(x2-x0))*180/3.1416)
+                marker["text"].append(f"<b>{key}</b><br><br>" + "<br>".join([f"{x}={y}" for x,y in data.items()]))
+
+        # add one trace per line style and per marker symbol
+        for (color,width),line in lines.items():
+            self.map.add_scattermap(
+                lat=line["lat"],
+                lon=line["lon"],
+                line={
+                    "color": color,
+                    "width": width,
                     },
-                    mode="markers",
-                    showlegend=False,
-                    hovertemplate=f"<extra></extra><b>{key}</b><br><br>" + "<br>".join([f"{x}={y}" for x,y in data.items()]),
-                    )
+                mode="lines",
+                hoverinfo="skip",
+                showlegend=False,
+                )
+        if hasattr(config,"node_options"):
+            self.map.update_traces(**config.node_options,selector={"type":f"scatter{config.mapper}"})
+        for symbol,marker in markers.items():
+            self.map.add_scattermap(
+                lat=marker["lat"],
+                lon=marker["lon"],
+                marker={
+                    "symbol" : symbol,
+                    "size": marker["size"],
+                    "allowoverlap": True,
+                    "color": marker["color"],
+                    "angle": marker["angle"],
+                },
+                mode="markers",
+                showlegend=False,
+                text=marker["text"],
+                hovertemplate="<extra></extra>%{text}",
+                )
+        app.verbose(f"rendered {len(nodes)} of {len(self.data)} nodes and "
+            f"{sum(len(x['lat'])//3 for x in lines.values())} of {len(self.links)} links "
+            f"in {len(self.map.data)} traces ({time.time()-tic:.3f} s)")
         return self.map
 
     def show(self,**options):
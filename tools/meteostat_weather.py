@@ -38,12 +38,15 @@ ID is the station identifier provided by Meteostat.  The default weather object
 also named "meteostat_ID".  If the start date and/or end date are not specified, then
 the default is all available data.
 
+Converted data is kept by year in the `meteostat` source of the weather store
+(see `gridlabd weather_store help`), so only the years needed are read. Files
+found in the weather store mirror folder `meteostat/ID.csv.gz` are used
+instead of downloading them.
 """
 
 import os, sys, math
 import requests
 import json, gzip
-import haversine
 import pandas
 import datetime, time
 from pysolar.solar import get_altitude, radiation
@@ -54,6 +57,7 @@ if not share:
 if share not in sys.path:
     sys.path.append("/usr/local/share/gridlabd")
 import gridlabd.nsrdb_weather as nsrdb_weather
+import gridlabd.weather_store as weather_store
 
 VERBOSE = False
 DEBUG = False
@@ -217,14 +221,11 @@ def find_station(lat,lon):
     finally:
         file_unlock(lockname)
 
-    best_distance = None
-    best_station = None
-    for station in get_stations():
-        location = (station["location"]["latitude"],station["location"]["longitude"])
-        distance = haversine.haversine(location,(lat,lon))
-        if not best_station or distance < best_distance:
-            best_distance = distance
-            best_station = station
+    stations = get_stations()
+    index = weather_store.StationIndex(
+        [x["location"]["latitude"] for x in stations],
+        [x["location"]["longitude"] for x in stations])
+    best_station = stations[index.nearest(lat,lon)[0][0]]
     verbose(f"find_station(lat={lat},lon={lon}) --> {best_station['id']}")
     
     lockname = file_lock(STATIONS_RECENT)
@@ -252,16 +253,31 @@ def change_column(data,from_name,to_name,transformation):
 
 def get_weather(station,start=None,stop=None):
     global CACHE_DIR
-    station_file = f"{CACHE_DIR}/{station}.csv.gz"
     global REFRESH
-    if not os.path.exists(station_file) or REFRESH:
-        url = URL_HOURLY.format(station=station)
-        verbose(f"downloading data from {url}")
-        reply = requests.get(url)
-        if reply.status_code != 200:
-            error(f"{url} error {reply.status_code}",E_INVALID)
-        with open(station_file,"wb") as fh:
-            fh.write(reply.content)
+    store = weather_store.WeatherStore("meteostat")
+    if start:
+        start = datetime.datetime.strptime(start,"%Y-%m-%d")
+    if stop:
+        stop = datetime.datetime.strptime(stop,"%Y-%m-%d")
+    if not REFRESH and store.years(station):
+        years = [x for x in store.years(station)
+            if ( not start or int(x) >= start.year ) and ( not stop or int(x) <= stop.year )]
+        verbose(f"reading data from {store.path(station)} for years {years}")
+        data = store.get(station,years if years else store.years(station)[:1],start,stop)
+        verbose(f"get_weather(station='{station}',start={start},stop={stop}) --> {len(data)} rows")
+        return data
+
+    station_file = store.mirror(f"{station}.csv.gz")
+    if not station_file:
+        station_file = f"{CACHE_DIR}/{station}.csv.gz"
+        if not os.path.exists(station_file) or REFRESH:
+            url = URL_HOURLY.format(station=station)
+            verbose(f"downloading data from {url}")
+            reply = requests.get(url)
+            if reply.status_code != 200:
+                error(f"{url} error {reply.status_code}",E_INVALID)
+            with open(station_file,"wb") as fh:
+                fh.write(reply.content)
     global DATA_COLUMNS
     data = pandas.read_csv(station_file,names=DATA_COLUMNS,index_col=0,parse_dates=[DATA_COLUMNS[0:2]],).sort_index()
 
@@ -275,10 +291,10 @@ def get_weather(station,start=None,stop=None):
     data = change_column(data,"air_pressure[hPa]","pressure[mbar]",lambda x:round(x,1))
     data = change_column(data,"wind_direction[deg]","wind_dir[deg]",lambda x:round(x,1))
 
-    if start:
-        start = datetime.datetime.strptime(start,"%Y-%m-%d")
-    if stop:
-        stop = datetime.datetime.strptime(stop,"%Y-%m-%d")
+    # save converted data by year
+    for year,values in data.groupby(data.index.year):
+        store.put(station,year,values)
+
     if start and stop:
         data = data.loc[start:stop]
     elif start:
@@ -43,6 +43,9 @@ extracted using the `graph` option:
 
 * `Wc`: weighted complex Laplacian matrix
 
+Islands in the network can be found using `Network.islands()` and the
+algebraic connectivity using `Network.connectivity()`.
+
 All sparse matrices are output in `[[i,j],v]` format. The output can be used
 to load sparse matrices using the `scipy.sparse` package.
 
@@ -114,6 +117,21 @@ class Model:
     def properties(self,*args) -> TypeVar('Property'):
         raise RuntimeError("baseclass property not accessible")
 
+    def columns(self,names:list[str],props:list[str]) -> dict:
+        """Get object property values as columns
+
+        Arguments:
+
+        * names (list[str]): object names
+
+        * props (list[str]): property names
+
+        Returns:
+
+        * dict: array of values of each property in the order of `names`
+        """
+        return {prop:np.array([self.property(name,prop).get_value() for name in names]) for prop in props}
+
 def rarray(x:str) -> TypeVar('np.array'):
     # Convert string to float array
     return np.array(x,dtype=np.float64)
@@ -149,7 +167,7 @@ class Property:
         "bool": bool,
         "timestamp": from_timestamp,
         "double_array": lambda x: np.array(x,dtype=np.float64),
-        "complex_array": lambda x: np.array(x,dtype=np.complex_),
+        "complex_array": lambda x: np.array(x,dtype=np.complex128),
         "real": float,
         "float" : float,
         # everything else is str
@@ -378,7 +396,37 @@ class JsonModel(Model):
 
         Property: the property accessor
         """
-        return Property(model,*args)
+        return Property(self,*args)
+
+    def columns(self,names:list[str],props:list[str]) -> dict:
+        """Get object property values as columns
+
+        Arguments:
+
+        * names (list[str]): object names
+
+        * props (list[str]): property names
+
+        Returns:
+
+        * dict: array of values of each property in the order of `names`
+        """
+        objects = self.data["objects"]
+        classes = self.data["classes"]
+        result = {}
+        for prop in props:
+            convert = {}
+            values = []
+            for name in names:
+                data = objects[name]
+                oclass = data["class"]
+                if oclass not in convert:
+                    spec = classes[oclass][prop]
+                    convert[oclass] = Property.fromtypes[spec["type"]] \
+                        if spec["type"] in Property.fromtypes else str
+                values.append(convert[oclass](data[prop]) if prop in data else None)
+            result[prop] = np.array(values)
+        return result
 
 class NetworkError(Exception):
     pass
@@ -396,10 +444,13 @@ class Network:
 
     * linemap (dict): Map of properties to extract from lines (or None)
 
+    * incremental (bool): Only rebuild matrices affected by changes on update
+
     The network model accessor generates a vector for all the extracted
     properties in the `nodemap` and `linemap` arguments, if any. The
     accessor also generates all the matrices listed in the `matrix` 
-    argument or all if `None`.
+    argument or all if `None`. Lines that are out of service have no
+    admittance.
 
     Properties generated for `matrix` list:
 
@@ -439,12 +490,14 @@ class Network:
         matrix:list=None,
         nodemap:dict=None,
         linemap:dict=None,
+        incremental:bool=True,
         ) -> None:
         """Network model accessor constructor"""
         self.model = model if model else GldModel()
         self.matrix = matrix
         self.nodemap = nodemap if nodemap else {}
         self.linemap = linemap if linemap else {}
+        self.incremental = incremental
 
         self.update(force=True)
 
@@ -464,9 +517,9 @@ class Network:
         result = {x:getattr(self,x) for x in ["lines","nodes","names","refbus",
                 "baseMVA","row","col",
                 ] if x in dir(self)}
-        result['Y'] = [round(x,precision) for x in network.Y]
+        result['Y'] = [round(x,precision) for x in self.Y.tolist()]
         for x in ["Z","Yc"]:
-            result[x] = [f"{round(x.real,precision):f}{round(x.imag,precision):+f}j" for x in getattr(self,x)]
+            result[x] = [f"{round(x.real,precision):f}{round(x.imag,precision):+f}j" for x in getattr(self,x).tolist()]
         for x in ["bus","branch"]:
             if x in dir(self):
                 result[x] = getattr(self,x).round(precision).tolist()
@@ -474,7 +527,7 @@ class Network:
             if x in dir(self):
                 value = getattr(self,x).tocoo()
                 coords = [x.tolist() for x in value.coords]
-                if value.dtype == np.complex_:
+                if value.dtype == np.complex128:
                     data = [str(x).strip('()') for x in value.data.round(precision).tolist()]
                 else:
                     data = value.data.round(precision).tolist()
@@ -490,6 +543,12 @@ class Network:
         Arguments:
 
         * force (None|bool): force update (None is auto)
+
+        When `force` is `None`, the update is only done when the clock has
+        advanced since the last update. If `incremental` is enabled, an
+        automatic update only reads the line and node data, and rebuilds the
+        weighted matrices only if the line impedances or statuses changed. The
+        structural matrices are rebuilt only if the topology changed.
         """
         model = self.model
         now = model.property("clock").get_value()
@@ -517,107 +576,120 @@ class Network:
             if not "pypower" in model.modules():
                 raise ValueError("model does not refer to pypower module")
 
-            # initialize the extract arrays
             self.last = now
-            self.lines = []
-            self.nodes = {}
-            self.names = {"node":[],"line":[]}
-            try:
-                self.baseMVA = float(model.property("pypower::baseMVA").split()[0])
-            except:
-                self.baseMVA = 100.0
-            self.refbus = []
-            self.Y = []
-            self.Yc = []
-            self.Z = []
-            for var in self.linemap:
-                if var in self.RESULTS + ["Y","Yc","Z","last","lines",
-                        "nodes","names","refbus","baseMVA"]:
-                    raise ValueError(f"linemap name {var} is reserved for matrices")
-                setattr(self,var,[])
-            for var in self.nodemap:
-                if var in self.RESULTS + ["Y","Yc","Z","last","lines",
-                        "nodes","names","refbus","baseMVA"]:
-                    raise ValueError(f"nodemap name {var} is reserved for matrices")
-                setattr(self,var,[])
-
-            # create a reverse map of bus names from bus index
-            busindex = {int(model.property(x,"bus_i").get_value()):x for x,y in model.objects().items() if y["class"] == "bus"}
-            
-            # process every object in the model
-            for name,data in model.objects().items():
-
-                # get the object class
-                oclass = model.classes()[data["class"]]
-
-                # pypower branches contain "fbus" and "tbus" properties
-                if "fbus" in oclass and "tbus" in oclass:
-
-                    # append the linemap values to the extract arrays
-                    for var,prop in self.linemap.items():
-                        val = model.property(name,prop).get_value()
-                        getattr(self,var).append(val)
-
-                    # append the line name to the line names array 
-                    self.names["line"].append(name)
-
-                    # get the fbus and tbus indexes
-                    fobj,tobj = model.property(name,"fbus").get_value(),model.property(name,"tbus").get_value()
-
-                    # for each of the from and to bus indexes
-                    for obj in [fobj,tobj]:
-
-                        # if the bus index is not yet listed in the nodes list
-                        if not obj in self.nodes:
-
-                            # add the bus index to the node list
-                            self.nodes[obj] = len(self.nodes)
-
-                            # get the name index for the bus
-                            ndx = busindex[int(obj)]
-
-                            # append the nodemap values to the extract arrays
-                            for var,prop in self.nodemap.items():
-                                val = model.property(ndx,prop).get_value()
-                                getattr(self,var).append(val)
-
-                            # append the index name to the node name array
-                            self.names["node"].append(ndx)
-
-                            # if the bus is a reference bus
-                            if model.property(ndx,"type").get_value() == "REF":
-
-                                # append the bus index to the reference bus list
-                                self.refbus.append(obj)
-
-                    # append the from and to bus index to line list
-                    self.lines.append([self.nodes[fobj],self.nodes[tobj]])
-
-                    # get the line impedance
-                    Z = complex(*[model.property(name,x).get_value() for x in ["r","x"]])
-
-                    # append the impedance to the Z array
-                    self.Z.append(Z)
-
-                    # if the impedance is non-zero
-                    if abs(Z) > 0:
-
-                        # append the admittance to the Y arrays
-                        self.Y.append(1/Z.imag) # susceptance dominates over conductance
-                        self.Yc.append(1/Z)
-                    
-                    else: # zero impedance means no line present (proxy for infinity)
-
-                        # no admittance
-                        self.Y.append(0)
-                        self.Yc.append(complex(0))
-
-                # powerflow lines contain from and to object names
-                elif "from" in oclass and "to" in oclass:
-
-                    raise NotImplementedError(f"powerflow network not supported (object '{name}')")
-
-            if self.nodes and self.lines:
+            if force or not self.incremental or not hasattr(self,'topology'):
+                self.extract()
+            else:
+                self.refresh()
+
+    def extract(self):
+        """Extract the network topology and data from the model"""
+        model = self.model
+
+        # initialize the extract arrays
+        self.lines = []
+        self.nodes = {}
+        self.names = {"node":[],"line":[]}
+        try:
+            self.baseMVA = float(model.property("pypower::baseMVA").split()[0])
+        except:
+            self.baseMVA = 100.0
+        self.refbus = []
+        for var in self.linemap:
+            if var in self.RESULTS + ["Y","Yc","Z","last","lines",
+                    "nodes","names","refbus","baseMVA"]:
+                raise ValueError(f"linemap name {var} is reserved for matrices")
+        for var in self.nodemap:
+            if var in self.RESULTS + ["Y","Yc","Z","last","lines",
+                    "nodes","names","refbus","baseMVA"]:
+                raise ValueError(f"nodemap name {var} is reserved for matrices")
+
+        # find pypower branches, which contain "fbus" and "tbus" properties
+        classes = model.classes()
+        objects = model.objects()
+        buses = []
+        for name,data in objects.items():
+            oclass = classes[data["class"]]
+            if "fbus" in oclass and "tbus" in oclass:
+                self.names["line"].append(name)
+            elif "from" in oclass and "to" in oclass:
+                raise NotImplementedError(f"powerflow network not supported (object '{name}')")
+            elif data["class"] == "bus":
+                buses.append(name)
+        self.status = "status" in classes["branch"] if "branch" in classes else False
+
+        # create a reverse map of bus names from bus index
+        busindex = dict(zip(model.columns(buses,["bus_i"])["bus_i"].astype(int).tolist(),buses))
+
+        # number the bus indexes in the order in which lines refer to them
+        data = model.columns(self.names["line"],["fbus","tbus"])
+        self.topology = np.stack([data["fbus"],data["tbus"]],axis=1).astype(int)
+        if len(self.topology) > 0:
+            values,first = np.unique(self.topology.ravel(),return_index=True)
+            rank = np.empty(len(values),dtype=int)
+            rank[np.argsort(first)] = np.arange(len(values))
+            self.nodes = {x:n for n,x in enumerate(values[np.argsort(first)].tolist())}
+            self.lines = rank[np.searchsorted(values,self.topology)].tolist()
+            self.names["node"] = [busindex[x] for x in self.nodes]
+
+            # find the reference buses
+            types = model.columns(self.names["node"],["type"])["type"]
+            self.refbus = [x for x,y in zip(self.nodes,types) if y == "REF"]
+
+        self.refresh(topology=True)
+
+    def refresh(self,topology:bool=False):
+        """Refresh the line and node data from the model
+
+        Arguments:
+
+        * topology (bool): force the structural matrices to be rebuilt
+
+        The line and node data are read in bulk, and the weighted matrices
+        are rebuilt only if the line impedances or statuses changed. If the
+        line connections changed, the network is extracted again.
+        """
+        model = self.model
+        props = ["fbus","tbus","r","x"] + (["status"] if self.status else [])
+        data = model.columns(self.names["line"],props + [x for x in self.linemap.values() if x not in props])
+        if not topology and not np.array_equal(np.stack([data["fbus"],data["tbus"]],axis=1).astype(int),self.topology):
+            return self.extract()
+
+        # append the linemap and nodemap values to the extract arrays
+        for var,prop in self.linemap.items():
+            setattr(self,var,data[prop])
+        nodedata = model.columns(self.names["node"],list(set(self.nodemap.values())))
+        for var,prop in self.nodemap.items():
+            setattr(self,var,nodedata[prop])
+
+        # get the line impedances and status
+        Z = np.array(data["r"] + 1j*data["x"],dtype=np.complex128)
+        online = np.array([str(x) not in ["OUT","0"] for x in data["status"]],dtype=bool) \
+            if self.status else np.full(len(Z),True)
+        if not topology and np.array_equal(Z,self.Z) and np.array_equal(online,self.online):
+            return
+        self.Z = Z
+        self.online = online
+
+        # zero impedance means no line present (proxy for infinity)
+        valid = online & (np.abs(Z) > 0)
+        self.Y = np.zeros(len(Z)) # susceptance dominates over conductance
+        np.divide(1,Z.imag,out=self.Y,where=valid&(Z.imag!=0))
+        self.Yc = np.zeros(len(Z),dtype=np.complex128)
+        np.divide(1,Z,out=self.Yc,where=valid)
+
+        self.build(topology)
+
+    def build(self,topology:bool=True):
+        """Build the network matrices
+
+        Arguments:
+
+        * topology (bool): rebuild the structural matrices also
+        """
+        if self.nodes and self.lines:
+
+            if topology:
 
                 # create the bus index array
                 self.bus = np.array(list(self.nodes.values()))
@@ -628,9 +700,11 @@ class Network:
                 # create the row and col index arrays
                 self.row,self.col = self.branch.T.tolist()
 
-                # get the number of branches and busses
-                M = len(self.branch)
-                N = len(self.bus)
+            # get the number of branches and busses
+            M = len(self.branch)
+            N = len(self.bus)
+
+            if topology:
 
                 # adjacency matrix 
                 if self.matrix is None or "A" in self.matrix or "L" in self.matrix:
@@ -648,41 +722,124 @@ class Network:
 
                 # Laplacian matrix
                 if self.matrix is None or "L" in self.matrix:
-                    self.L = self.D - self.A
+                    self.L = self.D - np.abs(self.A)
 
                 # oriented incidence matrix
                 if self.matrix is None or "B" in self.matrix or "W" in self.matrix or "Wc" in self.matrix: 
                     self.B = sp.sparse.coo_array(([1]*M,(list(range(M)),self.row)),shape=(M,N)) - sp.sparse.coo_array(([1]*M,(list(range(M)),self.col)),shape=(M,N),dtype=int)
 
-                # weighted Laplacian matrix
-                if self.matrix is None or "W" in self.matrix:
-                    self.W = self.B.T @ sp.sparse.diags_array(self.Y,dtype=np.float64) @ self.B
-                if self.matrix is None or "Wc" in self.matrix:
-                    self.Wc = self.B.T @ sp.sparse.diags_array(self.Yc,dtype=np.complex_) @ self.B
+            # weighted Laplacian matrix
+            if self.matrix is None or "W" in self.matrix:
+                self.W = self.B.T @ sp.sparse.diags_array(self.Y,dtype=np.float64) @ self.B
+            if self.matrix is None or "Wc" in self.matrix:
+                self.Wc = self.B.T @ sp.sparse.diags_array(self.Yc,dtype=np.complex128) @ self.B
 
-    def islands(self,precision:int=9) -> int:
-        """Calculate the number of islands in network
+    def islands(self,precision:int=9,labels:bool=False) -> int|np.ndarray:
+        """Calculate the islands in network
 
         Arguments:
 
-        * precision (int): the precision with which to evaluate eigenvalues
+        * precision (int): the precision with which to evaluate line impedances
+
+        * labels (bool): return island membership instead of number of islands
 
         Returns:
 
         * int: the number of connected subnetworks in the network
+
+        * np.array: the island number of each node (if `labels` is `True`)
+
+        Islands are found from the connected components of the sparse graph of
+        lines that are in service and have a non-zero impedance, so lines that
+        are out of service or have no impedance do not connect nodes.
         """
-        if not hasattr(self,"W"):
-            raise NetworkError("cannot compute islands unless W is computed")
+        if not hasattr(self,"branch"):
+            raise NetworkError("cannot compute islands unless network is extracted")
+
+        N = len(self.bus)
+        connected = self.online & ( np.round(np.abs(self.Z),precision) > 0 )
+        graph = sp.sparse.coo_array((np.ones(connected.sum()),self.branch[connected].T),shape=(N,N))
+        count,membership = sp.sparse.csgraph.connected_components(graph,directed=False)
+        return membership if labels else count
 
-        # TODO: replace with sp.linalg.eigs
-        e,v = np.linalg.eigh(network.W.todense())
-        return len([x for x in e.round(precision) if x == 0.0])
+    def connectivity(self,k:int=2,weighted:bool=True) -> np.ndarray:
+        """Calculate the smallest eigenvalues of the network Laplacian
+
+        Arguments:
+
+        * k (int): the number of eigenvalues to calculate
+
+        * weighted (bool): use the weighted Laplacian `W` instead of `L`
+
+        Returns:
+
+        * np.array: the `k` smallest eigenvalues in ascending order
+
+        The second smallest eigenvalue is the algebraic connectivity of the
+        network, which is zero when the network has more than one island.
+        """
+        name = "W" if weighted else "L"
+        if not hasattr(self,name):
+            raise NetworkError(f"cannot compute connectivity unless {name} is computed")
+
+        M = getattr(self,name).tocsc().astype(np.float64)
+        if k >= M.shape[0] - 1:
+            return np.linalg.eigvalsh(M.toarray())[:k]
+
+        # shift-invert about a point just below zero because the Laplacian is singular
+        e = sp.sparse.linalg.eigsh(M,k=k,sigma=-1e-6,which="LM",return_eigenvectors=False)
+        return np.sort(e)
+
+def test() -> (int,int):
+    """Test routine"""
+    n_tested = 0
+    n_failed = 0
+    network = Network(JsonModel(os.path.join(os.path.dirname(__file__),"autotest","case14.json")))
+
+    # graph Laplacian of the branch list
+    N = len(network.bus)
+    L = np.zeros((N,N))
+    for i,j in network.branch:
+        L[i,j] -= 1
+        L[j,i] -= 1
+        L[i,i] += 1
+        L[j,j] += 1
+    for name,value,expected in [
+            ("L",network.L.toarray(),L),
+            ("connectivity(weighted=False)",network.connectivity(weighted=False),np.linalg.eigvalsh(L)[:2]),
+            ("connectivity(weighted=True)",network.connectivity(weighted=True),np.linalg.eigvalsh(network.W.toarray())[:2]),
+            ]:
+        n_tested += 1
+        if not np.allclose(value,expected):
+            print(f"ERROR [network.py]: {name}={value} is not {expected}",file=sys.stderr)
+            n_failed += 1
+
+    # islands of resistive and out of service lines
+    Z,online = network.Z,network.online
+    for name,value,expected in [
+            ("islands()",network.islands(),1),
+            ("islands() of resistive lines",setattr(network,"Z",np.abs(Z)+0j) or network.islands(),1),
+            ("islands() of lines out of service",setattr(network,"online",~online) or network.islands(),N),
+            ]:
+        n_tested += 1
+        if value != expected:
+            print(f"ERROR [network.py]: {name}={value} is not {expected}",file=sys.stderr)
+            n_failed += 1
+    network.Z,network.online = Z,online
+
+    return n_failed,n_tested
 
 #
 # Test JSON accessors
 #
 if __name__ == "__main__":
 
+    if not sys.argv[0]:
+
+        n,m = test()
+        print(f"{os.path.basename(__file__)}: {m} tests, {n} failed")
+        exit(n)
+
     if len(sys.argv) == 1:
         print("\n".join([x for x in __doc__.split("\n") if x.startswith("Syntax")]))
         exit(1)
@@ -706,7 +863,7 @@ if __name__ == "__main__":
         for key in [x for x in sys.argv[2:] if not x.split(":")[1] in dir(network)]:
             print(f"WARNING [network.py]: '{key}' is not a valid network analysis result",file=sys.stderr)
         extras = list(nodes) + list(lines)
-        print(json.dumps(network.todict(extras={y:lambda x:x for y in extras}),indent=2))
+        print(json.dumps(network.todict(extras={y:lambda x:x.tolist() for y in extras}),indent=2))
 
     except Exception as err:
 
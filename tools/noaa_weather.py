@@ -9,6 +9,12 @@ Options:
     -y|--year=[YEAR[-YEAR][,...]]   Specify years to download (default is current year)
 
     -p|--position=LAT,LON           Specify latitude longitude to search for nearest station
+
+Description:
+
+Downloaded data is kept in the `noaa` source of the weather store (see
+`gridlabd weather_store help`). Files found in the weather store mirror folder
+`noaa/GHCNh_STATION_YEAR.psv` are used instead of downloading them.
 """
 import os
 import sys
@@ -16,11 +22,13 @@ import pandas as pd
 import urllib
 import gridlabd.framework as app
 from gridlabd.geocode import geohash
+import gridlabd.weather_store as weather_store
 import datetime as dt
 
 THISYEAR = dt.datetime.now().year
 CACHEDIR = os.path.join(os.environ["GLD_ETC"],"noaa_weather")
 os.makedirs(CACHEDIR,exist_ok=True)
+STATIONS = None # nearest station index
 
 class NOAAWeatherError:
     """NOAA Weather archive exception handler"""
@@ -67,8 +75,11 @@ class NOAAWeather:
                 ).dropna(subset="ICAO").rename(NOAAWeather.STATIONCOLUMNS,axis=1)
             data.to_csv(pathname,index=True,header=True)
         if isinstance(latlon,(tuple,list)):
-            dist = (data["X[deg]"]-latlon[1])**2 + (data["Y[deg]"]-latlon[0])**2
-            ndx = dist.sort_values().index[0]
+            global STATIONS
+            if STATIONS is None or refresh:
+                located = data.dropna(subset=["X[deg]","Y[deg]"])
+                STATIONS = weather_store.StationIndex(located["Y[deg]"],located["X[deg]"],located.index)
+            ndx = STATIONS.nearest(*latlon)[0][0]
             return data.loc[[ndx]]
         else:
             return data
@@ -76,16 +87,22 @@ class NOAAWeather:
     def __init__(self,station,year=THISYEAR,refresh=None,fill=True,dropna=True):
         if refresh is None:
             refresh = year == THISYEAR
+        store = weather_store.WeatherStore("noaa")
         pathname = os.path.join(CACHEDIR,f"{station}_{year}.csv")
         self.data = None
-        if not refresh and os.path.exists(pathname):
+        if not refresh:
             try:
-                self.data = pd.read_csv(pathname,index_col=[0])
+                self.data = store.get(station,year)
+                if self.data is None and os.path.exists(pathname):
+                    self.data = pd.read_csv(pathname,index_col=[0],parse_dates=[0])
+                    store.put(station,year,self.data)
             except Exception as err:
-                app.warning(f"'{pathname}' cache read error -- reloading from source")
+                app.warning(f"'{store.path(station,year)}' cache read error -- reloading from source")
         if self.data is None:
             try:
-                url = f"{self.SERVERURL}/access/by-year/{year}/psv/GHCNh_{station}_{year}.psv"
+                url = store.mirror(f"GHCNh_{station}_{year}.psv")
+                if not url:
+                    url = f"{self.SERVERURL}/access/by-year/{year}/psv/GHCNh_{station}_{year}.psv"
                 self.data = pd.read_csv(url,
                     usecols=["DATE"]+list(self.DATACOLUMNS),
                     index_col=["DATE"],sep="|",
@@ -98,7 +115,7 @@ class NOAAWeather:
                     self.data.bfill(inplace=True)
                 if dropna:
                     self.data.dropna(axis=1,inplace=True)
-                self.data.to_csv(pathname,index=True,header=True)
+                store.put(station,year,self.data)
             except urllib.error.HTTPError as err:
                 if app.DEBUG:
                     raise
@@ -33,6 +33,9 @@ Downloaded weather data is for a specified location and year, which must be
 provided. The data is downloaded in either 30 or 60 intervals and cached for
 later used.  The data that is delivered from the cache can be further
 interpolated down to 1 minute. Use the `--clear` option to clear the cache.
+Processed data is kept in the `nsrdb` source of the weather store (see
+`gridlabd weather_store help`), and files found in the weather store mirror
+folder `nsrdb/YEAR/GEOHASH.csv` are used instead of downloading them.
 
 By default the weather data is output to /dev/stdout.  If the CSV file name 
 is specified using `-c|--csv=CSVNAME, the data will be written to that file.  
@@ -141,6 +144,7 @@ SEE ALSO
 """
 
 import sys, os, json, requests, pandas, numpy, datetime, math
+import gridlabd.weather_store as weather_store
 
 GLD_ETC = os.getenv("GLD_ETC")
 
@@ -316,19 +320,33 @@ def getcache(year,lat,lon,refresh=False):
 
 def getyear(year,lat,lon):
     """Get NSRDB weather data for a single year"""
+    key = geohash(lat,lon)
+    store = weather_store.WeatherStore("nsrdb")
+    data = store.get(key,year)
+    if not data is None:
+        verbose(f"getyear(year={year},lat={lat},lon={lon}): reading data from {store.path(key,year)}")
+        result = store.info(key,year)["meta"]
+        result.update(dict(Year=[year],DataFrame=[data]))
+        return result
     api = getkey()
     url = f"{server}?wkt=POINT({lon}%20{lat})&names={year}&leap_day={str(leap).lower()}&interval={interval}&utc={str(utc).lower()}&api_key={api}&attributes={attributes}&email={email}&full_name=None&affiliation=None&mailing_list=false&reason=None"
-    cache = f"{cachedir}/nsrdb/{year}/{geohash(lat,lon)}.csv"
-    try:
-        result = pandas.read_csv(cache,nrows=1).to_dict(orient="list")
+    cache = f"{cachedir}/nsrdb/{year}/{key}.csv"
+    mirror = store.mirror(f"{year}/{key}.csv")
+    if mirror:
+        verbose(f"getyear(year={year},lat={lat},lon={lon}): reading data from {mirror}")
+        result = pandas.read_csv(mirror,nrows=1).to_dict(orient="list")
+        result.update(dict(Year=[year],DataFrame=[pandas.read_csv(mirror,skiprows=2)]))
+    else:
         try:
-            result.update(dict(Year=[year],DataFrame=[pandas.read_csv(cache,skiprows=2)]))
-            verbose(f"getyear(year={year},lat={lat},lon={lon}): reading data from {cache}")
-        except Exception as err:
-            os.remove(cache)
-            raise Exception(f"cache file '{cache}' is not readable ({err}), try again later")
-    except:
-        result = None
+            result = pandas.read_csv(cache,nrows=1).to_dict(orient="list")
+            try:
+                result.update(dict(Year=[year],DataFrame=[pandas.read_csv(cache,skiprows=2)]))
+                verbose(f"getyear(year={year},lat={lat},lon={lon}): reading data from {cache}")
+            except Exception as err:
+                os.remove(cache)
+                raise Exception(f"cache file '{cache}' is not readable ({err}), try again later")
+        except:
+            result = None
     if not result:
         os.makedirs(os.path.dirname(cache),exist_ok=True)
         with open(cache,"w") as fout:
@@ -367,6 +385,7 @@ def getyear(year,lat,lon):
         data["wind_dir[rad]"] *= 3.141592635/180
         data["heat_index[degF]"] = list(map(lambda x:heat_index(x[0],x[1]),zip(data["temperature[degF]"],data["humidity[%]"])))
         data.index.name = "datetime"
+    store.put(key,year,result["DataFrame"][0],{x:y for x,y in result.items() if not x in ["Year","DataFrame"]})
     return result
 
 def decode_exactly(geohash):
@@ -605,6 +624,7 @@ if __name__ == "__main__":
         elif token in ["--clear"]:
             import shutil
             shutil.rmtree(cachedir)
+            weather_store.WeatherStore("nsrdb").clear()
         else:
             error(f"option '{token}' is not valid",1)
  
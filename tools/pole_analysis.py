@@ -64,6 +64,7 @@ from math import cos, sin, tan, atan, pi, sqrt
 import numpy as np
 import pandas as pd
 from haversine import haversine, Unit
+import gridlabd.framework as app
 
 def error(msg,code=None):
     """Display error message and exit with code"""
@@ -527,14 +528,15 @@ def main(inputfile,**options):
     if inputfile.endswith(".glm"):
         glmfile = inputfile
         jsonfile = inputfile.replace(".glm",".json")
-        code = os.system(f"gridlabd -C {glmfile} -o {jsonfile}")
-        if code != 0:
-            error(f"unable to compile '{glmfile}' into {jsonfile} (error code {code})",2)
+        f,result = app.open_glm(glmfile,tmp=os.path.dirname(jsonfile),exception=False)
+        if f is None:
+            error(f"unable to compile '{glmfile}' into {jsonfile} (error code {result.returncode})",2)
     elif inputfile.endswith(".json"):
         jsonfile = inputfile
+        f = open(jsonfile,"r")
     else:
         error(f"main(inputfile='{inputfile}',options={options}): inputfile type not recognized",1)
-    with open(jsonfile,"r") as f:
+    with f:
         model = json.load(f)
     objects = model["objects"]
     poles = {}
@@ -18,6 +18,11 @@ If substation consolidation is included, then all the substations at the
 specified level are consolidated into a single node with all substation loads
 and generation connected at that node.
 
+The transmission line data is preprocessed once into the infrastructure store
+(see [[/Tools/Infrastructure]]) with an index of the lines connected to each
+substation, so that only the lines connected to the selected substations are
+read.
+
 Example:
 
 See also:
@@ -35,6 +40,7 @@ import pandas as pd
 import gridlabd.resource as gr
 import gridlabd.framework as app
 import gridlabd.substation as substation
+import gridlabd.infrastructure as infrastructure
 import random
 import gzip
 
@@ -97,13 +103,18 @@ class Powerline:
             data = pd.DataFrame(rows,columns=header,dtype=str)
             data.set_index("ID").sort_index().to_csv(cachename,header=True,index=True)
 
-        data = pd.read_csv(cachename,index_col="ID",converters=CONVERTERS)
-        data.drop([x for x in data.columns if x not in CONVERTERS],inplace=True,axis=1)
-        data.columns = [x.lower() for x in data.columns]
-        data.index.name = "name"
-
-        self.branch = {x:y for x,y in data.to_dict('index').items() if y['sub_1'] in self.bus and y['sub_2'] in self.bus}
-        self.link = {x:y for x,y in data.to_dict('index').items() if ( y['sub_1'] in self.bus or y['sub_2'] in self.bus ) and x not in self.branch}
+        store = infrastructure.InfrastructureStore("powerlines",index=["sub_1","sub_2"])
+        if not store.is_current(cachename):
+            data = pd.read_csv(cachename,index_col="ID",converters=CONVERTERS)
+            data.drop([x for x in data.columns if x not in CONVERTERS],inplace=True,axis=1)
+            data.columns = [x.lower() for x in data.columns]
+            data.index.name = "name"
+            store.build(data,cachename)
+
+        # only the lines connected to the busses are read from the store
+        data = store.read(where={"sub_1":self.bus,"sub_2":self.bus},match="any").to_dict('index')
+        self.branch = {x:y for x,y in data.items() if y['sub_1'] in self.bus and y['sub_2'] in self.bus}
+        self.link = {x:y for x,y in data.items() if x not in self.branch}
 
     def __repr__(self):
         arglist = [repr(x) for x in self._args] + [f"{x}={repr(y)}" for x,y in self._kwargs.items()]
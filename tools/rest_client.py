@@ -73,6 +73,74 @@ class Session:
         """
         return server_get(self.sid,"run"," ".join(args),**kwargs)
 
+    def submit(self,*args,**kwargs):
+        """Submit command to the job queue
+
+        Parameters:
+
+            *args (str list): gridlabd command
+            **kwargs (str list): requests GET options
+
+        Returns:
+
+            job (int): job id
+        """
+        return server_get(self.sid,"submit"," ".join(args),**kwargs)["job"]
+
+    def job(self,job,**kwargs):
+        """Get job status
+
+        Parameters:
+
+            job (int): job id
+            **kwargs (str list): requests GET options
+
+        Returns:
+
+            status (str): job status (QUEUED, RUNNING, OK, ERROR, TIMEOUT, or CANCELLED)
+            progress (float): fraction of job completed
+            runtime (float): job runtime in seconds
+            returncode (int): job exit code
+        """
+        return server_get(self.sid,"job",str(job),**kwargs)
+
+    def jobs(self,**kwargs):
+        """Get status of all session jobs
+
+        Parameters:
+
+            **kwargs (str list): requests GET options
+        """
+        return server_get(self.sid,"jobs",**kwargs)
+
+    def cancel(self,job,**kwargs):
+        """Cancel a queued or running job
+
+        Parameters:
+
+            job (int): job id
+            **kwargs (str list): requests GET options
+        """
+        return server_get(self.sid,"cancel",str(job),**kwargs)
+
+    def output(self,job,stream="stdout",offset=0,**kwargs):
+        """Get job output
+
+        Parameters:
+
+            job (int): job id
+            stream (str): output stream, "stdout" or "stderr" (default "stdout")
+            offset (int): output offset from which to read (default 0)
+            **kwargs (str list): requests GET options
+
+        Returns:
+
+            data (str): output data from offset
+            offset (int): offset from which to read the next output
+            status (str): job status
+        """
+        return server_get(self.sid,"output",str(job),stream,params=dict(offset=offset),**kwargs)
+
     def start(self,*args,**kwargs):
         """Run command
 
@@ -33,12 +33,22 @@ Options:
     --ssl_context=STRING  Set the SSL context per Flask documentation
                           (default is None) 
 
+    --maxjobs=INTEGER     Set the maximum number of simulations that run
+                          concurrently (default is the CPU count)
+
 The GridLAB-D REST server provides gridlabd simulation control through a Flask
 API.
+
+Simulations are run as jobs in a queue that runs at most MAXJOBS jobs at
+the same time. Jobs submitted using the `submit` route run in the background
+and their status, progress, runtime, and output can be retrieved while they
+run using the `job`, `jobs`, and `output` routes. Queued and running jobs can
+be cancelled using the `cancel` route.
 """
 
 import os, sys
 import shutil, signal, stat
+import codecs
 import logging
 import subprocess as sp
 import socket
@@ -52,6 +62,9 @@ import requests
 import atexit
 import errno
 import http
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from flask_restful import  Api
 from flask_restful_swagger import swagger
 
@@ -74,6 +87,9 @@ except:
     LOGFILE = TMPDIR+"server.log" # logger output
     MAXLOG = 2**20 # maximum logfile size
     SSL_CONTEXT = None # "adhoc" or ('cert.pem', 'key.pem')
+    MAXJOBS = os.cpu_count() # maximum number of concurrent simulations
+
+MAXJOBS = globals().get("MAXJOBS") or os.cpu_count()
 
 #
 # Generation security token
@@ -140,74 +156,257 @@ class Session():
 
     def close(self):
         """Close session"""
+        QUEUE.cancel(self)
         shutil.rmtree(self.cwd())
 
     def run(self,*args,wait=True,output=False,bin=False):
         """Run GridLAB-D in a session"""
-        try:
-
-            if not wait:
-                pid = os.fork()
-                if pid > 0: # parent process
-                    return dict(
-                        status = "OK",
-                        content = dict(
-                            process = os.fork(),
-                            ),
-                        )
-
-            # start timer
-            tic = time()
-
-            # dispatch simulation
-            log.info(f"{args}: starting")
-            result = sp.run(["gridlabd.bin" if bin else "gridlabd"]+list(args),
-                cwd=self.cwd(),
-                capture_output=True,
-                timeout=TIMEOUT,
+        job = QUEUE.submit(self,args,bin=bin)
+        if not wait:
+            return dict(
+                status = "OK",
+                content = dict(
+                    job = job.jid,
+                    ),
                 )
+        job.wait()
+        content = dict(
+            returncode=job.returncode,
+            runtime=job.runtime(),
+            )
+        if output:
+            content["stdout"] = job.output("stdout")
+            content["stderr"] = job.output("stderr")
+        else:
+            shutil.copyfile(job.file("stdout"),self.file("stdout"))
+            shutil.copyfile(job.file("stderr"),self.file("stderr"))
+        return dict(
+            status=job.status,
+            content=content,
+            )
+
+    def control(self,*args):
+        """Run a GridLAB-D server control command without queueing it"""
+        tic = time()
+        result = sp.run(["gridlabd"]+list(args),
+            cwd=self.cwd(),
+            capture_output=True,
+            timeout=TIMEOUT,
+            )
+        return dict(
+            status="OK" if result.returncode==0 else "ERROR",
+            content=dict(
+                returncode=result.returncode,
+                runtime=round(time()-tic,3),
+                stdout=result.stdout.decode("utf-8"),
+                stderr=result.stderr.decode("utf-8"),
+                ),
+            )
 
-            # stop timer
-            toc = time()
+class Job():
+    """Job implementation"""
 
-            # report status
-            status = "OK"
+    def __init__(self,jid,session,args,bin=False):
+        """Job constructor
 
-        except sp.TimeoutExpired:
+        Parameters
+        ----------
+
+            jid (int): job identifier
+
+            session (Session): session in which the job runs
 
-            # timeout
+            args (list): gridlabd command arguments
+
+            bin (bool): run gridlabd.bin instead of gridlabd
+        """
+        self.jid = jid
+        self.session = session
+        self.args = ["gridlabd.bin" if bin else "gridlabd"]+list(args)
+        self.status = "QUEUED"
+        self.submitted = time()
+        self.started = None
+        self.finished = None
+        self.returncode = None
+        self.proc = None
+        self.future = None
+        self.lock = threading.Lock()
+        self.done = threading.Event()
+
+    def file(self,stream):
+        """Get job output file name"""
+        return self.session.file(f"job{self.jid}.{stream}")
+
+    def run(self):
+        """Run the job (called by the queue worker)"""
+        with self.lock:
+            if self.status != "QUEUED":
+                return self
+            self.status = "RUNNING"
+            self.started = time()
+            stdout = open(self.file("stdout"),"w")
+            stderr = open(self.file("stderr"),"w")
+            try:
+                log.info(f"job {self.jid} {self.args}: starting")
+                self.proc = sp.Popen(self.args,cwd=self.session.cwd(),stdout=stdout,stderr=stderr,
+                    start_new_session=True)
+            except Exception as err:
+                stderr.write(str(err))
+                stdout.close()
+                stderr.close()
+                self.status = "ERROR"
+                self.finished = time()
+                self.done.set()
+                return self
+        try:
+            self.returncode = self.proc.wait(timeout=TIMEOUT)
+            status = "OK" if self.returncode == 0 else "ERROR"
+        except sp.TimeoutExpired:
+            self.kill(signal.SIGKILL)
+            self.returncode = self.proc.wait()
             status = "TIMEOUT"
+        finally:
+            stdout.close()
+            stderr.close()
+        with self.lock:
+            if self.status == "RUNNING":
+                self.status = status
+            self.finished = time()
+        log.info(f"job {self.jid} {self.args}: {self.status}")
+        self.done.set()
+        return self
+
+    def wait(self):
+        """Wait for the job to finish"""
+        self.done.wait()
+
+    def cancel(self):
+        """Cancel the job"""
+        with self.lock:
+            if self.status == "QUEUED":
+                self.status = "CANCELLED"
+                self.future.cancel()
+                self.finished = time()
+                self.done.set()
+            elif self.status == "RUNNING":
+                self.status = "CANCELLED"
+                self.kill(signal.SIGTERM)
+        log.info(f"job {self.jid} {self.args}: cancel requested")
+
+    def kill(self,sig):
+        """Send a signal to the job process group"""
+        try:
+            os.killpg(self.proc.pid,sig)
+        except ProcessLookupError:
+            pass
 
-        # store outputs
-        if output and wait:
-            return dict(
-                status=status if result.returncode==0 else "ERROR",
-                content=dict(
-                    returncode=result.returncode,
-                    runtime=round(toc-tic,3),
-                    stdout=result.stdout.decode("utf-8"),
-                    stderr=result.stderr.decode("utf-8"),
-                    ),
-                )
+    def runtime(self):
+        """Get the job runtime in seconds"""
+        if self.started is None:
+            return None
+        return round((self.finished if self.finished else time())-self.started,3)
 
-        with self.file("stdout","w") as fh:
-            fh.write(result.stdout.decode("utf-8"))
-        with self.file("stderr","w") as fh:
-            fh.write(result.stderr.decode("utf-8"))
+    def progress(self):
+        """Get the job progress from the gridlabd progress output"""
+        if self.status == "OK":
+            return 1.0
+        try:
+            with open(self.file("stderr"),"rb") as fh:
+                fh.seek(max(0,os.path.getsize(self.file("stderr"))-4096))
+                found = re.findall(r"\(([0-9.]+)% done\)",fh.read().decode("utf-8","ignore"))
+            return float(found[-1])/100 if found else None
+        except:
+            return None
 
-        if not wait:
-            log.info(f"{args}: done")
-            sys.exit(0)
+    def output(self,stream,offset=0):
+        """Get the job output from offset"""
+        return self.read(stream,offset)[0]
 
-        # return results
+    def read(self,stream,offset=0):
+        """Get the job output from byte offset and the byte offset of the next output"""
+        if not stream in ["stdout","stderr"]:
+            raise ValueError(f"stream '{stream}' is not valid")
+        try:
+            with open(self.file(stream),"rb") as fh:
+                fh.seek(offset)
+                data = fh.read()
+        except FileNotFoundError:
+            return "",offset
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        text = decoder.decode(data,final=not self.status in ["QUEUED","RUNNING"])
+        return text,offset+len(data)-len(decoder.getstate()[0])
+
+    def info(self):
+        """Get job information"""
         return dict(
-            status=status if result.returncode==0 else "ERROR",
-            content=dict(
-                returncode=result.returncode,
-                runtime=round(toc-tic,3),
-                ),
+            job=self.jid,
+            command=" ".join(self.args[1:]),
+            status=self.status,
+            progress=self.progress(),
+            submitted=datetime.fromtimestamp(self.submitted).isoformat(),
+            runtime=self.runtime(),
+            returncode=self.returncode,
             )
 
+class JobQueue():
+    """Job queue implementation"""
+
+    def __init__(self,maxjobs):
+        """Job queue constructor
+
+        Parameters
+        ----------
+
+            maxjobs (int): maximum number of jobs that run concurrently
+        """
+        self.maxjobs = maxjobs
+        self.pool = ThreadPoolExecutor(max_workers=maxjobs,thread_name_prefix="job")
+        self.jobs = {}
+        self.lock = threading.Lock()
+        self.lastid = 0
+
+    def submit(self,session,args,bin=False):
+        """Submit a job to the queue"""
+        with self.lock:
+            self.lastid += 1
+            job = Job(self.lastid,session,args,bin=bin)
+            self.jobs[job.jid] = job
+            job.future = self.pool.submit(job.run)
+        log.info(f"job {job.jid} {job.args}: queued")
+        return job
+
+    def get(self,session,jid):
+        """Get a session job"""
+        job = self.jobs.get(jid)
+        if job is None or job.session.sid != session.sid:
+            raise KeyError(f"job {jid} not found")
+        return job
+
+    def find(self,session=None):
+        """Get the jobs of a session (or all jobs)"""
+        return [x for x in list(self.jobs.values()) if session is None or x.session.sid == session.sid]
+
+    def cancel(self,session):
+        """Cancel all the jobs of a session and forget them"""
+        for job in self.find(session):
+            job.cancel()
+            del self.jobs[job.jid]
+
+    def active(self,sid):
+        """Check whether a session has queued or running jobs"""
+        return any([x.status in ["QUEUED","RUNNING"] for x in self.find() if x.session.sid == sid])
+
+    def info(self):
+        """Get queue information"""
+        jobs = self.find()
+        return dict(
+            maxjobs=self.maxjobs,
+            queued=len([x for x in jobs if x.status == "QUEUED"]),
+            running=len([x for x in jobs if x.status == "RUNNING"]),
+            )
+
+QUEUE = JobQueue(MAXJOBS)
+
 #
 # API Routes
 #
@@ -235,13 +434,79 @@ def app_run(session,command):
         log.error(f"app_run(session={session},command='{command}'):{str(err)}")
         return jsonify(dict(status="ERROR",message=str(err))),http.HTTPStatus.BAD_REQUEST
 
+# Job submit
+@app.route(f"/{TOKEN}/<string:session>/submit/<path:command>")
+def app_submit(session,command):
+    try:
+        session = Session(session)
+        args = command.split()
+        result = session.run(*args,wait=False)
+        log.info(f"app_submit(session={session},command='{command}'):{result}")
+        return jsonify(result),http.HTTPStatus.OK
+    except Exception as err:
+        log.error(f"app_submit(session={session},command='{command}'):{str(err)}")
+        return jsonify(dict(status="ERROR",message=str(err))),http.HTTPStatus.BAD_REQUEST
+
+# Job list
+@app.route(f"/{TOKEN}/<string:session>/jobs")
+def app_jobs(session):
+    try:
+        session = Session(session)
+        content = [job.info() for job in QUEUE.find(session)]
+        return jsonify(dict(status="OK",content=content)),http.HTTPStatus.OK
+    except Exception as err:
+        log.error(f"app_jobs(session={session}):{str(err)}")
+        return jsonify(dict(status="ERROR",message=str(err))),http.HTTPStatus.BAD_REQUEST
+
+# Job status
+@app.route(f"/{TOKEN}/<string:session>/job/<int:job>")
+def app_job(session,job):
+    try:
+        session = Session(session)
+        content = QUEUE.get(session,job).info()
+        return jsonify(dict(status="OK",content=content)),http.HTTPStatus.OK
+    except Exception as err:
+        log.error(f"app_job(session={session},job={job}):{str(err)}")
+        return jsonify(dict(status="ERROR",message=str(err))),http.HTTPStatus.BAD_REQUEST
+
+# Job cancel
+@app.route(f"/{TOKEN}/<string:session>/cancel/<int:job>")
+def app_cancel(session,job):
+    try:
+        session = Session(session)
+        job = QUEUE.get(session,job)
+        job.cancel()
+        return jsonify(dict(status="OK",content=job.info())),http.HTTPStatus.OK
+    except Exception as err:
+        log.error(f"app_cancel(session={session},job={job}):{str(err)}")
+        return jsonify(dict(status="ERROR",message=str(err))),http.HTTPStatus.BAD_REQUEST
+
+# Job output
+@app.route(f"/{TOKEN}/<string:session>/output/<int:job>/<string:stream>")
+def app_output(session,job,stream):
+    try:
+        session = Session(session)
+        job = QUEUE.get(session,job)
+        offset = int(request.args.get("offset",0))
+        data,offset = job.read(stream,offset)
+        content = dict(status=job.status,data=data,offset=offset)
+        return jsonify(dict(status="OK",content=content)),http.HTTPStatus.OK
+    except Exception as err:
+        log.error(f"app_output(session={session},job={job},stream={stream}):{str(err)}")
+        return jsonify(dict(status="ERROR",message=str(err))),http.HTTPStatus.BAD_REQUEST
+
+# Job queue status
+@app.route(f"/{TOKEN}/queue")
+def app_queue():
+    return jsonify(dict(status="OK",content=QUEUE.info())),http.HTTPStatus.OK
+
 # Process start
 @app.route(f"/{TOKEN}/<string:session>/start/<path:command>")
 def app_start(session,command):
     try:
         session = Session(session)
         args = command.split()
-        result = session.run("server","start",*args,output=True)
+        result = session.control("server","start",*args)
         log.info(f"app_start(session={session},command='{command}'):{result}")
         if result["status"] != "OK":
             raise Exception("process start failed")
@@ -255,7 +520,7 @@ def app_start(session,command):
 def app_status(session,process):
     try:
         session = Session(session)
-        result = session.run("server","status",str(process),output=True)
+        result = session.control("server","status",str(process))
         log.info(f"app_status(session={session}):{result}")
         data = [x.split() for x in result["content"]["stdout"].strip().split("\n")]
         log.info(f"app_status(session={session}):{data}")
@@ -394,6 +659,9 @@ if __name__ == "__main__":
             MAXFILE=int(value) if value else 2**64-1
         elif key in ["--logfile"]:
             LOGFILE=value if value else "/dev/stderr"
+        elif key in ["--maxjobs"]:
+            MAXJOBS=int(value) if value else os.cpu_count()
+            QUEUE = JobQueue(MAXJOBS)
         elif key in ["--ssl_context"]:
             SSL_CONTEXT=value.split(",") if "," in value else ( value if value else None )
         elif key in ["status","start","stop"]:
@@ -416,6 +684,8 @@ if __name__ == "__main__":
             global log
             signame = signal.Signals(signum).name
             for sid in os.listdir(TMPDIR):
+                if QUEUE.active(sid):
+                    continue
                 pathname = os.path.join(TMPDIR,sid)
                 fileinfo = os.stat(pathname)
                 age = time() - fileinfo.st_atime
@@ -10,3 +10,4 @@ MAXFILE=2**32-1 # maximum file size
 MAXLOG=2**20
 LOGFILE=TMPDIR+"/server.log"#"/dev/stderr" # logger output
 SSL_CONTEXT=None # "adhoc" or ('cert.pem', 'key.pem')
+MAXJOBS=None # maximum number of concurrent simulations (default is CPU count)
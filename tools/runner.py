@@ -11,6 +11,16 @@ import gridlabd.runner as gld
 version = gld.gridlabd("--version")
 print(version)
 ~~~
+
+The following python code runs models concurrently, using at most 4 gridlabd
+processes at a time, and prints the errors as they occur.
+
+~~~
+import gridlabd.runner as gld
+pool = gld.GridlabdPool(maxjobs=4)
+results = pool.map([[x] for x in ["model1.glm","model2.glm"]],
+    timeout=600,on_stderr=lambda x:print(x,end=""))
+~~~
 """
 import os
 import sys
@@ -19,6 +29,10 @@ import io
 import subprocess
 import time
 import shutil
+import signal
+import asyncio
+import threading
+import concurrent.futures
 import gridlabd as gld
 import random
 from typing import TypeVar
@@ -49,6 +63,9 @@ EXITCODES = {
    255 : "EXCEPTION",
 }
 
+MAXJOBS = os.cpu_count() # default maximum number of concurrent runs in a pool
+STREAMLIMIT = 2**24 # maximum line length read from asynchronous runs
+
 def gridlabd(*args,split:bool|str=None,**kwargs) -> str:
     """Run gridlabd and return the output
 
@@ -71,6 +88,30 @@ def gridlabd(*args,split:bool|str=None,**kwargs) -> str:
     gld = GridlabdRunner(*args,**kwargs)
     return gld.result.stdout if not split else gld.result.stdout.strip().split(split if type(split) is str else "\n")
 
+def _command(args,binary,kwargs):
+    cmd = shutil.which("gridlabd.bin" if binary else "gridlabd")
+    if not cmd:
+        raise GridlabdRunnerException(-1,"gridlabd not found")
+    command = [cmd]
+    for name,value in kwargs.items():
+        command.extend(["-D",f"{name}={value}"])
+    command.extend(args)
+    return command
+
+def _killpg(process):
+    # gridlabd runs the binary in a child process, so the whole process group must be killed
+    try:
+        os.killpg(process.pid,signal.SIGKILL)
+    except (ProcessLookupError,PermissionError):
+        process.kill()
+
+def _check(result):
+    if result.returncode != 0:
+        raise GridlabdRunnerException(f"gridlabd.{EXITCODES[result.returncode]} -- {result.stderr}" 
+            if result.returncode in EXITCODES 
+            else f"gridlabd.EXITCODE {result.returncode}") 
+    return result
+
 class GridlabdRunner:
     """GridLAB-D runner class"""
     def __init__(self,*args,
@@ -79,6 +120,8 @@ class GridlabdRunner:
             wait:bool = True,
             timeout:float = None,
             source:str|TypeVar('io.BufferedIOBase') = None,
+            on_stdout:callable = None,
+            on_stderr:callable = None,
             **kwargs,
             ):
         """Construct a runner
@@ -96,6 +139,10 @@ class GridlabdRunner:
         * `timeout`: seconds to wait for completion before failing
         
         * `source`: input data source
+
+        * `on_stdout`: function called with each line of output
+
+        * `on_stderr`: function called with each line of errors
         
         * `**kwargs`: gridlabd global definitions
 
@@ -103,23 +150,20 @@ class GridlabdRunner:
 
         * `GridlabdRunnerException(code,stderr)`
         """
-        cmd = shutil.which("gridlabd.bin" if binary else "gridlabd")
-        if not cmd:
-            raise GridlabdRunnerException(-1,"gridlabd not found")
-        self.command = [cmd]
-        for name,value in kwargs.items():
-            self.command.extend(["-D",f"{name}={value}"])
-        self.command.extend(args)
+        self.command = _command(args,binary,kwargs)
         self.process = None
         self.result = None
-        if not start:
-            raise NotImplementedError("GridlabdRunner.start")
-        elif not wait:
-            raise NotImplementedError("GridlabdRunner.wait")
-        else:
-            if isinstance(source,str):
-                source = io.StringIO(source)
-            self.run(timeout=timeout,source=source)
+        self.output = []
+        self.errors = []
+        self.timeout = timeout
+        self.source = source
+        self.on_stdout = on_stdout
+        self.on_stderr = on_stderr
+        self.timedout = False
+        self._readers = []
+        self._timer = None
+        if start:
+            self.start(wait=wait)
 
     def run(self,timeout:float=None,source:TypeVar('io.BufferedIOBase')=None):
         """Run gridlabd
@@ -139,22 +183,11 @@ class GridlabdRunner:
         
         * `subprocess.TimeoutExpired`
         """
-        try:
-            self.result = subprocess.run(self.command, 
-                capture_output = True, 
-                text = True,
-                timeout = timeout,
-                input = source.read() if source else None,
-                )
-        except subprocess.TimeoutExpired:
-            raise
-        except:
-            raise
-        if self.result.returncode != 0:
-            raise GridlabdRunnerException(f"gridlabd.{EXITCODES[self.result.returncode]} -- {self.result.stderr}" 
-                if self.result.returncode in EXITCODES 
-                else f"gridlabd.EXITCODE {self.result.returncode}") 
-        return self.result.stdout
+        if not timeout is None:
+            self.timeout = timeout
+        if not source is None:
+            self.source = source
+        return self.start(wait=True)
 
     def is_started(self) -> bool:
         """Check if gridlabd is started
@@ -172,7 +205,7 @@ class GridlabdRunner:
         
         * `bool`: gridlabd is running
         """
-        return not self.process is None and self.result is None
+        return not self.process is None and self.process.poll() is None
         
     def is_completed(self) -> bool:
         """Check if gridlabd is done
@@ -181,7 +214,7 @@ class GridlabdRunner:
         
         * `bool`: process is completed
         """
-        return not self.result is None
+        return not self.result is None or ( not self.process is None and not self.process.poll() is None )
 
     def start(self,wait=True):
         """Start gridlabd
@@ -189,11 +222,41 @@ class GridlabdRunner:
         Arguments:
 
         * `wait`: enable wait for completion
+
+        Returns:
+
+        * `str`: output if `wait` is enabled, otherwise `None`
         """
         if self.is_completed():
             raise GridlabdRunnerException("already completed")
         if self.is_started():
             raise GridlabdRunnerException("already started")
+        source = self.source
+        if isinstance(source,str):
+            source = io.StringIO(source)
+        self.process = subprocess.Popen(self.command,
+            stdin = subprocess.PIPE if source else None,
+            stdout = subprocess.PIPE,
+            stderr = subprocess.PIPE,
+            text = True,
+            start_new_session = True,
+            )
+        self._readers = [threading.Thread(target=self._read,args=x,daemon=True) for x in [
+            (self.process.stdout,self.output,self.on_stdout),
+            (self.process.stderr,self.errors,self.on_stderr),
+            ]]
+        for reader in self._readers:
+            reader.start()
+        if self.timeout:
+            self._timer = threading.Timer(self.timeout,self._kill)
+            self._timer.start()
+        if source:
+            try:
+                self.process.stdin.write(source.read())
+                self.process.stdin.close()
+            except BrokenPipeError:
+                pass
+        return self.wait() if wait else None
 
     def wait(self,timeout=None):
         """Wait for gridlabd to complete
@@ -201,9 +264,218 @@ class GridlabdRunner:
         Arguments:
 
         * `timeout`: wait timeout in seconds
+
+        Returns:
+
+        * `str`: output
+
+        Exceptions:
+
+        * `GridlabdRunnerException(code,message)`
+
+        * `subprocess.TimeoutExpired`
         """
-        if self.is_completed():
+        if not self.result is None:
             raise GridlabdRunnerException("already completed")
+        if not self.is_started():
+            raise GridlabdRunnerException("not started")
+        self.process.wait(timeout)
+        if self._timer:
+            self._timer.cancel()
+        for reader in self._readers:
+            reader.join()
+        self.result = subprocess.CompletedProcess(self.command,
+            self.process.returncode,
+            "".join(self.output),
+            "".join(self.errors),
+            )
+        if self.timedout:
+            raise subprocess.TimeoutExpired(self.command,self.timeout,self.result.stdout,self.result.stderr)
+        return _check(self.result).stdout
+
+    def _read(self,stream,lines,callback):
+        for line in stream:
+            lines.append(line)
+            if callback:
+                callback(line)
+        stream.close()
+
+    def _kill(self):
+        if self.is_running():
+            self.timedout = True
+            _killpg(self.process)
+
+async def gridlabd_async(*args,
+        binary:bool = False,
+        timeout:float = None,
+        source:str = None,
+        on_stdout:callable = None,
+        on_stderr:callable = None,
+        **kwargs,
+        ) -> TypeVar('subprocess.CompletedProcess'):
+    """Run gridlabd asynchronously
+
+    Arguments:
+
+    * `*args`: gridlabd command line arguments
+
+    * `binary`: use the gridlabd binary if possible
+
+    * `timeout`: seconds to wait for completion before failing
+
+    * `source`: input data
+
+    * `on_stdout`: function called with each line of output
+
+    * `on_stderr`: function called with each line of errors
+
+    * `**kwargs`: gridlabd global definitions
+
+    Returns:
+
+    * `subprocess.CompletedProcess`: the completed run
+
+    Exceptions:
+
+    * `GridlabdRunnerException(code,message)`
+
+    * `subprocess.TimeoutExpired`
+    """
+    command = _command(args,binary,kwargs)
+    process = await asyncio.create_subprocess_exec(*command,
+        stdin = asyncio.subprocess.PIPE if source else None,
+        stdout = asyncio.subprocess.PIPE,
+        stderr = asyncio.subprocess.PIPE,
+        limit = STREAMLIMIT,
+        start_new_session = True,
+        )
+    output = []
+    errors = []
+    async def read(stream,lines,callback):
+        async for line in stream:
+            line = line.decode()
+            lines.append(line)
+            if callback:
+                callback(line)
+    async def write():
+        if source:
+            try:
+                process.stdin.write(source.encode() if isinstance(source,str) else source.read().encode())
+                await process.stdin.drain()
+                process.stdin.close()
+            except (BrokenPipeError,ConnectionResetError):
+                pass
+    try:
+        await asyncio.wait_for(asyncio.gather(
+                write(),
+                read(process.stdout,output,on_stdout),
+                read(process.stderr,errors,on_stderr),
+                process.wait(),
+                ),timeout)
+    except asyncio.TimeoutError:
+        _killpg(process)
+        await process.wait()
+        raise subprocess.TimeoutExpired(command,timeout,"".join(output),"".join(errors))
+    except asyncio.CancelledError:
+        if process.returncode is None:
+            _killpg(process)
+            await process.wait()
+        raise
+    return _check(subprocess.CompletedProcess(command,process.returncode,"".join(output),"".join(errors)))
+
+class GridlabdPool:
+    """GridLAB-D runner pool"""
+    def __init__(self,maxjobs:int=None):
+        """Construct a pool of concurrent gridlabd runs
+
+        Arguments:
+
+        * `maxjobs`: maximum number of concurrent runs (default is `MAXJOBS`)
+
+        Description:
+
+        The pool runs gridlabd asynchronously using `run()` and `gather()`.
+        Synchronous code may use `map()` to run a list of jobs, or `submit()`
+        to run a job in a thread, which returns a `concurrent.futures.Future`.
+        Threads are sufficient because each run is a separate process.
+        """
+        self.maxjobs = maxjobs if maxjobs else MAXJOBS
+        self.executor = None
+        self._semaphore = None
+        self._loop = None
+
+    async def run(self,*args,**kwargs) -> TypeVar('subprocess.CompletedProcess'):
+        """Run gridlabd asynchronously when a job slot is available
+
+        Arguments:
+
+        * `*args`: gridlabd command line arguments
+
+        * `**kwargs`: run options and gridlabd global definitions (see `gridlabd_async()`)
+
+        Returns:
+
+        * `subprocess.CompletedProcess`: the completed run
+        """
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._semaphore = asyncio.Semaphore(self.maxjobs)
+        async with self._semaphore:
+            return await gridlabd_async(*args,**kwargs)
+
+    async def gather(self,jobs:list[list[str]],return_exceptions:bool=True,**kwargs) -> list:
+        """Run many gridlabd jobs asynchronously
+
+        Arguments:
+
+        * `jobs`: list of gridlabd command line arguments for each job
+
+        * `return_exceptions`: return exceptions instead of raising them
+
+        * `**kwargs`: run options and gridlabd global definitions used by all jobs
+
+        Returns:
+
+        * `list`: the completed runs (or exceptions) in the order of `jobs`
+        """
+        return await asyncio.gather(*[self.run(*job,**kwargs) for job in jobs],
+            return_exceptions=return_exceptions)
+
+    def map(self,jobs:list[list[str]],return_exceptions:bool=True,**kwargs) -> list:
+        """Run many gridlabd jobs and wait for all of them to complete
+
+        See `gather()` for details.
+        """
+        return asyncio.run(self.gather(jobs,return_exceptions,**kwargs))
+
+    def submit(self,*args,**kwargs) -> TypeVar('concurrent.futures.Future'):
+        """Run gridlabd in a pool thread
+
+        Arguments:
+
+        * `*args`: gridlabd command line arguments
+
+        * `**kwargs`: runner options and gridlabd global definitions (see `GridlabdRunner`)
+
+        Returns:
+
+        * `concurrent.futures.Future`: the future runner
+        """
+        if self.executor is None:
+            self.executor = concurrent.futures.ThreadPoolExecutor(self.maxjobs)
+        return self.executor.submit(GridlabdRunner,*args,**kwargs)
+
+    def shutdown(self,wait:bool=True):
+        """Shutdown the pool threads
+
+        Arguments:
+
+        * `wait`: wait for submitted runs to complete
+        """
+        if self.executor:
+            self.executor.shutdown(wait=wait)
+            self.executor = None
 
 if __name__ == '__main__':
 
@@ -267,6 +539,35 @@ if __name__ == '__main__':
                 result = gridlabd(".glm",source="#print hello")
                 self.assertEqual(result,"/dev/stdin(1): hello\n")
 
+            def test_nowait(self):
+                gld = GridlabdRunner("--version",wait=False)
+                output = gld.wait()
+                self.assertTrue(gld.is_completed())
+                self.assertTrue(output.startswith("Arras Energy"))
+
+            def test_timeout(self):
+                for run in [
+                        lambda:GridlabdRunner(".glm",source="#system sleep 10",timeout=1),
+                        lambda:asyncio.run(gridlabd_async(".glm",source="#system sleep 10",timeout=1)),
+                        ]:
+                    tic = time.time()
+                    with self.assertRaises(subprocess.TimeoutExpired):
+                        run()
+                    self.assertLess(time.time()-tic,5)
+                gld = GridlabdRunner(".glm",source="#system sleep 10",timeout=1,wait=False)
+                with self.assertRaises(subprocess.TimeoutExpired):
+                    gld.wait()
+                running = [x.split() for x in subprocess.run(["ps","-A","-o","pgid=,stat="],
+                    capture_output=True,text=True).stdout.splitlines()]
+                self.assertFalse([x for x in running if x[0] == str(gld.process.pid) and not x[1].startswith("Z")])
+
+            def test_pool(self):
+                lines = []
+                results = GridlabdPool(2).map([["--version"]]*4,on_stdout=lines.append)
+                self.assertEqual(len(results),4)
+                self.assertTrue(all(x.stdout.startswith("Arras Energy") for x in results))
+                self.assertGreaterEqual(len(lines),4)
+
             # def test_start(self):
             #     try:
             #         proc = GridlabdRunner("--version",start=False).start()
@@ -24,6 +24,11 @@ Description:
 
 The `substation` tool accesses substation data for the specified location and substation
 characteristics.
+
+The substation data is preprocessed once into the infrastructure store (see
+[[/Tools/Infrastructure]]), partitioned by country and state and indexed by
+county, zipcode, status, and county fips, so that only the data matching the
+location and filters is read.
 """
 import os
 import sys
@@ -33,6 +38,7 @@ import pandas as pd
 import gridlabd.resource as gr
 import gridlabd.framework as app
 import gridlabd.encoding as encoding
+import gridlabd.infrastructure as infrastructure
 import collections
 
 def _asint(x,default=0):
@@ -112,45 +118,41 @@ class Substation:
         * `lines`: lines range
         """
         file = self.resource.cache(name="infrastructure",index="substations.csv.gz")
-        buffer = io.StringIO(gzip.decompress(open(file,"rb").read()).decode("utf-8"))
-        data = pd.read_csv(buffer,
-            low_memory=False,
-            na_values=["-999999","NOT AVAILABLE"],
-            converters = CONVERTERS,
-            )
-        data.drop(data.loc[data["NAME"].duplicated()].index,inplace=True)
-        data.set_index("NAME",inplace=True)
-        data.index.name = "name"
-        data.drop([x for x in data.columns if x not in CONVERTERS],axis=1,inplace=True)
-        data.columns = [x.lower() for x in data.columns]
-        if country:
-            data.drop(data.loc[~data.country.isin(_aslist(country))].index,axis=0,inplace=True)
-        if state:
-            data.drop(data.loc[~data.state.isin(_aslist(state))].index,axis=0,inplace=True)
-        if county:
-            data.drop(data.loc[~data.county.isin(_aslist(county))].index,axis=0,inplace=True)
-        if zipcode:
-            data.drop(data.loc[~data.zip.isin(_aslist(zipcode))].index,axis=0,inplace=True)
-        if status:
-            data.drop(data.loc[~data.status.isin(_aslist(status))].index,axis=0,inplace=True)
-        if fips:
-            data.drop(data.loc[~data.countyfips.isin(_aslist(fips))].index,axis=0,inplace=True)
+        store = infrastructure.InfrastructureStore("substations",
+            partition=["country","state"],
+            index=["county","zip","status","countyfips"])
+        if not store.is_current(file):
+            buffer = io.StringIO(gzip.decompress(open(file,"rb").read()).decode("utf-8"))
+            data = pd.read_csv(buffer,
+                low_memory=False,
+                na_values=["-999999","NOT AVAILABLE"],
+                converters = CONVERTERS,
+                )
+            data.drop(data.loc[data["NAME"].duplicated()].index,inplace=True)
+            data.set_index("NAME",inplace=True)
+            data.index.name = "name"
+            data.drop([x for x in data.columns if x not in CONVERTERS],axis=1,inplace=True)
+            data.columns = [x.lower() for x in data.columns]
+            store.build(data,file)
+
+        # filters are applied by the store before the rest of the data is read
+        where = {}
+        for column,values in {"country":country,"state":state,"county":county,
+                "zip":zipcode,"status":status,"countyfips":fips}.items():
+            if values:
+                where[column] = _aslist(values)
+        ranges = {}
         if lines:
-            lines = _asminmax(lines)
-            data.drop(data.loc[data.lines<lines.min].index,axis=0,inplace=True)
-            data.drop(data.loc[data.lines>lines.max].index,axis=0,inplace=True)
+            ranges["lines"] = _asminmax(lines)
         if voltage:
             voltage = _asminmax(voltage)
-            data.drop(data.loc[data.min_volt>voltage.max].index,axis=0,inplace=True)
-            data.drop(data.loc[data.max_volt<voltage.min].index,axis=0,inplace=True)
+            ranges["min_volt"] = (None,voltage.max)
+            ranges["max_volt"] = (voltage.min,None)
         if latitude:
-            latitude = _asminmax(latitude)
-            data.drop(data.loc[data.latitude<latitude.min].index,axis=0,inplace=True)
-            data.drop(data.loc[data.latitude>latitude.max].index,axis=0,inplace=True)
+            ranges["latitude"] = _asminmax(latitude)
         if longitude:
-            longitude = _asminmax(longitude)
-            data.drop(data.loc[data.longitude<longitude.min].index,axis=0,inplace=True)
-            data.drop(data.loc[data.longitude>longitude.max].index,axis=0,inplace=True)
+            ranges["longitude"] = _asminmax(longitude)
+        data = store.read(where=where,ranges=ranges)
         self.data = data
 
     def to_dict(self) -> dict:
@@ -31,6 +31,11 @@ The follow weather TYPE values are supported:
 
 * `amy2018`: actual meteorological data from NREL that corresponds to enduse load data (see `enduse` tool)
 
+Downloaded data is kept in the weather store using the weather TYPE as the
+source (see `gridlabd weather_store help`). Files found in the weather store
+mirror folder `TYPE/NAME` are used instead of downloading them, where `NAME`
+is the name of the file at the data source.
+
 Example:
 
 The following example create a typical weather model for December 2020 in Snohomish County Washington 
@@ -44,6 +49,7 @@ See also:
 * [[/Tools/Census]]
 * [[/Toosl/Enduse]]
 * [[/Tools/Framework]]
+* [[/Tools/Weather_store]]
 """
 
 import os
@@ -55,6 +61,7 @@ import pandas as pd
 import gridlabd.census as census
 import gridlabd.framework as app
 import gridlabd.timeseries as ts
+import gridlabd.weather_store as weather_store
 
 WEATHER_URL = {
     "tmy3": "https://oedi-data-lake.s3.amazonaws.com/nrel-pds-building-stock/end-use-load-profiles-for-us-building-stock/2021/resstock_tmy3_release_1/weather/tmy3/{gcode}_tmy3.csv",
@@ -138,27 +145,31 @@ class Weather:
         self.data = {}
         self.type = weather_type
 
-        # handle weather cache
-        cachefile = os.path.join(cachedir,f"{country}_{state}_{county}_{weather_type}.csv.gz")
-        if os.path.exists(cachefile):
-            data = pd.read_csv(cachefile,index_col=[0],parse_dates=True)
-        else:
-            url = WEATHER_URL[weather_type].format(gcode=gcode.upper())
-            import urllib
-            try:
-                data = pd.read_csv(url,
-                    index_col = [0],
-                    parse_dates = True,
-                    dtype = float,
-                    )
-                data.to_csv(cachefile,index=True,header=True)
-            except urllib.error.HTTPError as err:
-                app.error(f"weather not available ({err} for {url})")
-                if ignore:
-                    return
-                raise
-        data.columns = [WEATHER_COLUMNS[x] for x in data.columns]
-        data.index = pd.date_range("2018-01-01 00:00:00","2019-01-01 00:00:00",freq="1h")[:-1]
+        # handle weather store
+        store = weather_store.WeatherStore(weather_type)
+        data = store.get(gcode,2018)
+        if data is None:
+            cachefile = os.path.join(cachedir,f"{country}_{state}_{county}_{weather_type}.csv.gz")
+            if os.path.exists(cachefile):
+                data = pd.read_csv(cachefile,index_col=[0],parse_dates=True)
+            else:
+                url = WEATHER_URL[weather_type].format(gcode=gcode.upper())
+                mirror = store.mirror(os.path.basename(url))
+                import urllib
+                try:
+                    data = pd.read_csv(mirror if mirror else url,
+                        index_col = [0],
+                        parse_dates = True,
+                        dtype = float,
+                        )
+                except urllib.error.HTTPError as err:
+                    app.error(f"weather not available ({err} for {url})")
+                    if ignore_errors:
+                        return
+                    raise
+            data.columns = [WEATHER_COLUMNS[x] for x in data.columns]
+            data.index = pd.date_range("2018-01-01 00:00:00","2019-01-01 00:00:00",freq="1h")[:-1]
+            store.put(gcode,2018,data)
 
         # resample weather data
         data = data.resample(timestep).sum()
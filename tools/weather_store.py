@@ -0,0 +1,402 @@
+"""Weather data store
+
+Syntax: gridlabd weather_store [OPTIONS ...] COMMAND
+
+Options:
+
+* `--source=SOURCE`: specify the weather data source, e.g., `nsrdb`, `noaa`,
+  `meteostat`, `tmy3`
+
+* `--mirror=FOLDER`: specify the local mirror folder of downloaded data files
+
+Commands:
+
+* `list`: list the sources in the store, or the keys of the source
+
+* `years=KEY`: list the years stored for a key
+
+* `clear[=KEY]`: clear the source, or only the key of the source
+
+* `import=CSVFILE[,...]`: import CSV files named `KEY_YEAR.csv` into the source
+
+Description:
+
+The `weather_store` tool manages the local weather data store shared by the
+`weather`, `nsrdb_weather`, `noaa_weather`, and `meteostat_weather` tools.
+Data is stored by source, key (e.g., station id or geohash), and year in a
+columnar layout, with the timestamps and each column saved in separate numpy
+files.  Reading only the columns needed and the time window needed does not
+require loading the rest of the data.
+
+When the tools cannot find data in the store, they look for the file they
+would download in the mirror folder `FOLDER/SOURCE/NAME`, where `NAME` is the
+name of the file at the data source.  If the file is not found in the mirror,
+the data is downloaded. The mirror folder is set by the `GLD_WEATHER_MIRROR`
+environment variable.
+
+Example:
+
+The following example imports the station year `KSFO_2020.csv` into the `noaa`
+source and lists the years stored for the station:
+
+~~~
+gridlabd weather_store --source=noaa import=KSFO_2020.csv years=KSFO
+~~~
+
+See also:
+
+* [[/Tools/Meteostat_weather]]
+* [[/Tools/Noaa_weather]]
+* [[/Tools/Nsrdb_weather]]
+* [[/Tools/Weather]]
+"""
+
+import os
+import sys
+import json
+import shutil
+import numpy as np
+import pandas as pd
+import gridlabd.framework as app
+
+STOREDIR = os.path.join(os.environ["GLD_ETC"] if "GLD_ETC" in os.environ
+    else "/usr/local/share/gridlabd",".cache","weather_store")
+
+MIRROR = os.environ.get("GLD_WEATHER_MIRROR")
+
+EARTH_RADIUS = 6371.0088 # km (mean radius, same as haversine)
+
+class WeatherStoreError(Exception):
+    """Weather store exception"""
+
+class WeatherStore:
+    """Weather data store"""
+    def __init__(self,source:str,storedir:str=None):
+        """Access a weather data source in the store
+
+        Arguments:
+
+        * `source`: weather data source name
+
+        * `storedir`: store folder (default is `STOREDIR`)
+        """
+        self.source = source
+        self.storedir = os.path.join(storedir if storedir else STOREDIR,source)
+
+    def path(self,key:str,year:int|str=None) -> str:
+        """Get the folder of a key or key year"""
+        if year is None:
+            return os.path.join(self.storedir,str(key))
+        return os.path.join(self.storedir,str(key),str(year))
+
+    def keys(self) -> list[str]:
+        """Get the keys stored"""
+        if not os.path.exists(self.storedir):
+            return []
+        return sorted(x for x in os.listdir(self.storedir) if not x.startswith("."))
+
+    def years(self,key:str) -> list[str]:
+        """Get the years stored for a key"""
+        path = self.path(key)
+        if not os.path.exists(path):
+            return []
+        return sorted(x for x in os.listdir(path)
+            if os.path.exists(os.path.join(path,x,"columns.json")))
+
+    def exists(self,key:str,year:int|str) -> bool:
+        """Check whether a key year is stored"""
+        return os.path.exists(os.path.join(self.path(key,year),"columns.json"))
+
+    def put(self,key:str,year:int|str,data:pd.DataFrame,meta:dict={}):
+        """Store the data of a key year
+
+        Arguments:
+
+        * `key`: data key, e.g., station id or geohash
+
+        * `year`: data year
+
+        * `data`: data indexed by timestamp
+
+        * `meta`: additional information stored with the data (must be JSON
+          serializable)
+        """
+        path = self.path(key,year)
+        tmpdir = f"{path}.{os.getpid()}"
+        os.makedirs(tmpdir,exist_ok=True)
+        try:
+            index = pd.DatetimeIndex(data.index)
+            np.save(os.path.join(tmpdir,"timestamp.npy"),index.as_unit("ns").asi8)
+            for n,column in enumerate(data.columns):
+                values = data[column].to_numpy()
+                np.save(os.path.join(tmpdir,f"{n}.npy"),values.astype(str) if values.dtype.kind == 'O' else values)
+            with open(os.path.join(tmpdir,"columns.json"),"w") as fh:
+                json.dump(dict(
+                    columns = [str(x) for x in data.columns],
+                    index = data.index.name,
+                    timezone = str(index.tz) if index.tz else None,
+                    meta = meta,
+                    ),fh,default=_native)
+            shutil.rmtree(path,ignore_errors=True)
+            os.rename(tmpdir,path)
+        finally:
+            shutil.rmtree(tmpdir,ignore_errors=True)
+
+    def info(self,key:str,year:int|str) -> dict:
+        """Get the columns, index name, timezone, and meta data of a key year"""
+        with open(os.path.join(self.path(key,year),"columns.json"),"r") as fh:
+            return json.load(fh)
+
+    def get(self,key:str,
+            years:list[int|str]|int|str=None,
+            start:str=None,
+            end:str=None,
+            columns:list[str]=None,
+            ) -> pd.DataFrame:
+        """Read data from the store
+
+        Arguments:
+
+        * `key`: data key
+
+        * `years`: year or list of years to read (default is all years stored)
+
+        * `start`: start of time window (inclusive, default is no start)
+
+        * `end`: end of time window (inclusive, default is no end)
+
+        * `columns`: columns to read (default is all columns)
+
+        Returns:
+
+        * `pandas.DataFrame`: data found, or `None` if nothing is stored
+
+        Description:
+
+        Only the columns and the time window requested are read from the
+        column files.
+        """
+        if years is None:
+            years = self.years(key)
+        elif isinstance(years,(int,str)):
+            years = [years]
+        result = []
+        for year in years:
+            if not self.exists(key,year):
+                continue
+            path = self.path(key,year)
+            info = self.info(key,year)
+            timestamp = np.load(os.path.join(path,"timestamp.npy"),mmap_mode='r')
+            first = 0 if start is None else np.searchsorted(timestamp,_nanoseconds(start,info["timezone"]),side='left')
+            last = len(timestamp) if end is None else np.searchsorted(timestamp,_nanoseconds(end,info["timezone"]),side='right')
+            if columns:
+                missing = [x for x in columns if x not in info["columns"]]
+                if missing:
+                    raise WeatherStoreError(f"columns {missing} not found in {self.source}/{key}/{year}")
+            index = pd.DatetimeIndex(np.array(timestamp[first:last]).view("datetime64[ns]"),name=info["index"])
+            if info["timezone"]:
+                index = index.tz_localize("UTC").tz_convert(info["timezone"])
+            result.append(pd.DataFrame({x:_load(os.path.join(path,f"{n}.npy"),first,last)
+                    for n,x in enumerate(info["columns"]) if not columns or x in columns},
+                index=index))
+        if not result:
+            return None
+        return pd.concat(result) if len(result) > 1 else result[0]
+
+    def mirror(self,name:str) -> str:
+        """Get the mirror file of a data source file
+
+        Arguments:
+
+        * `name`: data source file name
+
+        Returns:
+
+        * `str`: the path of the file in the mirror, or `None` if not found
+        """
+        if not MIRROR:
+            return None
+        pathname = os.path.join(MIRROR,self.source,name)
+        return pathname if os.path.exists(pathname) else None
+
+    def clear(self,key:str=None):
+        """Clear the source, or only a key of the source"""
+        shutil.rmtree(self.storedir if key is None else self.path(key),ignore_errors=True)
+
+def _native(value):
+    return value.item() if hasattr(value,"item") else str(value)
+
+def _load(file,first,last):
+    values = np.array(np.load(file,mmap_mode='r')[first:last])
+    return values.astype(object) if values.dtype.kind == 'U' else values
+
+def _nanoseconds(value,timezone):
+    value = pd.Timestamp(value)
+    if timezone:
+        value = value.tz_localize(timezone) if value.tzinfo is None else value
+    elif value.tzinfo:
+        value = value.tz_convert(None)
+    return value.value
+
+class StationIndex:
+    """Nearest station index"""
+    def __init__(self,
+            latitudes:list[float],
+            longitudes:list[float],
+            ids:list=None,
+            ):
+        """Create an index of station locations
+
+        Arguments:
+
+        * `latitudes`: station latitudes (deg)
+
+        * `longitudes`: station longitudes (deg)
+
+        * `ids`: station ids (default is station position in list)
+        """
+        from scipy.spatial import cKDTree
+        self.ids = list(range(len(latitudes))) if ids is None else list(ids)
+        self.tree = cKDTree(_unitvector(np.asarray(latitudes,dtype=float),np.asarray(longitudes,dtype=float)))
+
+    def nearest(self,latitude:float,longitude:float,k:int=1) -> list[tuple]:
+        """Find the nearest stations
+
+        Arguments:
+
+        * `latitude`: location latitude (deg)
+
+        * `longitude`: location longitude (deg)
+
+        * `k`: number of stations to find
+
+        Returns:
+
+        * `list`: station ids and great circle distances (km), nearest first
+        """
+        chord,found = self.tree.query(_unitvector(np.array([latitude]),np.array([longitude]))[0],k=k)
+        chord,found = np.atleast_1d(chord),np.atleast_1d(found)
+        distance = 2 * EARTH_RADIUS * np.arcsin(np.minimum(chord/2,1.0))
+        return [(self.ids[n],float(d)) for n,d in zip(found,distance) if n < len(self.ids)]
+
+def _unitvector(latitudes,longitudes):
+    lat,lon = np.radians(latitudes),np.radians(longitudes)
+    return np.column_stack([np.cos(lat)*np.cos(lon),np.cos(lat)*np.sin(lon),np.sin(lat)])
+
+def main(argv:list[str]) -> int:
+    """Main routine
+
+    Arguments:
+
+    * `argv`: command line arguments
+
+    Returns:
+
+    * `int`: exit code
+    """
+    # handle no options case -- typically a cry for help
+    if len(argv) == 1:
+
+        app.syntax(__doc__)
+
+    # handle stardard app arguments --debug, --warning, --verbose, --quiet, --silent
+    args = app.read_stdargs(argv)
+
+    source = None
+
+    for key,value in args:
+
+        if key in ["-h","--help","help"]:
+
+            print(__doc__,file=sys.stdout)
+
+        elif key in ["--source"] and len(value) == 1:
+
+            source = value[0]
+
+        elif key in ["--mirror"] and len(value) == 1:
+
+            global MIRROR
+            MIRROR = value[0]
+
+        elif key == "list":
+
+            if source:
+                print("\n".join(WeatherStore(source).keys()))
+            elif os.path.exists(STOREDIR):
+                print("\n".join(sorted(os.listdir(STOREDIR))))
+
+        elif not source:
+
+            app.error("source not specified")
+            return app.E_MISSING
+
+        elif key == "years" and len(value) == 1:
+
+            print("\n".join(WeatherStore(source).years(value[0])))
+
+        elif key == "clear":
+
+            WeatherStore(source).clear(value[0] if value else None)
+
+        elif key == "import" and value:
+
+            store = WeatherStore(source)
+            for file in value:
+                name,year = os.path.splitext(os.path.basename(file))[0].rsplit("_",1)
+                app.verbose(f"importing {file} into {source}/{name}/{year}")
+                store.put(name,year,pd.read_csv(file,index_col=[0],parse_dates=[0]))
+
+        else:
+
+            app.error(f"'{key}={value}' is invalid")
+            return app.E_INVALID
+
+    # normal termination condition
+    return app.E_OK
+
+def test() -> (int,int):
+
+    n_tested = 0
+    n_failed = 0
+    import random
+    name = f".test-{hex(random.randint(0,2**64-1))[2:]}"
+    store = WeatherStore(name)
+
+    try:
+
+        data = pd.DataFrame({"temperature[degF]":np.arange(8760,dtype=float),"clouds":np.arange(8760)%10},
+            index=pd.date_range("2020-01-01 00:00:00",periods=8760,freq="1h",name="datetime"))
+        store.put("test",2020,data,meta={"Latitude":[37.5]})
+        assert store.years("test") == ["2020"], "years stored are incorrect"
+        assert store.info("test",2020)["meta"]["Latitude"] == [37.5], "meta data is incorrect"
+        assert store.get("test").equals(data), "stored data does not match"
+        window = store.get("test",start="2020-02-01",end="2020-02-01 23:00:00",columns=["clouds"])
+        assert window.equals(data.loc["2020-02-01":"2020-02-01 23:00:00",["clouds"]]), "time window read is incorrect"
+        index = StationIndex([37.5,40.0,47.6],[-122.5,-75.0,-122.3],["SFO","PHL","SEA"])
+        assert index.nearest(37.6,-122.4)[0][0] == "SFO", "nearest station is incorrect"
+
+        n_tested += 1
+
+    except:
+
+        e_type,e_value,e_trace = sys.exc_info()
+        print(f"TEST FAILED: {__file__}@{e_trace.tb_lineno} ({e_type.__name__}) {e_value}")
+        n_failed += 1
+
+    finally:
+
+        shutil.rmtree(store.storedir)
+
+    return n_failed,n_tested
+
+if __name__ == "__main__":
+
+    if not sys.argv[0]:
+
+        n,m = test()
+        print(f"{os.path.basename(__file__)}: {m} tests, {n} failed")
+
+    else:
+
+        app.run(main)